@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 import os
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
 
@@ -15,7 +16,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Action Items - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Action Items - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Action items operations will fail.")
 elif supabase:
@@ -27,6 +28,7 @@ class UserActionItems(BaseModel):
 
 
 @router.get("/user-action-items/{user_id}")
+@cached_route("user:{user_id}")
 async def get_user_action_items(
     user_id: str,
     current_user: User = Depends(get_authorized_user)
@@ -43,7 +45,7 @@ async def get_user_action_items(
 
     try:
         # Fetch user's action items from Supabase
-        response = supabase.table("user_action_items").select("*").eq("user_id", user_id).execute()
+        response = await db.table("user_action_items").select("*").eq("user_id", user_id).execute()
 
         if response.data and len(response.data) > 0:
             # Return the first (and only) record
@@ -79,7 +81,7 @@ async def update_user_action_items(
 
     try:
         # Check if record exists
-        existing = supabase.table("user_action_items").select("*").eq("user_id", user_id).execute()
+        existing = await db.table("user_action_items").select("*").eq("user_id", user_id).execute()
 
         action_data = {
             "user_id": user_id,
@@ -88,10 +90,11 @@ async def update_user_action_items(
 
         if existing.data and len(existing.data) > 0:
             # Update existing record
-            response = supabase.table("user_action_items").update(action_data).eq("user_id", user_id).execute()
+            response = await db.table("user_action_items").update(action_data).eq("user_id", user_id).execute()
         else:
             # Insert new record
-            response = supabase.table("user_action_items").insert(action_data).execute()
+            response = await db.table("user_action_items").insert(action_data).execute()
+        invalidate_tags(user_tag(user_id))
 
         return {
             "success": True,
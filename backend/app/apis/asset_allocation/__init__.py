@@ -13,7 +13,8 @@ SEBI COMPLIANCE:
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, Field, validator
 from typing import Optional, Dict, List
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag
 import os
 import traceback
 from databutton_app.mw.auth_mw import User, get_authorized_user
@@ -28,7 +29,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Asset Allocation - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Asset Allocation - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Asset allocation operations will fail.")
 elif supabase:
@@ -114,7 +115,7 @@ async def save_asset_allocation(
 
         # Get or create user in database
         user_email = f"{sanitize_storage_key(data.user_id)}@finnest.example.com"
-        user_response = supabase.from_("users").select("id").eq("email", user_email).execute()
+        user_response = await db.from_("users").select("id").eq("email", user_email).execute()
 
         user_id_db = None
         if user_response.data and len(user_response.data) > 0:
@@ -127,7 +128,7 @@ async def save_asset_allocation(
                 "email": user_email,
                 "name": f"User {data.user_id[:8]}"
             }
-            user_response = supabase.from_("users").insert(user_data).execute()
+            user_response = await db.from_("users").insert(user_data).execute()
             user_id_db = user_response.data[0]["id"]
             print(f"[Asset Allocation] Created new user_id: {user_id_db}")
 
@@ -152,7 +153,7 @@ async def save_asset_allocation(
             print(f"[Asset Allocation] Saving {allocation.goal_type}: {allocation_data}")
 
             # Upsert: insert or update if exists (based on unique constraint user_id + goal_type)
-            result = supabase.from_("user_asset_allocations").upsert(
+            result = await db.from_("user_asset_allocations").upsert(
                 allocation_data,
                 on_conflict="user_id,goal_type"
             ).execute()
@@ -164,6 +165,7 @@ async def save_asset_allocation(
                 print(f"[Asset Allocation] [WARNING] No data returned for {allocation.goal_type}")
 
         print(f"[Asset Allocation] [OK] Successfully saved {len(saved_allocations)} allocations")
+        invalidate_tags(user_tag(data.user_id))
 
         return {
             "success": True,
@@ -181,6 +183,7 @@ async def save_asset_allocation(
 
 
 @router.get("/get-asset-allocation/{user_id}")
+@cached_route("user:{user_id}")
 async def get_asset_allocation(
     user_id: str,
     current_user: User = Depends(get_authorized_user)
@@ -202,7 +205,7 @@ async def get_asset_allocation(
 
         # Get or create user in database
         user_email = f"{sanitize_storage_key(user_id)}@finnest.example.com"
-        user_response = supabase.from_("users").select("id").eq("email", user_email).execute()
+        user_response = await db.from_("users").select("id").eq("email", user_email).execute()
 
         user_id_db = None
         if user_response.data and len(user_response.data) > 0:
@@ -214,14 +217,14 @@ async def get_asset_allocation(
                 "email": user_email,
                 "name": f"User {user_id[:8]}"
             }
-            user_response = supabase.from_("users").insert(user_data).execute()
+            user_response = await db.from_("users").insert(user_data).execute()
             user_id_db = user_response.data[0]["id"]
             print(f"[Asset Allocation] Created new user_id: {user_id_db}")
             # New user has no allocations yet
             return {"user_id": user_id, "allocations": []}
 
         # Get all allocations for this user
-        allocations_response = supabase.from_("user_asset_allocations").select("*").eq("user_id", user_id_db).execute()
+        allocations_response = await db.from_("user_asset_allocations").select("*").eq("user_id", user_id_db).execute()
 
         if not allocations_response.data:
             print(f"[Asset Allocation] [WARNING] No allocations found for user")
@@ -264,7 +267,7 @@ async def delete_asset_allocation(
 
         # Get user ID from database
         user_email = f"{sanitize_storage_key(user_id)}@finnest.example.com"
-        user_response = supabase.from_("users").select("id").eq("email", user_email).execute()
+        user_response = await db.from_("users").select("id").eq("email", user_email).execute()
 
         if not user_response.data or len(user_response.data) == 0:
             # User doesn't exist, so nothing to delete
@@ -277,7 +280,8 @@ async def delete_asset_allocation(
         user_id_db = user_response.data[0]["id"]
 
         # Delete allocation
-        result = supabase.from_("user_asset_allocations").delete().eq("user_id", user_id_db).eq("goal_type", goal_type).execute()
+        result = await db.from_("user_asset_allocations").delete().eq("user_id", user_id_db).eq("goal_type", goal_type).execute()
+        invalidate_tags(user_tag(user_id))
 
         return {
             "success": True,
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Body
 from pydantic import BaseModel
 # import databutton as db  # Commented out for Railway deployment - not needed
-from supabase import create_client
+from app.utils.db import get_supabase
 import traceback
 import requests
 import json
@@ -16,7 +16,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")  # Use service key for admin op
 print(f"Supabase URL configured: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Supabase SERVICE_KEY configured: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Profile operations will fail.")
 elif supabase:
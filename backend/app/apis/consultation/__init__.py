@@ -7,19 +7,21 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import traceback
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, table_tag
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
 
 router = APIRouter(prefix="/routes")
 
 # Supabase setup
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 print(f"[Consultation API] Initialized with Supabase: {supabase is not None}")
 
+# Consultation types are only edited from the dashboard
+CONSULTATION_TYPES_CACHE_TTL = 60 * 60  # seconds
+
 # Email configuration
 SMTP_SERVER = os.getenv("SMTP_SERVER", "smtp.gmail.com")
 SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
@@ -161,6 +163,7 @@ class ConsultationBookingResponse(BaseModel):
     calendar_link: Optional[str] = None
 
 @router.get("/consultation-types")
+@cached_route(table_tag("consultation_types"), ttl_seconds=CONSULTATION_TYPES_CACHE_TTL)
 async def get_consultation_types():
     """Get available consultation types"""
     try:
@@ -200,7 +203,7 @@ async def get_consultation_types():
                 ]
             }
 
-        response = supabase.from_("consultation_types").select("*").execute()
+        response = await db.from_("consultation_types").select("*").execute()
 
         return {
             "success": True,
@@ -227,7 +230,7 @@ async def book_consultation(
             raise HTTPException(status_code=500, detail="Database not initialized")
 
         # Fetch consultation type details
-        consultation_type_response = supabase.from_("consultation_types")\
+        consultation_type_response = await db.from_("consultation_types")\
             .select("*")\
             .eq("type_name", booking.consultation_type)\
             .execute()
@@ -240,7 +243,7 @@ async def book_consultation(
         # Check if premium consultation and verify subscription
         if booking.consultation_type == 'premium_consultation':
             # Check user subscription
-            subscription_response = supabase.from_("user_subscriptions")\
+            subscription_response = await db.from_("user_subscriptions")\
                 .select("*, subscription_plans(*)")\
                 .eq("user_id", booking.user_id)\
                 .eq("status", "active")\
@@ -277,7 +280,7 @@ async def book_consultation(
             "user_message": booking.user_message
         }
 
-        booking_response = supabase.from_("consultation_bookings")\
+        booking_response = await db.from_("consultation_bookings")\
             .insert(booking_data)\
             .execute()
 
@@ -320,7 +323,7 @@ async def get_user_consultations(
         if not supabase:
             raise HTTPException(status_code=500, detail="Database not initialized")
 
-        response = supabase.from_("consultation_bookings")\
+        response = await db.from_("consultation_bookings")\
             .select("*, consultation_types(*)")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -3,7 +3,7 @@ from pydantic import BaseModel
 from typing import Dict, Any, Optional
 from datetime import datetime
 import os
-from supabase import create_client
+from app.utils.db import db, get_supabase
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id, is_admin_user
 
@@ -16,7 +16,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Feedback - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Feedback - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Feedback operations will fail.")
 elif supabase:
@@ -61,7 +61,7 @@ async def submit_feedback(
         }
 
         # Insert feedback into Supabase
-        response = supabase.table("user_feedback").insert(feedback_data).execute()
+        response = await db.table("user_feedback").insert(feedback_data).execute()
 
         print(f"[OK] Feedback submitted successfully for user: {data.userName} ({data.userEmail})")
 
@@ -93,7 +93,7 @@ async def get_user_feedback(
 
     try:
         # Fetch user's feedback from Supabase
-        response = supabase.table("user_feedback")\
+        response = await db.table("user_feedback")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -123,7 +123,7 @@ async def get_all_feedback(current_user: User = Depends(get_authorized_user)):
 
     try:
         # Fetch all feedback from Supabase
-        response = supabase.table("user_feedback")\
+        response = await db.table("user_feedback")\
             .select("*")\
             .order("created_at", desc=True)\
             .execute()
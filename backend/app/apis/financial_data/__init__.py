@@ -2,13 +2,18 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel, ValidationError, Field
 from typing import List, Optional, Dict, Any, Union
 # import databutton as db  # Commented out for Railway deployment - not needed
+import hashlib
 import json
 import re
+import uuid
 import traceback
-from supabase import create_client
+from app.utils.db import get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag
 import os
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
+from app.apis.portfolio.portfolio_cache import invalidate_user_goals
+from .financial_cache import financial_data_cache, invalidate_user_financial_data, read_epoch, store_if_current
 
 router = APIRouter(prefix="/routes")
 
@@ -19,7 +24,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Financial Data - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Financial Data - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Financial data operations will fail.")
 elif supabase:
@@ -220,10 +225,8 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
                 print(f"[ERROR] Failed to create user in users table: {user_create_error}")
                 # Continue anyway - the insert might fail but at least we logged it
 
-            # Now create or update personal_info
-            personal_info_data = {
-                "user_id": user_id,
-            }
+            # Personal info columns to set (others keep their stored values)
+            personal_info_data = {}
 
             # Add personal info if provided
             if data.personalInfo:
@@ -238,27 +241,6 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
             if data.taxPlan:
                 personal_info_data["tax_plan"] = data.taxPlan.dict()
             
-            # Check if personal info already exists
-            pi_response = supabase.from_("personal_info")\
-                .select("id")\
-                .eq("user_id", user_id)\
-                .execute()
-            
-            personal_info_id = None
-            if pi_response.data and len(pi_response.data) > 0:
-                # Update existing record
-                personal_info_id = pi_response.data[0]["id"]
-                supabase.from_("personal_info")\
-                    .update(personal_info_data)\
-                    .eq("id", personal_info_id)\
-                    .execute()
-            else:
-                # Create new record
-                pi_response = supabase.from_("personal_info")\
-                    .insert(personal_info_data)\
-                    .execute()
-                personal_info_id = pi_response.data[0]["id"]
-            
             # Process assets and liabilities from either detailed structure or legacy format
             # If detailed assets/liabilities provided, compute summaries for backward compatibility
             # Otherwise use provided assetsLiabilities
@@ -292,10 +274,8 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
             else:
                 computed_al = data.assetsLiabilities
             
-            # Now save assets and liabilities
+            # Assets and liabilities row
             assets_liabilities_data = {
-                "user_id": user_id,
-                "personal_info_id": personal_info_id,
                 "real_estate_value": computed_al.realEstateValue,
                 "gold_value": computed_al.goldValue,
                 "mutual_funds_value": computed_al.mutualFundsValue,
@@ -310,30 +290,10 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
                 "liabilities_detail": liabilities_data.dict() if data.liabilities else None,
             }
             
-            # Check if assets/liabilities already exists
-            al_response = supabase.from_("assets_liabilities")\
-                .select("id")\
-                .eq("personal_info_id", personal_info_id)\
-                .execute()
-            
-            if al_response.data and len(al_response.data) > 0:
-                # Update existing record
-                al_id = al_response.data[0]["id"]
-                supabase.from_("assets_liabilities")\
-                    .update(assets_liabilities_data)\
-                    .eq("id", al_id)\
-                    .execute()
-            else:
-                # Create new record
-                supabase.from_("assets_liabilities")\
-                    .insert(assets_liabilities_data)\
-                    .execute()
-            
-            # Save risk appetite (only if provided)
+            # Risk appetite (only if provided)
+            risk_appetite_data = None
             if data.riskAppetite:
                 risk_appetite_data = {
-                    "user_id": user_id,
-                    "personal_info_id": personal_info_id,
                     "risk_tolerance": data.riskAppetite.risk_tolerance if data.riskAppetite.risk_tolerance is not None else data.riskAppetite.riskTolerance,
                     "inflation_rate": data.riskAppetite.inflationRate if hasattr(data.riskAppetite, 'inflationRate') else 5,
                     "retirement_age": data.riskAppetite.retirementAge if hasattr(data.riskAppetite, 'retirementAge') else 55,
@@ -341,68 +301,38 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
                     "risk_question2": data.riskAppetite.riskQuestion2,
                 }
 
-                # Check if risk appetite already exists
-                ra_response = supabase.from_("risk_appetite")\
-                    .select("id")\
-                    .eq("personal_info_id", personal_info_id)\
-                    .execute()
-
-                if ra_response.data and len(ra_response.data) > 0:
-                    # Update existing record
-                    ra_id = ra_response.data[0]["id"]
-                    supabase.from_("risk_appetite")\
-                        .update(risk_appetite_data)\
-                        .eq("id", ra_id)\
-                        .execute()
-                else:
-                    # Create new record
-                    supabase.from_("risk_appetite")\
-                        .insert(risk_appetite_data)\
-                        .execute()
-            
-            # Delete existing goals and create new ones (only if goals provided)
+            # Goals replace the stored set (only if provided); unchanged goals are left alone
+            goals_data = None
             if data.goals:
-                supabase.from_("goals")\
-                    .delete()\
-                    .eq("personal_info_id", personal_info_id)\
-                    .execute()
-
-                # Add short-term goals
-                for goal in data.goals.shortTermGoals:
-                    goal_data = {
-                        "user_id": user_id,
-                        "personal_info_id": personal_info_id,
-                        "name": goal.name,
-                        "amount": goal.amount,
-                        "years": goal.years,
-                        "goal_type": "short_term"
-                    }
-                    supabase.from_("goals").insert(goal_data).execute()
-
-                # Add mid-term goals
-                for goal in data.goals.midTermGoals:
-                    goal_data = {
-                        "user_id": user_id,
-                        "personal_info_id": personal_info_id,
-                        "name": goal.name,
-                        "amount": goal.amount,
-                        "years": goal.years,
-                        "goal_type": "mid_term"
-                    }
-                    supabase.from_("goals").insert(goal_data).execute()
-
-                # Add long-term goals
-                for goal in data.goals.longTermGoals:
-                    goal_data = {
-                        "user_id": user_id,
-                        "personal_info_id": personal_info_id,
-                        "name": goal.name,
-                        "amount": goal.amount,
-                        "years": goal.years,
-                        "goal_type": "long_term"
-                    }
-                    supabase.from_("goals").insert(goal_data).execute()
-            
+                goals_data = [
+                    {"name": goal.name, "amount": goal.amount, "years": goal.years, "goal_type": goal_type}
+                    for goal_type, goals in (
+                        ("short_term", data.goals.shortTermGoals),
+                        ("mid_term", data.goals.midTermGoals),
+                        ("long_term", data.goals.longTermGoals),
+                    )
+                    for goal in goals
+                ]
+
+            # Save everything in one transaction (migration 025)
+            save_response = supabase.rpc("save_financial_profile", {
+                "p_user_id": user_id,
+                "p_personal_info": personal_info_data,
+                "p_assets_liabilities": assets_liabilities_data,
+                "p_risk_appetite": risk_appetite_data,
+                "p_goals": goals_data,
+            }).execute()
+
+            saved = save_response.data or {}
+            personal_info_id = saved.get("personal_info_id")
+            print(f"[SAVE FINANCIAL DATA] Goals: {saved.get('goals_inserted', 0)} inserted, "
+                  f"{saved.get('goals_updated', 0)} updated, {saved.get('goals_deleted', 0)} deleted")
+
+            if goals_data is not None:
+                invalidate_user_goals(user_id)
+
+            invalidate_user_financial_data(user_id)
+
             return SaveFinancialDataResponse(
                 success=True,
                 message="Financial data saved successfully to database",
@@ -422,6 +352,177 @@ def save_financial_data(data: FinancialDataInput, current_user: User = Depends(g
         print(f"Error saving financial data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save financial data: {str(e)}")
 
+# personal_info with its child rows embedded (all keyed by personal_info_id)
+FINANCIAL_DATA_SELECT = "*, assets_liabilities(*), risk_appetite(*), goals(*)"
+
+
+def _embedded_one(record: Dict[str, Any], table: str) -> Optional[Dict[str, Any]]:
+    """Pop an embedded child row (PostgREST returns an object for one-to-one, a list otherwise)"""
+    value = record.pop(table, None)
+    if isinstance(value, list):
+        return value[0] if value else None
+    return value
+
+
+def load_financial_records(user_id: str):
+    """
+    personal_info, assets_liabilities, risk_appetite and goals rows for a user,
+    fetched in one embedded select
+
+    Raises the same "not found" errors as the separate lookups did.
+    """
+    response = supabase.from_("personal_info")\
+        .select(FINANCIAL_DATA_SELECT)\
+        .eq("user_id", user_id)\
+        .execute()
+
+    if not response.data or len(response.data) == 0:
+        raise Exception("Personal info not found in database")
+
+    personal_info = response.data[0]
+    assets_liabilities = _embedded_one(personal_info, "assets_liabilities")
+    risk_appetite = _embedded_one(personal_info, "risk_appetite")
+    goals = personal_info.pop("goals", None) or []
+
+    if not assets_liabilities:
+        raise Exception("Assets and liabilities not found in database")
+    if not risk_appetite:
+        raise Exception("Risk appetite not found in database")
+
+    return personal_info, assets_liabilities, risk_appetite, goals
+
+
+def _estimated_assets(assets_liabilities: Dict[str, Any]) -> Assets:
+    """Detailed assets estimated from the summary columns"""
+    illiquid_assets = IlliquidAssets(
+        home=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
+        other_real_estate=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
+        epf_ppf_vpf=float(assets_liabilities.get("epf_balance", 0))  # Direct map
+    )
+
+    liquid_assets = LiquidAssets(
+        debt_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2,  # Estimate
+        domestic_equity_mutual_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2  # Estimate
+    )
+
+    return Assets(illiquid=illiquid_assets, liquid=liquid_assets)
+
+
+def _estimated_liabilities(assets_liabilities: Dict[str, Any]) -> Liabilities:
+    """Detailed liabilities mapped from the summary columns"""
+    return Liabilities(
+        home_loan=float(assets_liabilities.get("home_loan", 0)),
+        car_loan=float(assets_liabilities.get("car_loan", 0)),
+        personal_gold_loan=float(assets_liabilities.get("personal_loan", 0)),
+        other_liabilities=float(assets_liabilities.get("other_loans", 0))
+    )
+
+
+def build_financial_data_output(
+    user_id: str,
+    personal_info: Dict[str, Any],
+    assets_liabilities: Dict[str, Any],
+    risk_appetite: Dict[str, Any],
+    goals: List[Dict[str, Any]]
+) -> FinancialDataOutput:
+    """Assemble FinancialDataOutput from the loaded rows"""
+    # Extract detailed assets and liabilities if available, or estimate them from the summary
+    detailed_assets = None
+    detailed_liabilities = None
+
+    if "assets_detail" in assets_liabilities and assets_liabilities["assets_detail"]:
+        try:
+            detailed_assets = Assets(**assets_liabilities["assets_detail"])
+        except Exception as asset_parse_error:
+            print(f"Error parsing assets_detail: {asset_parse_error}")
+            print(f"assets_detail value: {assets_liabilities['assets_detail']}")
+            detailed_assets = _estimated_assets(assets_liabilities)
+    else:
+        detailed_assets = _estimated_assets(assets_liabilities)
+
+    if "liabilities_detail" in assets_liabilities and assets_liabilities["liabilities_detail"]:
+        try:
+            detailed_liabilities = Liabilities(**assets_liabilities["liabilities_detail"])
+        except Exception as liab_parse_error:
+            print(f"Error parsing liabilities_detail: {liab_parse_error}")
+            print(f"liabilities_detail value: {assets_liabilities['liabilities_detail']}")
+            detailed_liabilities = _estimated_liabilities(assets_liabilities)
+    else:
+        detailed_liabilities = _estimated_liabilities(assets_liabilities)
+
+    # Extract new fields if available
+    inflation_rate = risk_appetite.get("inflation_rate", 5)
+    retirement_age = risk_appetite.get("retirement_age", 55)
+
+    # Format the goals to match the FinancialData model
+    short_term_goals = []
+    mid_term_goals = []
+    long_term_goals = []
+
+    for goal in goals:
+        goal_obj = {
+            "name": goal["name"],
+            "amount": float(goal["amount"]),
+            "years": goal["years"]
+        }
+
+        if goal["goal_type"] == "short_term":
+            short_term_goals.append(goal_obj)
+        elif goal["goal_type"] == "mid_term":
+            mid_term_goals.append(goal_obj)
+        elif goal["goal_type"] == "long_term":
+            long_term_goals.append(goal_obj)
+
+    # Extract tax_plan if available (stored as JSONB in personal_info table)
+    tax_plan_data = None
+    if "tax_plan" in personal_info and personal_info["tax_plan"]:
+        try:
+            tax_plan_data = TaxPlan(**personal_info["tax_plan"])
+        except Exception as tax_error:
+            print(f"Error parsing tax_plan: {tax_error}")
+            tax_plan_data = None
+
+    # Create the response object
+    response_data = {
+        "personalInfo": {
+            "name": personal_info["name"],
+            "age": personal_info["age"],
+            "monthlySalary": float(personal_info["monthly_salary"]),
+            "monthlyExpenses": float(personal_info["monthly_expenses"])
+        },
+        "assetsLiabilities": {
+            "realEstateValue": float(assets_liabilities["real_estate_value"]),
+            "goldValue": float(assets_liabilities["gold_value"]),
+            "mutualFundsValue": float(assets_liabilities["mutual_funds_value"]),
+            "epfBalance": float(assets_liabilities["epf_balance"]),
+            "ppfBalance": float(assets_liabilities["ppf_balance"]),
+            "homeLoan": float(assets_liabilities["home_loan"]),
+            "carLoan": float(assets_liabilities["car_loan"]),
+            "personalLoan": float(assets_liabilities["personal_loan"]),
+            "otherLoans": float(assets_liabilities["other_loans"])
+        },
+        "assets": detailed_assets,
+        "liabilities": detailed_liabilities,
+        "goals": {
+            "shortTermGoals": short_term_goals,
+            "midTermGoals": mid_term_goals,
+            "longTermGoals": long_term_goals
+        },
+        "riskAppetite": {
+            "risk_tolerance": risk_appetite["risk_tolerance"],  # New name
+            "inflationRate": inflation_rate,  # New field
+            "retirementAge": retirement_age,  # New field
+            # Legacy fields
+            "riskTolerance": risk_appetite["risk_tolerance"],
+            "riskQuestion1": risk_appetite["risk_question1"] or "",
+            "riskQuestion2": risk_appetite["risk_question2"] or ""
+        },
+        "taxPlan": tax_plan_data,  # NEW: Include tax plan data if available
+        "userId": user_id
+    }
+
+    return FinancialDataOutput(**response_data)
+
 @router.get("/get-financial-data/{user_id}")
 def get_financial_data(user_id: str, current_user: User = Depends(get_authorized_user)) -> FinancialDataOutput:
     print(f"-----> Attempting to get financial data for user_id: {user_id} <-----")
@@ -447,185 +548,15 @@ def get_financial_data(user_id: str, current_user: User = Depends(get_authorized
             if not supabase:
                 raise Exception("Supabase client not initialized")
                 
-            # Use user_id directly - don't convert to email format
-            # This ensures we look up data for the actual authenticated user
-            print(f"Found user by UUID: {user_id}")
-
-            # Get personal info directly using the user_id
-            pi_response = supabase.from_("personal_info")\
-                .select("*")\
-                .eq("user_id", user_id)\
-                .execute()
-                
-            if not pi_response.data or len(pi_response.data) == 0:
-                raise Exception("Personal info not found in database")
-                
-            personal_info = pi_response.data[0]
-            personal_info_id = personal_info["id"]
-            
-            # Get assets and liabilities
-            al_response = supabase.from_("assets_liabilities")\
-                .select("*")\
-                .eq("personal_info_id", personal_info_id)\
-                .execute()
-                
-            if not al_response.data or len(al_response.data) == 0:
-                raise Exception("Assets and liabilities not found in database")
-                
-            assets_liabilities = al_response.data[0]
-            
-            # Extract detailed assets and liabilities if available, or create default structures
-            detailed_assets = None
-            detailed_liabilities = None
-            
-            # Check if we have detailed JSON data
-            if "assets_detail" in assets_liabilities and assets_liabilities["assets_detail"]:
-                try:
-                    detailed_assets = Assets(**assets_liabilities["assets_detail"])
-                except Exception as asset_parse_error:
-                    print(f"Error parsing assets_detail: {asset_parse_error}")
-                    print(f"assets_detail value: {assets_liabilities['assets_detail']}")
-                    # Create default assets structure as fallback
-                    illiquid_assets = IlliquidAssets(
-                        home=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
-                        other_real_estate=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
-                        epf_ppf_vpf=float(assets_liabilities.get("epf_balance", 0))  # Direct map
-                    )
-
-                    liquid_assets = LiquidAssets(
-                        debt_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2,  # Estimate
-                        domestic_equity_mutual_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2  # Estimate
-                    )
-
-                    detailed_assets = Assets(illiquid=illiquid_assets, liquid=liquid_assets)
-            else:
-                # Create default assets structure
-                illiquid_assets = IlliquidAssets(
-                    home=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
-                    other_real_estate=float(assets_liabilities.get("real_estate_value", 0)) / 2,  # Estimate
-                    epf_ppf_vpf=float(assets_liabilities.get("epf_balance", 0))  # Direct map
-                )
-
-                liquid_assets = LiquidAssets(
-                    debt_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2,  # Estimate
-                    domestic_equity_mutual_funds=float(assets_liabilities.get("mutual_funds_value", 0)) / 2  # Estimate
-                )
-
-                detailed_assets = Assets(illiquid=illiquid_assets, liquid=liquid_assets)
-            
-            if "liabilities_detail" in assets_liabilities and assets_liabilities["liabilities_detail"]:
-                try:
-                    detailed_liabilities = Liabilities(**assets_liabilities["liabilities_detail"])
-                except Exception as liab_parse_error:
-                    print(f"Error parsing liabilities_detail: {liab_parse_error}")
-                    print(f"liabilities_detail value: {assets_liabilities['liabilities_detail']}")
-                    # Create default liabilities structure as fallback
-                    detailed_liabilities = Liabilities(
-                        home_loan=float(assets_liabilities.get("home_loan", 0)),
-                        car_loan=float(assets_liabilities.get("car_loan", 0)),
-                        personal_gold_loan=float(assets_liabilities.get("personal_loan", 0)),
-                        other_liabilities=float(assets_liabilities.get("other_loans", 0))
-                    )
-            else:
-                # Create default liabilities structure
-                detailed_liabilities = Liabilities(
-                    home_loan=float(assets_liabilities.get("home_loan", 0)),
-                    car_loan=float(assets_liabilities.get("car_loan", 0)),
-                    personal_gold_loan=float(assets_liabilities.get("personal_loan", 0)),
-                    other_liabilities=float(assets_liabilities.get("other_loans", 0))
-                )
-            
-            # Get risk appetite
-            ra_response = supabase.from_("risk_appetite")\
-                .select("*")\
-                .eq("personal_info_id", personal_info_id)\
-                .execute()
-                
-            if not ra_response.data or len(ra_response.data) == 0:
-                raise Exception("Risk appetite not found in database")
-                
-            risk_appetite = ra_response.data[0]
-            
-            # Extract new fields if available
-            inflation_rate = risk_appetite.get("inflation_rate", 5)
-            retirement_age = risk_appetite.get("retirement_age", 55)
-            
-            # Get goals
-            goals_response = supabase.from_("goals")\
-                .select("*")\
-                .eq("personal_info_id", personal_info_id)\
-                .execute()
-                
-            goals = goals_response.data
-            
-            # Format the data to match the FinancialData model
-            short_term_goals = []
-            mid_term_goals = []
-            long_term_goals = []
-            
-            for goal in goals:
-                goal_obj = {
-                    "name": goal["name"],
-                    "amount": float(goal["amount"]),
-                    "years": goal["years"]
-                }
-                
-                if goal["goal_type"] == "short_term":
-                    short_term_goals.append(goal_obj)
-                elif goal["goal_type"] == "mid_term":
-                    mid_term_goals.append(goal_obj)
-                elif goal["goal_type"] == "long_term":
-                    long_term_goals.append(goal_obj)
-            
-            # Extract tax_plan if available (stored as JSONB in personal_info table)
-            tax_plan_data = None
-            if "tax_plan" in personal_info and personal_info["tax_plan"]:
-                try:
-                    tax_plan_data = TaxPlan(**personal_info["tax_plan"])
-                except Exception as tax_error:
-                    print(f"Error parsing tax_plan: {tax_error}")
-                    tax_plan_data = None
-
-            # Create the response object
-            response_data = {
-                "personalInfo": {
-                    "name": personal_info["name"],
-                    "age": personal_info["age"],
-                    "monthlySalary": float(personal_info["monthly_salary"]),
-                    "monthlyExpenses": float(personal_info["monthly_expenses"])
-                },
-                "assetsLiabilities": {
-                    "realEstateValue": float(assets_liabilities["real_estate_value"]),
-                    "goldValue": float(assets_liabilities["gold_value"]),
-                    "mutualFundsValue": float(assets_liabilities["mutual_funds_value"]),
-                    "epfBalance": float(assets_liabilities["epf_balance"]),
-                    "ppfBalance": float(assets_liabilities["ppf_balance"]),
-                    "homeLoan": float(assets_liabilities["home_loan"]),
-                    "carLoan": float(assets_liabilities["car_loan"]),
-                    "personalLoan": float(assets_liabilities["personal_loan"]),
-                    "otherLoans": float(assets_liabilities["other_loans"])
-                },
-                "assets": detailed_assets,
-                "liabilities": detailed_liabilities,
-                "goals": {
-                    "shortTermGoals": short_term_goals,
-                    "midTermGoals": mid_term_goals,
-                    "longTermGoals": long_term_goals
-                },
-                "riskAppetite": {
-                    "risk_tolerance": risk_appetite["risk_tolerance"],  # New name
-                    "inflationRate": inflation_rate,  # New field
-                    "retirementAge": retirement_age,  # New field
-                    # Legacy fields
-                    "riskTolerance": risk_appetite["risk_tolerance"],
-                    "riskQuestion1": risk_appetite["risk_question1"] or "",
-                    "riskQuestion2": risk_appetite["risk_question2"] or ""
-                },
-                "taxPlan": tax_plan_data,  # NEW: Include tax plan data if available
-                "userId": user_id
-            }
-            
-            return FinancialDataOutput(**response_data)
+            cached = financial_data_cache.get(user_id)
+            if cached is not None:
+                return cached
+
+            epoch = read_epoch()
+            personal_info, assets_liabilities, risk_appetite, goals = load_financial_records(user_id)
+            output = build_financial_data_output(user_id, personal_info, assets_liabilities, risk_appetite, goals)
+            store_if_current(financial_data_cache, user_id, output, epoch)
+            return output
             
         except Exception as supabase_error:
             # No db.storage fallback on Railway - raise the error
@@ -689,6 +620,7 @@ def save_risk_assessment(data: RiskAssessmentData, current_user: User = Depends(
             # Create new record
             supabase.from_("risk_assessments").insert(risk_assessment_data).execute()
             message = "Risk assessment saved successfully"
+        invalidate_tags(user_tag(data.userId))
         
         return RiskAssessmentResponse(
             success=True,
@@ -704,6 +636,7 @@ def save_risk_assessment(data: RiskAssessmentData, current_user: User = Depends(
         raise HTTPException(status_code=500, detail=f"Failed to save risk assessment: {str(e)}")
 
 @router.get("/get-risk-assessment/{user_id}")
+@cached_route("user:{user_id}")
 def get_risk_assessment(user_id: str, current_user: User = Depends(get_authorized_user)) -> Optional[Dict[str, Any]]:
     """Retrieve user's risk assessment data from database"""
 
@@ -773,6 +706,7 @@ def delete_risk_assessment(user_id: str, current_user: User = Depends(get_author
 
         # Delete risk assessment
         supabase.from_("risk_assessments").delete().eq("user_id", user_id_db).execute()
+        invalidate_tags(user_tag(user_id))
 
         return {"message": "Risk assessment deleted successfully"}
 
@@ -813,6 +747,98 @@ class SIPPlannerResponse(BaseModel):
     message: str
     data: Optional[Dict[str, Any]] = None
 
+# Goal columns written by the SIP planner sync (compared to find changed goals)
+SIP_GOAL_COLUMNS = (
+    "name", "amount", "years", "goal_type", "amount_available_today", "amount_required_future",
+    "goal_inflation", "step_up_percentage", "sip_required", "priority", "personal_info_id"
+)
+
+
+def sip_planner_digest(data: SIPPlannerData) -> str:
+    """Stable SHA-256 of the saved planner content - an identical save writes nothing"""
+    content = {
+        "goals": [goal.dict() for goal in data.goals],
+        "sip_calculations": [calc.dict() for calc in data.sipCalculations] if data.sipCalculations else None,
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def sip_goal_row(user_id: str, goal: SIPGoal) -> Dict[str, Any]:
+    """goals table row for a calculated SIP planner goal"""
+    return {
+        "user_id": user_id,
+        "name": goal.name,
+        "amount": goal.amountRequiredFuture or goal.amountRequiredToday,
+        "years": goal.timeYears,
+        "goal_type": goal.goalType.lower().replace('-', '_'),  # "Short-Term" → "short_term"
+        "amount_available_today": goal.amountAvailableToday,
+        "amount_required_future": goal.amountRequiredFuture,
+        "goal_inflation": goal.goalInflation,
+        "step_up_percentage": goal.stepUp,
+        "sip_required": goal.sipRequired,
+        "priority": goal.priority,
+        "personal_info_id": None  # Nullable as per migration 016
+    }
+
+
+def _same_value(stored: Any, value: Any) -> bool:
+    """Compare a stored column with a new value (numeric columns come back rounded)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and stored is not None:
+        try:
+            return abs(float(stored) - float(value)) < 0.005
+        except (TypeError, ValueError):
+            return False
+    return stored == value
+
+
+def sync_sip_goals(user_id: str, goals: List[SIPGoal]):
+    """
+    Mirror calculated planner goals into the goals table
+
+    Existing goals are loaded once and matched by name; new and changed goals
+    go out in one bulk upsert, and planner goals no longer in the plan are
+    removed in one bulk delete.
+
+    Returns:
+        (goals upserted, goals deleted)
+    """
+    existing = supabase.from_("goals")\
+        .select("id, " + ", ".join(SIP_GOAL_COLUMNS))\
+        .eq("user_id", user_id)\
+        .execute().data or []
+
+    by_name: Dict[str, Dict[str, Any]] = {}
+    for row in existing:
+        by_name.setdefault(row["name"], row)
+
+    # Later goals with a repeated name overwrite earlier ones
+    rows: Dict[str, Dict[str, Any]] = {}
+    for goal in goals:
+        if goal.sipCalculated:
+            rows[goal.name] = sip_goal_row(user_id, goal)
+
+    upserts = []
+    for name, row in rows.items():
+        current = by_name.get(name)
+        if current is None:
+            upserts.append({"id": str(uuid.uuid4()), **row})
+        elif not all(_same_value(current.get(column), row[column]) for column in SIP_GOAL_COLUMNS):
+            upserts.append({"id": current["id"], **row})
+
+    # Only goals created by the planner (no personal_info) are removed with it
+    planner_names = {goal.name for goal in goals}
+    removed = [
+        row["id"] for row in existing
+        if row.get("personal_info_id") is None and row["name"] not in planner_names
+    ]
+
+    if upserts:
+        supabase.from_("goals").upsert(upserts, on_conflict="id").execute()
+    if removed:
+        supabase.from_("goals").delete().in_("id", removed).execute()
+
+    return len(upserts), len(removed)
+
 # SIP Planner Endpoints
 @router.post("/save-sip-planner")
 def save_sip_planner(data: SIPPlannerData, current_user: User = Depends(get_authorized_user)) -> SIPPlannerResponse:
@@ -829,78 +855,57 @@ def save_sip_planner(data: SIPPlannerData, current_user: User = Depends(get_auth
         # Use the user ID from auth
         user_id_db = data.userId
 
+        # Autosaves often resend the same plan: skip every write when nothing changed
+        digest = sip_planner_digest(data)
+        existing_response = supabase.from_("sip_planner_data").select("id, content_digest").eq("user_id", user_id_db).execute()
+        existing_planner = existing_response.data[0] if existing_response.data else None
+
+        if existing_planner and existing_planner.get("content_digest") == digest:
+            print(f"[save-sip-planner] No changes for user {user_id_db}, skipping save")
+            return SIPPlannerResponse(
+                success=True,
+                message="SIP planner data unchanged",
+                data={"user_id": user_id_db, "unchanged": True}
+            )
+
         # Ensure user exists in public.users table (for foreign key constraint)
-        # Check if user exists
-        user_check = supabase.from_("users").select("id").eq("id", user_id_db).execute()
-
-        if not user_check.data or len(user_check.data) == 0:
-            # User doesn't exist in public.users, create entry
-            user_data = {
-                "id": user_id_db,
-                "email": data.userEmail if data.userEmail else f"user_{user_id_db}@temp.com",
-                "created_at": "now()",
-                "updated_at": "now()"
-            }
-            try:
-                supabase.from_("users").insert(user_data).execute()
-            except Exception as insert_error:
-                # User might have been created by another request, ignore duplicate key errors
-                print(f"User insert warning (may be duplicate): {insert_error}")
+        # An existing planner row already references it
+        if not existing_planner:
+            user_check = supabase.from_("users").select("id").eq("id", user_id_db).execute()
+
+            if not user_check.data or len(user_check.data) == 0:
+                # User doesn't exist in public.users, create entry
+                user_data = {
+                    "id": user_id_db,
+                    "email": data.userEmail if data.userEmail else f"user_{user_id_db}@temp.com",
+                    "created_at": "now()",
+                    "updated_at": "now()"
+                }
+                try:
+                    supabase.from_("users").insert(user_data).execute()
+                except Exception as insert_error:
+                    # User might have been created by another request, ignore duplicate key errors
+                    print(f"User insert warning (may be duplicate): {insert_error}")
+
+        # CRITICAL: Also save goals to the goals table for portfolio alignment
+        # This allows portfolio page to show goals in dropdowns and track progress
+        upserted, deleted = sync_sip_goals(user_id_db, data.goals)
+        print(f"[save-sip-planner] Goals table: {upserted} inserted/updated, {deleted} removed")
 
-        # Prepare SIP planner data
+        # Save SIP planner data (one row per user) - written last, so a failed
+        # goal sync is retried rather than skipped by the digest check
         sip_planner_data = {
             "user_id": user_id_db,
             "goals": [goal.dict() for goal in data.goals],
-            "sip_calculations": [calc.dict() for calc in data.sipCalculations] if data.sipCalculations else None
+            "sip_calculations": [calc.dict() for calc in data.sipCalculations] if data.sipCalculations else None,
+            "content_digest": digest
         }
+        supabase.from_("sip_planner_data").upsert(sip_planner_data, on_conflict="user_id").execute()
+        message = "SIP planner data updated successfully" if existing_planner else "SIP planner data saved successfully"
 
-        # Check if SIP planner data already exists for this user
-        existing_response = supabase.from_("sip_planner_data").select("id").eq("user_id", user_id_db).execute()
-
-        if existing_response.data and len(existing_response.data) > 0:
-            # Update existing record
-            planner_id = existing_response.data[0]["id"]
-            supabase.from_("sip_planner_data").update(sip_planner_data).eq("id", planner_id).execute()
-            message = "SIP planner data updated successfully"
-        else:
-            # Create new record
-            supabase.from_("sip_planner_data").insert(sip_planner_data).execute()
-            message = "SIP planner data saved successfully"
-
-        # CRITICAL: Also save goals to the goals table for portfolio alignment
-        # This allows portfolio page to show goals in dropdowns and track progress
-        print(f"[save-sip-planner] Saving {len(data.goals)} goals to goals table for portfolio alignment...")
-
-        for goal in data.goals:
-            # Only save calculated goals (sipCalculated = true)
-            if goal.sipCalculated:
-                goal_data = {
-                    "user_id": user_id_db,
-                    "name": goal.name,
-                    "amount": goal.amountRequiredFuture or goal.amountRequiredToday,
-                    "years": goal.timeYears,
-                    "goal_type": goal.goalType.lower().replace('-', '_'),  # "Short-Term" → "short_term"
-                    "amount_available_today": goal.amountAvailableToday,
-                    "amount_required_future": goal.amountRequiredFuture,
-                    "goal_inflation": goal.goalInflation,
-                    "step_up_percentage": goal.stepUp,
-                    "sip_required": goal.sipRequired,
-                    "priority": goal.priority,
-                    "personal_info_id": None  # Nullable as per migration 016
-                }
-
-                # Check if goal already exists (match by user_id + name)
-                existing_goal = supabase.from_("goals").select("id").eq("user_id", user_id_db).eq("name", goal.name).execute()
-
-                if existing_goal.data and len(existing_goal.data) > 0:
-                    # Update existing goal
-                    goal_id = existing_goal.data[0]["id"]
-                    supabase.from_("goals").update(goal_data).eq("id", goal_id).execute()
-                    print(f"[save-sip-planner] Updated goal in goals table: {goal.name}")
-                else:
-                    # Insert new goal
-                    supabase.from_("goals").insert(goal_data).execute()
-                    print(f"[save-sip-planner] Inserted new goal in goals table: {goal.name}")
+        # Goal summaries are built from the planner goals
+        invalidate_user_goals(user_id_db)
+        invalidate_user_financial_data(user_id_db)
 
         return SIPPlannerResponse(
             success=True,
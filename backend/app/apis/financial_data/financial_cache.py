@@ -0,0 +1,42 @@
+"""
+Financial Data Cache
+Per-user cached FinancialDataOutput, invalidated by every write to the rows it
+is assembled from (personal info, assets/liabilities, risk appetite, goals)
+"""
+
+from app.utils.ttl_cache import TTLCache
+from app.utils.invalidation_bus import invalidation_bus, parse_tag, user_tag
+from app.apis.portfolio.portfolio_cache import read_epoch, store_if_current, bump_epoch
+
+FINANCIAL_DATA_CACHE_MAX_USERS = 5000
+
+# Safety net for writes made outside this process
+FINANCIAL_DATA_CACHE_TTL = 15 * 60  # seconds
+
+financial_data_cache = TTLCache('Financial Data Cache', FINANCIAL_DATA_CACHE_MAX_USERS, FINANCIAL_DATA_CACHE_TTL)
+
+
+def _evict_user(user_id: str):
+    bump_epoch()
+    financial_data_cache.invalidate(str(user_id))
+
+
+def invalidate_user_financial_data(user_id: str):
+    """Drop the cached financial data for one user (call after any write to their financial rows)"""
+    if user_id:
+        _evict_user(user_id)
+        invalidation_bus.publish(user_tag(user_id))
+
+
+def _on_remote_invalidation(tags):
+    for tag in tags:
+        kind, value = parse_tag(tag)
+        if kind == 'user':
+            _evict_user(value)
+
+
+invalidation_bus.subscribe(_on_remote_invalidation)
+
+
+# Export functions
+__all__ = ['financial_data_cache', 'invalidate_user_financial_data', 'read_epoch', 'store_if_current']
@@ -2,7 +2,8 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag
 import os
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
@@ -16,7 +17,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Milestone Progress - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Milestone Progress - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Milestone progress operations will fail.")
 elif supabase:
@@ -74,7 +75,7 @@ async def save_milestone_progress(
             raise HTTPException(status_code=400, detail="Milestone number must be between 1 and 10")
 
         # Check if milestone progress already exists
-        existing = supabase.table("milestone_progress").select("*").eq("user_id", user_id).eq("milestone_number", progress.milestone_number).execute()
+        existing = await db.table("milestone_progress").select("*").eq("user_id", user_id).eq("milestone_number", progress.milestone_number).execute()
 
         # Prepare data for upsert
         data = {
@@ -104,10 +105,11 @@ async def save_milestone_progress(
 
         if existing.data and len(existing.data) > 0:
             # Update existing record
-            result = supabase.table("milestone_progress").update(data).eq("user_id", user_id).eq("milestone_number", progress.milestone_number).execute()
+            result = await db.table("milestone_progress").update(data).eq("user_id", user_id).eq("milestone_number", progress.milestone_number).execute()
         else:
             # Insert new record
-            result = supabase.table("milestone_progress").insert(data).execute()
+            result = await db.table("milestone_progress").insert(data).execute()
+        invalidate_tags(user_tag(user_id))
 
         if result.data and len(result.data) > 0:
             return {
@@ -125,6 +127,7 @@ async def save_milestone_progress(
 
 
 @router.get("/get-milestone-progress/{user_id}")
+@cached_route("user:{user_id}")
 async def get_milestone_progress(
     user_id: str,
     current_user: User = Depends(get_authorized_user)
@@ -142,7 +145,7 @@ async def get_milestone_progress(
         raise HTTPException(status_code=500, detail="Database connection not configured")
 
     try:
-        result = supabase.table("milestone_progress").select("*").eq("user_id", user_id).order("milestone_number").execute()
+        result = await db.table("milestone_progress").select("*").eq("user_id", user_id).order("milestone_number").execute()
 
         return {
             "user_id": user_id,
@@ -155,6 +158,7 @@ async def get_milestone_progress(
 
 
 @router.get("/get-milestone-progress/{user_id}/{milestone_number}")
+@cached_route("user:{user_id}")
 async def get_single_milestone_progress(
     user_id: str,
     milestone_number: int,
@@ -177,7 +181,7 @@ async def get_single_milestone_progress(
         if milestone_number < 1 or milestone_number > 10:
             raise HTTPException(status_code=400, detail="Milestone number must be between 1 and 10")
 
-        result = supabase.table("milestone_progress").select("*").eq("user_id", user_id).eq("milestone_number", milestone_number).execute()
+        result = await db.table("milestone_progress").select("*").eq("user_id", user_id).eq("milestone_number", milestone_number).execute()
 
         if result.data and len(result.data) > 0:
             return result.data[0]
@@ -219,7 +223,8 @@ async def delete_milestone_progress(
         if milestone_number < 1 or milestone_number > 10:
             raise HTTPException(status_code=400, detail="Milestone number must be between 1 and 10")
 
-        result = supabase.table("milestone_progress").delete().eq("user_id", user_id).eq("milestone_number", milestone_number).execute()
+        result = await db.table("milestone_progress").delete().eq("user_id", user_id).eq("milestone_number", milestone_number).execute()
+        invalidate_tags(user_tag(user_id))
 
         return {
             "message": "Milestone progress deleted successfully",
@@ -5,7 +5,7 @@ import os
 import hmac
 import hashlib
 from datetime import datetime
-from supabase import create_client
+from app.utils.db import db, get_supabase
 import razorpay
 from dodopayments import DodoPayments
 from databutton_app.mw.auth_mw import User, get_authorized_user
@@ -14,9 +14,7 @@ from app.security import verify_user_ownership, sanitize_user_id
 router = APIRouter(prefix="/routes")
 
 # Supabase setup
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 # Razorpay configuration
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID", "")
@@ -152,7 +150,7 @@ async def create_razorpay_order(
 
         # Apply promo code discount if provided
         if request.promo_code:
-            promo_response = supabase.from_("promo_codes")\
+            promo_response = await db.from_("promo_codes")\
                 .select("*")\
                 .eq("code", request.promo_code.upper())\
                 .eq("is_active", True)\
@@ -388,7 +386,7 @@ async def create_dodo_checkout(
 
         # Apply promo code discount if provided
         if request.promo_code:
-            promo_response = supabase.from_("promo_codes")\
+            promo_response = await db.from_("promo_codes")\
                 .select("*")\
                 .eq("code", request.promo_code.upper())\
                 .eq("is_active", True)\
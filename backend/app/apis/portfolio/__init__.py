@@ -3,17 +3,33 @@ Portfolio API for CAMS statement upload and mutual fund tracking
 Handles file uploads, holdings management, and notifications
 """
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request, Response, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date
+import asyncio
 import os
-import tempfile
 import traceback
-from supabase import create_client
+import pandas as pd
+from app.utils.db import db, get_supabase
 import dotenv
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
+from .upload_intake import spool_upload, SpooledUpload, UploadTooLargeError
+from .scheme_index import (
+    get_scheme_index, refresh_scheme_index, schedule_scheme_index_refresh, maybe_check_scheme_index_version
+)
+from app.utils.asset_classifier import detect_asset_class, fetch_scheme_asset_classes, stamp_asset_classes
+from .portfolio_cache import (
+    holdings_cache, goal_summary_cache, read_epoch, store_if_current, invalidate_user_portfolio, portfolio_cache_stats
+)
+from .scheme_cache import scheme_metadata_cache, build_scheme_entry, scheme_cache_headers, is_not_modified
+from .xirr import portfolio_xirr
+from .risk_analytics import portfolio_risk, risk_cache_stats
+from .valuation_stream import valuation_hub, notify_valuation_changed
+from app.tasks.fetch_scheme_list import add_scheme_sync_listener
 
 # Load environment variables
 dotenv.load_dotenv()
@@ -27,13 +43,29 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Portfolio API - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Portfolio API - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase:
     print("CRITICAL_ERROR: Supabase client not initialized for portfolio API")
 elif supabase:
     print("[OK] Supabase client initialized successfully for portfolio operations")
 
 
+@router.on_event("startup")
+async def load_scheme_index_on_startup():
+    """Build the scheme search index in the background so startup is not blocked"""
+    if supabase:
+        schedule_scheme_index_refresh(supabase)
+
+
+# Live valuation pushes read through the same per-user portfolio cache (defined below)
+valuation_hub.set_loader(lambda user_id: get_user_portfolio(user_id))
+
+
+# Drop cached scheme details and rebuild the search index whenever the scheme list sync runs in this process
+add_scheme_sync_listener(scheme_metadata_cache.clear)
+add_scheme_sync_listener(lambda: refresh_scheme_index(supabase))
+
+
 # =======================
 # PYDANTIC MODELS
 # =======================
@@ -122,6 +154,101 @@ def calculate_summary(holdings: List[Dict]) -> PortfolioSummary:
     )
 
 
+# Max rows per upsert request (keeps PostgREST payloads well under size limits)
+UPSERT_CHUNK_SIZE = 500
+
+
+def build_holding_rows(holdings_data: List[Dict], user_id: str) -> List[Dict]:
+    """
+    Build portfolio_holdings rows from parsed holdings with derived fields
+
+    Rows are de-duplicated on the (user_id, folio_number, scheme_code) conflict key,
+    keeping the last occurrence - Postgres rejects an upsert that touches the same
+    row twice in one statement.
+    """
+    rows_by_key = {}
+
+    for holding_data in holdings_data:
+        row = dict(holding_data)
+        row['user_id'] = user_id
+
+        # Calculate derived fields
+        row['market_value'] = row['unit_balance'] * row['current_nav']
+        row['absolute_profit'] = row['market_value'] - row['cost_value']
+        row['absolute_return_percentage'] = (
+            (row['absolute_profit'] / row['cost_value'] * 100)
+            if row['cost_value'] > 0 else 0
+        )
+
+        rows_by_key[(row['folio_number'], row['scheme_code'])] = row
+
+    return list(rows_by_key.values())
+
+
+# Columns identifying a CAS transaction (matches the portfolio_transactions unique key)
+TRANSACTION_KEY_COLUMNS = ('user_id', 'folio_number', 'scheme_name', 'transaction_date', 'transaction_type', 'units', 'amount')
+
+# portfolio_transactions rows read per request when building cash flows
+TRANSACTION_PAGE_SIZE = 1000
+
+
+def persist_cas_transactions(source, user_id: str, password: Optional[str] = None) -> int:
+    """
+    Stream transactions out of a CAS PDF into portfolio_transactions
+
+    Overlapping statements re-upload the same transactions; they are upserted
+    on the unique key so history is never duplicated.
+
+    Returns:
+        Number of transaction rows written
+    """
+    from .transaction_parser import iter_cas_transactions, transaction_batches
+
+    on_conflict = ','.join(TRANSACTION_KEY_COLUMNS)
+    written = 0
+    for batch in transaction_batches(iter_cas_transactions(source, password=password), user_id=user_id):
+        # A single upsert must not touch the same row twice
+        rows = list({tuple(row[column] for column in TRANSACTION_KEY_COLUMNS): row for row in batch}.values())
+        supabase.table('portfolio_transactions').upsert(rows, on_conflict=on_conflict).execute()
+        written += len(rows)
+    return written
+
+
+def load_user_transactions(user_id: str) -> List[Dict]:
+    """All stored CAS transactions for a user, oldest first"""
+    transactions = []
+    start = 0
+    while True:
+        page = supabase.table('portfolio_transactions').select(
+            'folio_number, scheme_name, isin, transaction_date, transaction_type, amount, units, nav, unit_balance'
+        ).eq('user_id', user_id).order('transaction_date').order('id').range(start, start + TRANSACTION_PAGE_SIZE - 1).execute().data or []
+        transactions.extend(page)
+        if len(page) < TRANSACTION_PAGE_SIZE:
+            return transactions
+        start += TRANSACTION_PAGE_SIZE
+
+
+def bulk_upsert_holdings(rows: List[Dict], chunk_size: int = UPSERT_CHUNK_SIZE) -> int:
+    """
+    Upsert holding rows in chunks on the user_id,folio_number,scheme_code conflict key
+
+    Returns:
+        Number of rows written
+    """
+    written = 0
+
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        supabase.table('portfolio_holdings').upsert(
+            chunk,
+            on_conflict='user_id,folio_number,scheme_code'
+        ).execute()
+        written += len(chunk)
+
+    print(f"[Portfolio Upload] Upserted {written} holdings in {(len(rows) + chunk_size - 1) // chunk_size} batch(es)")
+    return written
+
+
 # =======================
 # API ENDPOINTS
 # =======================
@@ -160,158 +287,152 @@ async def upload_portfolio(
         if file_extension not in ['.pdf', '.xlsx', '.xls']:
             raise HTTPException(status_code=400, detail="Invalid file type. Upload PDF or Excel only.")
 
-        # Validate file size (max 10MB)
-        file.file.seek(0, 2)  # Seek to end
-        file_size = file.file.tell()
-        file.file.seek(0)  # Reset to beginning
-
-        if file_size > 10 * 1024 * 1024:
+        # Stream upload into a spooled temp file (size limit and content hash enforced while streaming)
+        try:
+            spooled = await spool_upload(file)
+        except UploadTooLargeError:
             raise HTTPException(status_code=400, detail="File too large. Maximum 10MB allowed.")
 
-        # Create file record
-        file_record = supabase.table('uploaded_portfolio_files').insert({
-            'user_id': userId,
-            'file_name': file.filename,
-            'file_type': file_extension.upper().replace('.', ''),
-            'file_size': file_size,
-            'processing_status': 'PROCESSING'
-        }).execute()
+        print(f"[Portfolio Upload] Received {spooled.size} bytes, sha256: {spooled.sha256[:12]}...")
 
-        file_record_id = file_record.data[0]['id'] if file_record.data else None
-        print(f"[Portfolio Upload] File record created: {file_record_id}")
+        with spooled:
+            return await asyncio.to_thread(_process_spooled_upload, spooled, file.filename, file_extension, userId, password)
 
-        # Save file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as tmp_file:
-            contents = await file.read()
-            tmp_file.write(contents)
-            tmp_file_path = tmp_file.name
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Portfolio Upload] Error: {str(e)}")
+        print(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=str(e))
 
-        try:
-            # Parse file based on extension
-            if file_extension == '.pdf':
-                from .parser import parse_cams_pdf
-
-                # Try with provided password or common CAMS passwords
-                common_passwords = [password] if password else []
-                # Add common CAMS password patterns (PAN-based)
-                common_passwords.extend([None])  # Try without password first
-
-                holdings_data = None
-                last_error = None
-
-                for pwd in common_passwords:
-                    try:
-                        if pwd:
-                            print(f"[PDF Parser] Trying with password...")
-                        else:
-                            print(f"[PDF Parser] Trying without password...")
-                        holdings_data = parse_cams_pdf(tmp_file_path, password=pwd)
-                        print(f"[PDF Parser] Successfully opened PDF")
-                        break
-                    except Exception as e:
-                        last_error = e
-                        error_msg = str(e).lower()
-                        # Check if it's a password-related error
-                        if ('password' in error_msg or 'encrypted' in error_msg or
-                            'PDFPasswordIncorrect' in str(type(e).__name__)):
-                            if not pwd:  # We tried without password and it failed
-                                # Re-raise with helpful message
-                                raise Exception("This PDF is password-protected. Please check the 'My PDF is password-protected' box and enter your password (usually your PAN in lowercase).")
-                            else:  # Wrong password was provided
-                                raise Exception("Incorrect PDF password. CAMS PDFs are typically protected with your PAN number in lowercase. Please try again.")
-                        else:
-                            # Other parsing error, raise immediately
-                            raise
-
-                if holdings_data is None:
-                    raise Exception(f"Failed to parse PDF. {str(last_error) if last_error else 'Unknown error'}")
-
-            else:  # Excel
-                from .parser import parse_cams_excel
-                holdings_data = parse_cams_excel(tmp_file_path)
-
-            print(f"[Portfolio Upload] Parsed {len(holdings_data)} holdings from file")
-
-            # Insert holdings into database
-            unique_folios = set()
-            holdings_created = 0
-            total_investment = 0
-
-            for holding_data in holdings_data:
-                # Upsert holding (update if exists, insert if new)
-                holding_data['user_id'] = userId
-
-                # Calculate derived fields
-                holding_data['market_value'] = holding_data['unit_balance'] * holding_data['current_nav']
-                holding_data['absolute_profit'] = holding_data['market_value'] - holding_data['cost_value']
-                holding_data['absolute_return_percentage'] = (
-                    (holding_data['absolute_profit'] / holding_data['cost_value'] * 100)
-                    if holding_data['cost_value'] > 0 else 0
-                )
-
-                # Upsert to database
-                result = supabase.table('portfolio_holdings').upsert(
-                    holding_data,
-                    on_conflict='user_id,folio_number,scheme_code'
-                ).execute()
-
-                unique_folios.add(holding_data['folio_number'])
-                holdings_created += 1
-                total_investment += holding_data['cost_value']
-
-            # Update file record
-            supabase.table('uploaded_portfolio_files').update({
-                'processing_status': 'COMPLETED',
-                'folios_extracted': len(unique_folios),
-                'holdings_created': holdings_created,
-                'total_investment': total_investment,
-                'processed_at': datetime.now().isoformat()
-            }).eq('id', file_record_id).execute()
 
-            # Update user's mutual_funds_value in assets_liabilities
+def _process_spooled_upload(
+    spooled: SpooledUpload,
+    file_name: str,
+    file_extension: str,
+    userId: str,
+    password: Optional[str]
+) -> UploadResult:
+    """Create the file record, parse the spooled statement and persist holdings"""
+    # Create file record
+    file_record = supabase.table('uploaded_portfolio_files').insert({
+        'user_id': userId,
+        'file_name': file_name,
+        'file_type': file_extension.upper().replace('.', ''),
+        'file_size': spooled.size,
+        'file_hash': spooled.sha256,
+        'processing_status': 'PROCESSING'
+    }).execute()
+
+    file_record_id = file_record.data[0]['id'] if file_record.data else None
+    print(f"[Portfolio Upload] File record created: {file_record_id}")
+
+    try:
+        # Parse file based on extension
+        if file_extension == '.pdf':
+            from .parser import parse_cams_pdf
+
+            # Try with provided password or common CAMS passwords
+            common_passwords = [password] if password else []
+            # Add common CAMS password patterns (PAN-based)
+            common_passwords.extend([None])  # Try without password first
+
+            holdings_data = None
+            last_error = None
+
+            for pwd in common_passwords:
+                try:
+                    if pwd:
+                        print(f"[PDF Parser] Trying with password...")
+                    else:
+                        print(f"[PDF Parser] Trying without password...")
+                    holdings_data = parse_cams_pdf(spooled.handle, password=pwd)
+                    print(f"[PDF Parser] Successfully opened PDF")
+                    break
+                except Exception as e:
+                    last_error = e
+                    error_msg = str(e).lower()
+                    # Check if it's a password-related error
+                    if ('password' in error_msg or 'encrypted' in error_msg or
+                        'PDFPasswordIncorrect' in str(type(e).__name__)):
+                        if not pwd:  # We tried without password and it failed
+                            # Re-raise with helpful message
+                            raise Exception("This PDF is password-protected. Please check the 'My PDF is password-protected' box and enter your password (usually your PAN in lowercase).")
+                        else:  # Wrong password was provided
+                            raise Exception("Incorrect PDF password. CAMS PDFs are typically protected with your PAN number in lowercase. Please try again.")
+                    else:
+                        # Other parsing error, raise immediately
+                        raise
+
+            if holdings_data is None:
+                raise Exception(f"Failed to parse PDF. {str(last_error) if last_error else 'Unknown error'}")
+
+            # Transaction history feeds XIRR; holdings are still saved if it cannot be read
+            try:
+                transactions_saved = persist_cas_transactions(spooled.handle, userId, password=pwd)
+                print(f"[Portfolio Upload] Saved {transactions_saved} CAS transactions")
+            except Exception as e:
+                print(f"[Portfolio Upload] Could not save CAS transactions: {str(e)}")
+
+        else:  # Excel
+            from .parser import parse_cams_excel
+            holdings_data = parse_cams_excel(spooled.handle)
+
+        print(f"[Portfolio Upload] Parsed {len(holdings_data)} holdings from file")
+
+        # Insert holdings into database as one chunked batch
+        holding_rows = stamp_asset_classes(supabase, build_holding_rows(holdings_data, userId))
+        bulk_upsert_holdings(holding_rows)
+        invalidate_user_portfolio(userId)
+        notify_valuation_changed(userId)
+
+        unique_folios = set(row['folio_number'] for row in holding_rows)
+        holdings_created = len(holding_rows)
+        total_investment = sum(row['cost_value'] for row in holding_rows)
+
+        # Update file record
+        supabase.table('uploaded_portfolio_files').update({
+            'processing_status': 'COMPLETED',
+            'folios_extracted': len(unique_folios),
+            'holdings_created': holdings_created,
+            'total_investment': total_investment,
+            'processed_at': datetime.now().isoformat()
+        }).eq('id', file_record_id).execute()
+
+        # Update user's mutual_funds_value in assets_liabilities over all active holdings
+        # (other statements and manual holdings included), as the delete path does
+        if holding_rows:
             total_mf_value = supabase.table('portfolio_holdings').select('market_value').eq('user_id', userId).eq('is_active', True).execute()
-            if total_mf_value.data:
-                mf_sum = sum(h['market_value'] for h in total_mf_value.data)
-
-                # Update or ignore if no assets_liabilities record exists
-                supabase.table('assets_liabilities').update({
-                    'mutual_funds_value': mf_sum
-                }).eq('user_id', userId).execute()
-
-            # Clean up temp file
-            os.unlink(tmp_file_path)
-
-            return UploadResult(
-                success=True,
-                message=f"Successfully parsed {len(unique_folios)} folios with {holdings_created} holdings",
-                data={
-                    'file_id': file_record_id,
-                    'folios_extracted': len(unique_folios),
-                    'holdings_created': holdings_created,
-                    'total_investment': total_investment
-                }
-            )
+            mf_sum = sum(h['market_value'] for h in total_mf_value.data or [])
 
-        except Exception as parse_error:
-            # Update file record with error
-            supabase.table('uploaded_portfolio_files').update({
-                'processing_status': 'FAILED',
-                'error_message': str(parse_error),
-                'processed_at': datetime.now().isoformat()
-            }).eq('id', file_record_id).execute()
+            # Update or ignore if no assets_liabilities record exists
+            supabase.table('assets_liabilities').update({
+                'mutual_funds_value': mf_sum
+            }).eq('user_id', userId).execute()
 
-            # Clean up temp file
-            if os.path.exists(tmp_file_path):
-                os.unlink(tmp_file_path)
+            from app.apis.financial_data.financial_cache import invalidate_user_financial_data
+            invalidate_user_financial_data(userId)
 
-            raise HTTPException(status_code=500, detail=f"Failed to parse file: {str(parse_error)}")
+        return UploadResult(
+            success=True,
+            message=f"Successfully parsed {len(unique_folios)} folios with {holdings_created} holdings",
+            data={
+                'file_id': file_record_id,
+                'folios_extracted': len(unique_folios),
+                'holdings_created': holdings_created,
+                'total_investment': total_investment
+            }
+        )
 
-    except HTTPException:
-        raise
-    except Exception as e:
-        print(f"[Portfolio Upload] Error: {str(e)}")
-        print(traceback.format_exc())
-        raise HTTPException(status_code=500, detail=str(e))
+    except Exception as parse_error:
+        # Update file record with error
+        supabase.table('uploaded_portfolio_files').update({
+            'processing_status': 'FAILED',
+            'error_message': str(parse_error),
+            'processed_at': datetime.now().isoformat()
+        }).eq('id', file_record_id).execute()
+
+        raise HTTPException(status_code=500, detail=f"Failed to parse file: {str(parse_error)}")
 
 
 @router.get("/portfolio-holdings/{user_id}")
@@ -334,16 +455,12 @@ async def get_portfolio_holdings(
         verify_user_ownership(current_user, user_id)
         print(f"[Get Portfolio Holdings] User: {user_id}")
 
-        # Fetch all active holdings
-        holdings_result = supabase.table('portfolio_holdings').select('*').eq('user_id', user_id).eq('is_active', True).order('scheme_name').execute()
-
-        holdings = holdings_result.data if holdings_result.data else []
-        summary = calculate_summary(holdings)
+        portfolio = await asyncio.to_thread(get_user_portfolio, user_id)
 
         return {
             'success': True,
-            'holdings': holdings,
-            'summary': summary.model_dump()
+            'holdings': portfolio['holdings'],
+            'summary': portfolio['summary']
         }
 
     except Exception as e:
@@ -351,6 +468,78 @@ async def get_portfolio_holdings(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.websocket("/ws/portfolio-valuation")
+async def portfolio_valuation_socket(
+    websocket: WebSocket,
+    current_user: User = Depends(get_authorized_user)
+):
+    """
+    Live valuation for the connected user
+
+    Authenticated via the "Authorization.Bearer.<token>" subprotocol. Sends a
+    snapshot on connect, then {'type': 'delta', 'changed', 'removed', 'summary'}
+    whenever the NAV job or an upload changes the user's holdings.
+    """
+    user_id = sanitize_user_id(current_user.sub)
+    offered = [p.strip() for p in (websocket.headers.get('sec-websocket-protocol') or '').split(',')]
+    await websocket.accept(subprotocol=next((p for p in offered if p.startswith('Authorization.Bearer.')), None))
+
+    subscriber = await valuation_hub.subscribe(user_id)
+    # Clients only listen; reading detects disconnects while we wait for messages
+    receiver = asyncio.create_task(websocket.receive_text())
+    # One pending sender at a time: it is only replaced once its message has been
+    # sent, so a receiver wakeup never discards a dequeued message
+    sender = None
+    try:
+        while True:
+            if sender is None:
+                sender = asyncio.create_task(valuation_hub.next_message(user_id, subscriber))
+            done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver in done:
+                receiver.result()  # raises WebSocketDisconnect on close
+                receiver = asyncio.create_task(websocket.receive_text())
+            if sender in done:
+                message = sender.result()
+                sender = None
+                await websocket.send_text(message if message is not None else '{"type": "ping"}')
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"[Valuation Stream] WebSocket error for {user_id}: {str(e)}")
+    finally:
+        receiver.cancel()
+        if sender is not None:
+            sender.cancel()
+        valuation_hub.unsubscribe(user_id, subscriber)
+
+
+@router.get("/portfolio-valuation-stream/{user_id}")
+async def portfolio_valuation_events(
+    user_id: str,
+    request: Request,
+    current_user: User = Depends(get_authorized_user)
+):
+    """
+    Server-Sent Events fallback for the live valuation channel (same messages as the WebSocket)
+    """
+    # SECURITY: Verify user can only stream their own valuation
+    user_id = sanitize_user_id(user_id)
+    verify_user_ownership(current_user, user_id)
+
+    async def events():
+        # Subscribed inside the generator so a client that disconnects before
+        # streaming starts never leaves a subscriber behind
+        subscriber = await valuation_hub.subscribe(user_id)
+        try:
+            while not await request.is_disconnected():
+                message = await valuation_hub.next_message(user_id, subscriber)
+                yield f"data: {message}\n\n" if message is not None else ": keepalive\n\n"
+        finally:
+            valuation_hub.unsubscribe(user_id, subscriber)
+
+    return StreamingResponse(events(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+
 @router.get("/portfolio-notifications/{user_id}")
 async def get_portfolio_notifications(
     user_id: str,
@@ -374,7 +563,7 @@ async def get_portfolio_notifications(
         print(f"[Get Notifications] User: {user_id}, Limit: {limit}")
 
         # Fetch notifications ordered by unread first, then by created date
-        notifications_result = supabase.table('portfolio_notifications').select('*').eq('user_id', user_id).order('is_read').order('created_at', desc=True).limit(limit).execute()
+        notifications_result = await db.table('portfolio_notifications').select('*').eq('user_id', user_id).order('is_read').order('created_at', desc=True).limit(limit).execute()
 
         notifications = notifications_result.data if notifications_result.data else []
 
@@ -405,7 +594,7 @@ async def mark_notification_as_read(
     """
     try:
         # SECURITY: Fetch notification first, then verify ownership
-        notification = supabase.table('portfolio_notifications').select('user_id').eq('id', notification_id).execute()
+        notification = await db.table('portfolio_notifications').select('user_id').eq('id', notification_id).execute()
 
         if not notification.data:
             raise HTTPException(status_code=404, detail="Notification not found")
@@ -416,7 +605,7 @@ async def mark_notification_as_read(
         print(f"[Mark Notification Read] ID: {notification_id}")
 
         # Update notification
-        result = supabase.table('portfolio_notifications').update({
+        result = await db.table('portfolio_notifications').update({
             'is_read': True,
             'read_at': datetime.now().isoformat()
         }).eq('id', notification_id).execute()
@@ -452,7 +641,7 @@ async def delete_portfolio_holding(
     """
     try:
         # SECURITY: Fetch holding first, then verify ownership
-        holding = supabase.table('portfolio_holdings').select('user_id').eq('id', holding_id).execute()
+        holding = await db.table('portfolio_holdings').select('user_id').eq('id', holding_id).execute()
 
         if not holding.data:
             raise HTTPException(status_code=404, detail="Holding not found")
@@ -463,19 +652,23 @@ async def delete_portfolio_holding(
         print(f"[Delete Holding] ID: {holding_id}, User: {user_id}")
 
         # Delete holding (cascades to nav_history)
-        supabase.table('portfolio_holdings').delete().eq('id', holding_id).execute()
+        await db.table('portfolio_holdings').delete().eq('id', holding_id).execute()
+        invalidate_user_portfolio(user_id)
 
         # Recalculate and update mutual_funds_value
-        total_mf_value = supabase.table('portfolio_holdings').select('market_value').eq('user_id', user_id).eq('is_active', True).execute()
+        total_mf_value = await db.table('portfolio_holdings').select('market_value').eq('user_id', user_id).eq('is_active', True).execute()
         if total_mf_value.data:
             mf_sum = sum(h['market_value'] for h in total_mf_value.data)
         else:
             mf_sum = 0
 
-        supabase.table('assets_liabilities').update({
+        await db.table('assets_liabilities').update({
             'mutual_funds_value': mf_sum
         }).eq('user_id', user_id).execute()
 
+        from app.apis.financial_data.financial_cache import invalidate_user_financial_data
+        invalidate_user_financial_data(user_id)
+
         return {
             'success': True,
             'message': 'Holding deleted successfully'
@@ -579,50 +772,6 @@ class AssignGoalRequest(BaseModel):
     monthly_sip_amount: Optional[float] = 0
 
 
-def detect_asset_class(scheme_name: str) -> str:
-    """
-    Detect asset class from mutual fund scheme name
-    Returns: Equity, Debt, Hybrid, Gold, or Liquid
-    """
-    scheme_lower = scheme_name.lower()
-
-    # Gold funds
-    if 'gold' in scheme_lower:
-        return 'Gold'
-
-    # Liquid funds
-    if any(word in scheme_lower for word in ['liquid', 'overnight', 'ultra short']):
-        return 'Liquid'
-
-    # Debt funds
-    debt_keywords = [
-        'debt', 'bond', 'income', 'gilt', 'treasury', 'corporate bond',
-        'banking', 'psu', 'credit', 'duration', 'dynamic bond', 'money market'
-    ]
-    if any(keyword in scheme_lower for keyword in debt_keywords):
-        return 'Debt'
-
-    # Hybrid funds
-    hybrid_keywords = [
-        'hybrid', 'balanced', 'aggressive', 'conservative', 'dynamic asset',
-        'multi asset', 'equity savings'
-    ]
-    if any(keyword in scheme_lower for keyword in hybrid_keywords):
-        return 'Hybrid'
-
-    # Equity funds (default if no match)
-    equity_keywords = [
-        'equity', 'stock', 'elss', 'large cap', 'mid cap', 'small cap',
-        'multi cap', 'flexi cap', 'focused', 'dividend', 'growth', 'value',
-        'index', 'nifty', 'sensex', 'sector', 'thematic'
-    ]
-    if any(keyword in scheme_lower for keyword in equity_keywords):
-        return 'Equity'
-
-    # Default to Equity if unclear
-    return 'Equity'
-
-
 @router.patch("/portfolio-holdings/{holding_id}/assign-goal")
 async def assign_holding_to_goal(
     holding_id: str,
@@ -638,7 +787,7 @@ async def assign_holding_to_goal(
             raise HTTPException(status_code=500, detail="Database not configured")
 
         # SECURITY: Fetch the holding first, then verify ownership
-        holding_response = supabase.table('portfolio_holdings').select('*').eq('id', holding_id).single().execute()
+        holding_response = await db.table('portfolio_holdings').select('*').eq('id', holding_id).single().execute()
 
         if not holding_response.data:
             raise HTTPException(status_code=404, detail="Holding not found")
@@ -647,8 +796,11 @@ async def assign_holding_to_goal(
         user_id = sanitize_user_id(holding['user_id'])
         verify_user_ownership(current_user, user_id)
 
-        # Auto-detect asset class from scheme name
-        asset_class = detect_asset_class(holding['scheme_name'])
+        # Asset class precomputed on scheme_master; classify by name only if the scheme is not synced yet
+        asset_class = (
+            (await asyncio.to_thread(fetch_scheme_asset_classes, supabase, [holding['scheme_code']])).get(str(holding['scheme_code']))
+            or detect_asset_class(holding['scheme_name'])
+        )
 
         # Update holding with goal_id, asset_class, and monthly_sip_amount
         update_data = {
@@ -657,7 +809,8 @@ async def assign_holding_to_goal(
             'monthly_sip_amount': request.monthly_sip_amount if request.monthly_sip_amount is not None else 0
         }
 
-        update_response = supabase.table('portfolio_holdings').update(update_data).eq('id', holding_id).execute()
+        update_response = await db.table('portfolio_holdings').update(update_data).eq('id', holding_id).execute()
+        invalidate_user_portfolio(user_id)
 
         return {
             'success': True,
@@ -673,6 +826,211 @@ async def assign_holding_to_goal(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+EMPTY_GOAL_SUMMARY = {
+    'goals': [],
+    'total_holdings': 0,
+    'assigned_holdings': 0
+}
+
+
+def load_planner_goals(user_id: str) -> Optional[List[Dict]]:
+    """
+    SIP planner goals for a user in one round trip (users row with embedded sip_planner_data)
+
+    Returns:
+        Goals list, or None if the user has no users row
+    """
+    from app.apis.financial_data import sanitize_storage_key
+    user_email = f"{sanitize_storage_key(user_id)}@finnest.example.com"
+    print(f"[Goal Summary] Looking up user with email: {user_email}")
+
+    user_response = supabase.from_("users").select("id, sip_planner_data(goals)").eq("email", user_email).execute()
+    if not user_response.data:
+        return None
+
+    # One-to-one embeds come back as an object, one-to-many as a list
+    planner = user_response.data[0].get('sip_planner_data')
+    if isinstance(planner, list):
+        planner = planner[0] if planner else None
+    return (planner or {}).get('goals') or []
+
+
+def load_active_holdings(user_id: str) -> List[Dict]:
+    """All active holdings for a user, ordered by scheme name"""
+    holdings_response = supabase.table('portfolio_holdings').select('*').eq('user_id', user_id).eq('is_active', True).order('scheme_name').execute()
+    return holdings_response.data or []
+
+
+def get_user_portfolio(user_id: str) -> Dict[str, Any]:
+    """
+    Active holdings plus calculate_summary for a user, from the per-user cache
+
+    Returns:
+        {'holdings': [...], 'summary': {...}} - shared with other readers, do not mutate
+    """
+    portfolio = holdings_cache.get(user_id)
+    if portfolio is None:
+        epoch = read_epoch()
+        holdings = load_active_holdings(user_id)
+        portfolio = {'holdings': holdings, 'summary': calculate_summary(holdings).model_dump()}
+        store_if_current(holdings_cache, user_id, portfolio, epoch)
+    return portfolio
+
+
+def aggregate_goal_holdings(holdings: List[Dict]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-goal totals plus asset class and SIP breakdowns, in one grouped aggregation
+
+    Returns:
+        goal_id -> {invested, current, monthly_sip, asset_breakdown, sip_breakdown}
+    """
+    assigned = [h for h in holdings if h.get('goal_id')]
+    if not assigned:
+        return {}
+
+    frame = pd.DataFrame({
+        'goal_id': [h['goal_id'] for h in assigned],
+        'asset_class': [h.get('asset_class') or 'Equity' for h in assigned],
+        'cost_value': [h['cost_value'] for h in assigned],
+        'market_value': [h['market_value'] for h in assigned],
+        'monthly_sip_amount': [h.get('monthly_sip_amount') or 0 for h in assigned],
+    })
+
+    # (goal, asset class) sums; sort=False keeps first-seen order for the breakdown dicts
+    grouped = frame.groupby(['goal_id', 'asset_class'], sort=False)[
+        ['cost_value', 'market_value', 'monthly_sip_amount']
+    ].sum()
+
+    aggregates = {}
+    for (goal_id, asset_class), sums in zip(grouped.index, grouped.itertuples(index=False)):
+        goal = aggregates.setdefault(goal_id, {
+            'invested': 0.0, 'current': 0.0, 'monthly_sip': 0.0, 'asset_breakdown': {}, 'sip_breakdown': {}
+        })
+        goal['invested'] += float(sums.cost_value)
+        goal['current'] += float(sums.market_value)
+        goal['monthly_sip'] += float(sums.monthly_sip_amount)
+        goal['asset_breakdown'][asset_class] = float(sums.market_value)
+        goal['sip_breakdown'][asset_class] = float(sums.monthly_sip_amount)
+
+    return aggregates
+
+
+def percentage_breakdown(breakdown: Dict[str, float], total: float) -> Dict[str, float]:
+    if total <= 0:
+        return {}
+    return {key: round((value / total) * 100, 1) for key, value in breakdown.items()}
+
+
+def build_goal_summary(goals_data: List[Dict], holdings: List[Dict]) -> Dict[str, Any]:
+    """Goal investment summary from planner goals and the user's active holdings"""
+    # Sort goals by timeline (shortest first)
+    goals_data = sorted(goals_data, key=lambda g: g.get('timeYears', 999))
+    print(f"[Goal Summary] Found {len(goals_data)} goals from SIP planner (sorted by timeline)")
+
+    # Group holdings by goal in one pass (goals are matched by name - they have no stable IDs in JSON)
+    holdings_by_goal: Dict[str, List[Dict]] = {}
+    for holding in holdings:
+        if holding.get('goal_id'):
+            holdings_by_goal.setdefault(holding['goal_id'], []).append(holding)
+
+    aggregates = aggregate_goal_holdings(holdings)
+    empty_aggregate = {'invested': 0, 'current': 0, 'monthly_sip': 0, 'asset_breakdown': {}, 'sip_breakdown': {}}
+    current_year = datetime.now().year
+
+    goal_summaries = []
+    for goal in goals_data:
+        goal_name = goal.get('name', 'Unnamed Goal')
+        goal_holdings = holdings_by_goal.get(goal_name, [])
+        aggregate = aggregates.get(goal_name, empty_aggregate)
+
+        total_invested = aggregate['invested']
+        total_current = aggregate['current']
+        total_profit = total_current - total_invested
+        total_monthly_sip = aggregate['monthly_sip']
+
+        # Calculate recommended allocation based on timeline
+        years_to_goal = goal.get('timeYears', 10)
+        target_year = current_year + years_to_goal
+
+        # Timeline-based allocation
+        if years_to_goal >= 10:
+            recommended_allocation = {'Equity': 80, 'Debt': 15, 'Gold': 5}
+        elif years_to_goal >= 5:
+            recommended_allocation = {'Equity': 60, 'Debt': 30, 'Gold': 10}
+        elif years_to_goal >= 3:
+            recommended_allocation = {'Equity': 40, 'Debt': 50, 'Gold': 10}
+        else:
+            recommended_allocation = {'Equity': 20, 'Debt': 70, 'Gold': 10}
+
+        # Progress calculation - FIX: Include Amount Available Today
+        target_amount = goal.get('amountRequiredFuture', 0)
+        amount_allocated = goal.get('amountAvailableToday', 0)  # Amount Available Today from Set Goals
+
+        # Total value = Amount Available Today + Current Holdings Value
+        total_value = amount_allocated + total_current
+
+        progress_percentage = (total_value / target_amount * 100) if target_amount > 0 else 0
+        gap_amount = max(0, target_amount - total_value)
+        is_on_track = progress_percentage >= (100 - (years_to_goal / target_year * 100)) if target_year > current_year else progress_percentage >= 100
+
+        print(f"[Goal Summary] {goal_name}: Allocated=Rs.{amount_allocated}, Holdings=Rs.{total_current}, Total=Rs.{total_value}, Target=Rs.{target_amount}, Progress={progress_percentage:.1f}%")
+
+        # Build holdings list with calculated fields
+        holdings_data = []
+        for h in goal_holdings:
+            holdings_data.append({
+                'id': h['id'],
+                'scheme_name': h['scheme_name'],
+                'folio_number': h['folio_number'],
+                'asset_class': h.get('asset_class') or 'Equity',
+                'units': h['unit_balance'],
+                'cost_value': h['cost_value'],
+                'market_value': h['market_value'],
+                'profit': h['market_value'] - h['cost_value'],
+                'return_pct': ((h['market_value'] - h['cost_value']) / h['cost_value'] * 100) if h['cost_value'] > 0 else 0,
+                'monthly_sip_amount': h.get('monthly_sip_amount') or 0
+            })
+
+        goal_summaries.append({
+            'goal_id': goal_name,  # Use name as ID since goals are stored in JSON
+            'goal_name': goal_name,
+            'target_amount': target_amount,
+            'target_year': target_year,
+            'years_to_goal': years_to_goal,
+            'amount_available': amount_allocated,  # Allocated amount from Set Goal
+            'total_value': total_value,  # FIX: Include total value (amount_available + holdings) for progress
+            # Include original SIP planner goal fields for frontend compatibility
+            'goalType': goal.get('goalType', 'custom'),
+            'sipRequired': goal.get('sipRequired', 0),
+            'sipCalculated': goal.get('sipCalculated', False),  # FIX: Include sipCalculated flag
+            'amountRequiredToday': goal.get('amountRequiredToday', 0),
+            'holdings': holdings_data,
+            'totals': {
+                'invested': total_invested,
+                'current_value': total_current,
+                'profit': total_profit,
+                'holdings_count': len(goal_holdings),
+                'monthly_sip': total_monthly_sip
+            },
+            'asset_breakdown': aggregate['asset_breakdown'],
+            'asset_breakdown_pct': percentage_breakdown(aggregate['asset_breakdown'], total_current),
+            'sip_breakdown': aggregate['sip_breakdown'],
+            'sip_breakdown_pct': percentage_breakdown(aggregate['sip_breakdown'], total_monthly_sip),
+            'recommended_allocation': recommended_allocation,
+            'progress': {
+                'percentage': round(progress_percentage, 2),
+                'gap_amount': gap_amount,
+                'is_on_track': is_on_track
+            }
+        })
+
+    return {
+        'goals': goal_summaries,
+        'total_holdings': len(holdings),
+        'assigned_holdings': sum(1 for h in holdings if h.get('goal_id'))
+    }
+
+
 @router.get("/goal-investment-summary/{user_id}")
 async def get_goal_investment_summary(
     user_id: str,
@@ -681,6 +1039,8 @@ async def get_goal_investment_summary(
     """
     Get investment summary for all user's goals with assigned holdings
     Returns progress, asset allocation, and holdings for each goal
+
+    Served from the per-user summary cache; holding and goal writes invalidate it.
     """
     try:
         # SECURITY: Verify user can only access their own goal investment summary
@@ -689,181 +1049,33 @@ async def get_goal_investment_summary(
         if not supabase:
             raise HTTPException(status_code=500, detail="Database not configured")
 
-        # Get user's SIP planner goals from sip_planner_data table
-        from app.apis.financial_data import sanitize_storage_key
-        user_email = f"{sanitize_storage_key(user_id)}@finnest.example.com"
-        print(f"[Goal Summary] Looking up user with email: {user_email}")
-        user_response = supabase.from_("users").select("id").eq("email", user_email).execute()
-
-        if not user_response.data or len(user_response.data) == 0:
-            print(f"[Goal Summary] User not found, returning empty")
-            return {
-                'goals': [],
-                'total_holdings': 0,
-                'assigned_holdings': 0
-            }
-
-        user_id_db = user_response.data[0]["id"]
-        print(f"[Goal Summary] Found user_id_db: {user_id_db}")
-
-        # Fetch SIP planner data which contains goals
-        planner_response = supabase.from_("sip_planner_data").select("*").eq("user_id", user_id_db).execute()
+        cached = goal_summary_cache.get(user_id)
+        if cached is not None:
+            return cached
 
-        if not planner_response.data or len(planner_response.data) == 0:
-            print(f"[Goal Summary] No SIP planner data found")
-            return {
-                'goals': [],
-                'total_holdings': 0,
-                'assigned_holdings': 0
-            }
+        # Planner goals and holdings are independent - fetch them concurrently
+        epoch = read_epoch()
+        goals_data, portfolio = await asyncio.gather(
+            asyncio.to_thread(load_planner_goals, user_id),
+            asyncio.to_thread(get_user_portfolio, user_id)
+        )
+        holdings = portfolio['holdings']
+        print(f"[Goal Summary] Holdings fetched: {len(holdings)}")
 
-        goals_data = planner_response.data[0].get('goals', [])
-        if not goals_data:
+        if goals_data is None:
+            print(f"[Goal Summary] User not found, returning empty")
+            summary = dict(EMPTY_GOAL_SUMMARY)
+        elif not goals_data:
             print(f"[Goal Summary] No goals in SIP planner data")
-            return {
-                'goals': [],
-                'total_holdings': 0,
-                'assigned_holdings': 0
-            }
-
-        # Sort goals by timeline (shortest first)
-        goals_data.sort(key=lambda g: g.get('timeYears', 999))
-        print(f"[Goal Summary] Found {len(goals_data)} goals from SIP planner (sorted by timeline)")
-
-        # Fetch all active holdings for user
-        print(f"[Goal Summary] Fetching holdings for user_id: {user_id}")
-        holdings_response = supabase.from_("portfolio_holdings").select("*").eq("user_id", user_id).eq("is_active", True).execute()
-        print(f"[Goal Summary] Holdings fetched: {len(holdings_response.data or [])}")
-
-        holdings = holdings_response.data or []
-        total_holdings = len(holdings)
-        assigned_holdings = len([h for h in holdings if h.get('goal_id')])
-
-        # Process each goal
-        goal_summaries = []
-
-        for goal in goals_data:
-            goal_name = goal.get('name', 'Unnamed Goal')
-
-            # Filter holdings for this goal (match by goal name since goals don't have stable IDs in JSON)
-            goal_holdings = [h for h in holdings if h.get('goal_id') == goal_name]
-
-            # Calculate totals
-            total_invested = sum(h['cost_value'] for h in goal_holdings)
-            total_current = sum(h['market_value'] for h in goal_holdings)
-            total_profit = total_current - total_invested
-
-            # Asset breakdown (current value)
-            asset_breakdown = {}
-            asset_breakdown_pct = {}
-
-            for holding in goal_holdings:
-                asset_class = holding.get('asset_class', 'Equity')
-                asset_breakdown[asset_class] = asset_breakdown.get(asset_class, 0) + holding['market_value']
-
-            # Calculate percentages
-            if total_current > 0:
-                for asset_class, value in asset_breakdown.items():
-                    asset_breakdown_pct[asset_class] = round((value / total_current) * 100, 1)
-
-            # Monthly SIP breakdown
-            sip_breakdown = {}
-            sip_breakdown_pct = {}
-            total_monthly_sip = sum(h.get('monthly_sip_amount', 0) for h in goal_holdings)
-
-            for holding in goal_holdings:
-                asset_class = holding.get('asset_class', 'Equity')
-                sip_amount = holding.get('monthly_sip_amount', 0)
-                sip_breakdown[asset_class] = sip_breakdown.get(asset_class, 0) + sip_amount
-
-            # Calculate SIP percentages
-            if total_monthly_sip > 0:
-                for asset_class, sip_value in sip_breakdown.items():
-                    sip_breakdown_pct[asset_class] = round((sip_value / total_monthly_sip) * 100, 1)
-
-            # Calculate recommended allocation based on timeline
-            current_year = datetime.now().year
-            years_to_goal = goal.get('timeYears', 10)
-            target_year = current_year + years_to_goal
-
-            # Timeline-based allocation
-            if years_to_goal >= 10:
-                recommended_allocation = {'Equity': 80, 'Debt': 15, 'Gold': 5}
-            elif years_to_goal >= 5:
-                recommended_allocation = {'Equity': 60, 'Debt': 30, 'Gold': 10}
-            elif years_to_goal >= 3:
-                recommended_allocation = {'Equity': 40, 'Debt': 50, 'Gold': 10}
-            else:
-                recommended_allocation = {'Equity': 20, 'Debt': 70, 'Gold': 10}
-
-            # Progress calculation - FIX: Include Amount Available Today
-            target_amount = goal.get('amountRequiredFuture', 0)
-            amount_allocated = goal.get('amountAvailableToday', 0)  # Amount Available Today from Set Goals
-
-            # Total value = Amount Available Today + Current Holdings Value
-            total_value = amount_allocated + total_current
-
-            progress_percentage = (total_value / target_amount * 100) if target_amount > 0 else 0
-            gap_amount = max(0, target_amount - total_value)
-            is_on_track = progress_percentage >= (100 - (years_to_goal / target_year * 100)) if target_year > current_year else progress_percentage >= 100
-
-            print(f"[Goal Summary] {goal_name}: Allocated=Rs.{amount_allocated}, Holdings=Rs.{total_current}, Total=Rs.{total_value}, Target=Rs.{target_amount}, Progress={progress_percentage:.1f}%")
-
-            # Build holdings list with calculated fields
-            holdings_data = []
-            for h in goal_holdings:
-                holdings_data.append({
-                    'id': h['id'],
-                    'scheme_name': h['scheme_name'],
-                    'folio_number': h['folio_number'],
-                    'asset_class': h.get('asset_class', 'Equity'),
-                    'units': h['unit_balance'],
-                    'cost_value': h['cost_value'],
-                    'market_value': h['market_value'],
-                    'profit': h['market_value'] - h['cost_value'],
-                    'return_pct': ((h['market_value'] - h['cost_value']) / h['cost_value'] * 100) if h['cost_value'] > 0 else 0,
-                    'monthly_sip_amount': h.get('monthly_sip_amount', 0)
-                })
-
-            goal_summaries.append({
-                'goal_id': goal_name,  # Use name as ID since goals are stored in JSON
-                'goal_name': goal_name,
-                'target_amount': target_amount,
-                'target_year': target_year,
-                'years_to_goal': years_to_goal,
-                'amount_available': amount_allocated,  # Allocated amount from Set Goal
-                'total_value': total_value,  # FIX: Include total value (amount_available + holdings) for progress
-                # Include original SIP planner goal fields for frontend compatibility
-                'goalType': goal.get('goalType', 'custom'),
-                'sipRequired': goal.get('sipRequired', 0),
-                'sipCalculated': goal.get('sipCalculated', False),  # FIX: Include sipCalculated flag
-                'amountRequiredToday': goal.get('amountRequiredToday', 0),
-                'holdings': holdings_data,
-                'totals': {
-                    'invested': total_invested,
-                    'current_value': total_current,
-                    'profit': total_profit,
-                    'holdings_count': len(goal_holdings),
-                    'monthly_sip': total_monthly_sip
-                },
-                'asset_breakdown': asset_breakdown,
-                'asset_breakdown_pct': asset_breakdown_pct,
-                'sip_breakdown': sip_breakdown,
-                'sip_breakdown_pct': sip_breakdown_pct,
-                'recommended_allocation': recommended_allocation,
-                'progress': {
-                    'percentage': round(progress_percentage, 2),
-                    'gap_amount': gap_amount,
-                    'is_on_track': is_on_track
-                }
-            })
+            summary = dict(EMPTY_GOAL_SUMMARY)
+        else:
+            summary = build_goal_summary(goals_data, holdings)
 
-        return {
-            'goals': goal_summaries,
-            'total_holdings': total_holdings,
-            'assigned_holdings': assigned_holdings
-        }
+        store_if_current(goal_summary_cache, user_id, summary, epoch)
+        return summary
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"[Goal Investment Summary] ERROR OCCURRED:")
         print(f"[Goal Investment Summary] Error type: {type(e).__name__}")
@@ -873,6 +1085,123 @@ async def get_goal_investment_summary(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def load_portfolio_xirr(user_id: str) -> Dict[str, Any]:
+    """Holdings (from the per-user cache) and stored transactions, solved in one batch"""
+    portfolio = get_user_portfolio(user_id)
+    return portfolio_xirr(portfolio['holdings'], load_user_transactions(user_id))
+
+
+@router.get("/portfolio-xirr/{user_id}")
+async def get_portfolio_xirr(
+    user_id: str,
+    current_user: User = Depends(get_authorized_user)
+):
+    """
+    XIRR for every holding, every goal and the whole portfolio
+
+    Cash flows come from uploaded CAS transactions; holdings without history
+    are estimated from their SIP amount or cost value (see cash_flow_source).
+    """
+    try:
+        # SECURITY: Verify user can only access their own portfolio
+        user_id = sanitize_user_id(user_id)
+        verify_user_ownership(current_user, user_id)
+        if not supabase:
+            raise HTTPException(status_code=500, detail="Database not configured")
+
+        result = await asyncio.to_thread(load_portfolio_xirr, user_id)
+        return {'success': True, **result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Portfolio XIRR] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/holding-xirr/{holding_id}")
+async def get_holding_xirr(
+    holding_id: str,
+    current_user: User = Depends(get_authorized_user)
+):
+    """XIRR for a single holding (verify user ownership)"""
+    try:
+        # SECURITY: Fetch holding first, then verify ownership
+        holding = await db.table('portfolio_holdings').select('user_id').eq('id', holding_id).execute()
+
+        if not holding.data:
+            raise HTTPException(status_code=404, detail="Holding not found")
+
+        user_id = sanitize_user_id(holding.data[0]['user_id'])
+        verify_user_ownership(current_user, user_id)
+
+        result = await asyncio.to_thread(load_portfolio_xirr, user_id)
+        holding_result = next((h for h in result['holdings'] if h['holding_id'] == holding_id), None)
+        if holding_result is None:
+            raise HTTPException(status_code=404, detail="Holding is not active")
+
+        return {'success': True, 'as_of': result['as_of'], 'holding': holding_result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Holding XIRR] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/goal-xirr/{user_id}")
+async def get_goal_xirr(
+    user_id: str,
+    current_user: User = Depends(get_authorized_user)
+):
+    """XIRR per goal over the cash flows of the holdings assigned to it"""
+    try:
+        # SECURITY: Verify user can only access their own goals
+        user_id = sanitize_user_id(user_id)
+        verify_user_ownership(current_user, user_id)
+        if not supabase:
+            raise HTTPException(status_code=500, detail="Database not configured")
+
+        result = await asyncio.to_thread(load_portfolio_xirr, user_id)
+        return {'success': True, 'as_of': result['as_of'], 'goals': result['goals']}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Goal XIRR] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/portfolio-risk/{user_id}")
+async def get_portfolio_risk(
+    user_id: str,
+    current_user: User = Depends(get_authorized_user)
+):
+    """
+    Risk analytics from NAV history for each held scheme and the whole portfolio
+
+    Rolling 1/3/5-year returns, volatility, max drawdown, Sharpe/Sortino and
+    the correlation between held schemes. Per-scheme statistics are cached per
+    NAV date; the portfolio figures are a market-value-weighted combination.
+    """
+    try:
+        # SECURITY: Verify user can only access their own portfolio
+        user_id = sanitize_user_id(user_id)
+        verify_user_ownership(current_user, user_id)
+        if not supabase:
+            raise HTTPException(status_code=500, detail="Database not configured")
+
+        portfolio = await asyncio.to_thread(get_user_portfolio, user_id)
+        result = await asyncio.to_thread(portfolio_risk, supabase, portfolio['holdings'])
+        return {'success': True, **result}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"[Portfolio Risk] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 class ManualHoldingRequest(BaseModel):
     """Manual holding request model"""
     user_id: str
@@ -969,13 +1298,16 @@ async def add_manual_holding(
             "last_updated": datetime.now().isoformat()
         }
 
+        await asyncio.to_thread(stamp_asset_classes, supabase, [holding_data])
+
         # Insert into database
-        insert_response = supabase.from_("portfolio_holdings").insert(holding_data).execute()
+        insert_response = await db.from_("portfolio_holdings").insert(holding_data).execute()
 
         if not insert_response.data:
             raise HTTPException(status_code=500, detail="Failed to create holding")
 
         created_holding = insert_response.data[0]
+        invalidate_user_portfolio(request.user_id)
 
         print(f"[Add Manual Holding] Success! Holding ID: {created_holding.get('id')}")
 
@@ -1012,11 +1344,19 @@ async def search_schemes(query: str, limit: int = 20):
         if not query or len(query) < 2:
             return {"schemes": []}
 
-        # Search in scheme_master table
+        # Serve from the in-process index when it is loaded
+        scheme_index = get_scheme_index()
+        if scheme_index is not None:
+            maybe_check_scheme_index_version(supabase)
+            return {"schemes": scheme_index.search(query, limit)}
+
+        # Index still loading - fall back to searching scheme_master directly
+        schedule_scheme_index_refresh(supabase)
+
         # Use ilike for case-insensitive search on scheme_name
         search_pattern = f"%{query}%"
 
-        response = supabase.from_("scheme_master") \
+        response = await db.from_("scheme_master") \
             .select("scheme_code, scheme_name, amc_name, category") \
             .or_(f"scheme_name.ilike.{search_pattern},amc_name.ilike.{search_pattern}") \
             .limit(limit) \
@@ -1035,10 +1375,13 @@ async def search_schemes(query: str, limit: int = 20):
 
 
 @router.get("/scheme-details/{scheme_code}")
-async def get_scheme_details(scheme_code: str):
+async def get_scheme_details(scheme_code: str, request: Request):
     """
     Get detailed information about a specific scheme including ISIN codes
 
+    Served from the scheme metadata cache; responses carry ETag/Last-Modified
+    and conditional requests get 304 Not Modified.
+
     Args:
         scheme_code: The unique scheme code
 
@@ -1049,20 +1392,30 @@ async def get_scheme_details(scheme_code: str):
         if not supabase:
             raise HTTPException(status_code=500, detail="Database not configured")
 
-        # Fetch scheme details from scheme_master
-        response = supabase.from_("scheme_master") \
-            .select("*") \
-            .eq("scheme_code", scheme_code) \
-            .execute()
+        # Picks up syncs run by other processes (clears the cache on a new catalog)
+        maybe_check_scheme_index_version(supabase)
 
-        if not response.data or len(response.data) == 0:
-            raise HTTPException(status_code=404, detail=f"Scheme not found: {scheme_code}")
+        entry = scheme_metadata_cache.get(scheme_code)
+        if entry is None:
+            # Fetch scheme details from scheme_master
+            response = await db.from_("scheme_master") \
+                .select("*") \
+                .eq("scheme_code", scheme_code) \
+                .execute()
 
-        scheme = response.data[0]
+            if not response.data or len(response.data) == 0:
+                raise HTTPException(status_code=404, detail=f"Scheme not found: {scheme_code}")
 
-        print(f"[Scheme Details] Fetched details for scheme_code: {scheme_code}")
+            entry = build_scheme_entry(response.data[0])
+            scheme_metadata_cache.set(scheme_code, entry)
 
-        return {"scheme": scheme}
+            print(f"[Scheme Details] Fetched details for scheme_code: {scheme_code}")
+
+        headers = scheme_cache_headers(entry)
+        if is_not_modified(request.headers, entry):
+            return Response(status_code=304, headers=headers)
+
+        return JSONResponse(content=jsonable_encoder({"scheme": entry['scheme']}), headers=headers)
 
     except HTTPException:
         raise
@@ -1072,5 +1425,22 @@ async def get_scheme_details(scheme_code: str):
         raise HTTPException(status_code=500, detail=f"Failed to fetch scheme details: {str(e)}")
 
 
+@router.get("/portfolio-cache-stats")
+async def get_portfolio_cache_stats(current_user: User = Depends(get_authorized_user)):
+    """
+    Hit/miss, size and eviction statistics for the portfolio read caches (admin only)
+    """
+    from app.security import is_admin_user
+    if not is_admin_user(current_user):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return {
+        **portfolio_cache_stats(),
+        'scheme_details': scheme_metadata_cache.stats(),
+        'scheme_risk': risk_cache_stats(),
+        'valuation_connections': valuation_hub.connection_count(),
+    }
+
+
 # Export router
 __all__ = ['router']
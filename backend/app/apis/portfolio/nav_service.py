@@ -6,21 +6,25 @@ Handles NAV fetching, portfolio updates, and 10% threshold notifications
 import aiohttp
 import asyncio
 from datetime import datetime, date, timedelta
-from typing import Dict, Any, Optional, List
-import os
-from supabase import create_client
+from typing import Dict, Any, Optional, List, Tuple
+from app.utils.db import db, get_supabase, fetch_paged
 from decimal import Decimal
 
+from .portfolio_cache import invalidate_user_portfolio
+from app.utils.invalidation_bus import invalidation_bus
+from .valuation_stream import notify_valuation_changed
+
 # Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 # MFAPI Configuration
 MFAPI_BASE_URL = "https://api.mfapi.in/mf"
 RATE_LIMIT_DELAY = 0.6  # 600ms delay between requests (100 req/min)
 MAX_CONCURRENT_REQUESTS = 5  # Max concurrent API calls
 
+# Active holdings read per request by the batch update
+HOLDINGS_PAGE_SIZE = 1000
+
 
 # =======================
 # NAV FETCHING
@@ -88,7 +92,7 @@ async def update_holding_nav(holding_id: str, new_nav: float, nav_date: str) ->
     """
     try:
         # Get holding details
-        holding = supabase.table('portfolio_holdings').select('*').eq('id', holding_id).execute()
+        holding = await db.table('portfolio_holdings').select('*').eq('id', holding_id).execute()
 
         if not holding.data or len(holding.data) == 0:
             return {'success': False, 'error': 'Holding not found'}
@@ -112,7 +116,7 @@ async def update_holding_nav(holding_id: str, new_nav: float, nav_date: str) ->
             nav_date_parsed = datetime.now().date()
 
         # Update holding
-        supabase.table('portfolio_holdings').update({
+        await db.table('portfolio_holdings').update({
             'current_nav': new_nav,
             'nav_date': nav_date_parsed.isoformat(),
             'market_value': new_market_value,
@@ -122,7 +126,7 @@ async def update_holding_nav(holding_id: str, new_nav: float, nav_date: str) ->
         }).eq('id', holding_id).execute()
 
         # Insert NAV history record
-        supabase.table('nav_history').insert({
+        await db.table('nav_history').insert({
             'holding_id': holding_id,
             'scheme_code': holding_data['scheme_code'],
             'nav_value': new_nav,
@@ -170,7 +174,14 @@ async def update_holding_nav(holding_id: str, new_nav: float, nav_date: str) ->
             'old_nav': old_nav,
             'new_nav': new_nav,
             'market_value': new_market_value,
-            'notification_created': notification_created
+            'notification_created': notification_created,
+            'valuation': {
+                'current_nav': new_nav,
+                'nav_date': nav_date_parsed.isoformat(),
+                'market_value': new_market_value,
+                'absolute_profit': absolute_profit,
+                'absolute_return_percentage': absolute_return_percentage
+            }
         }
 
     except Exception as e:
@@ -192,17 +203,29 @@ async def batch_update_navs(user_id: Optional[str] = None) -> Dict[str, Any]:
     Returns:
         Statistics dict with update results
     """
+    stats, _ = await run_nav_valuation(user_id)
+    return stats
+
+
+async def run_nav_valuation(user_id: Optional[str] = None) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Batch NAV update that also returns the valued holdings
+
+    Returns:
+        (stats, holdings) - every active holding, with the new NAV and values
+        applied where the update succeeded (input for the snapshot stage)
+    """
     try:
         print(f"[NAV Service] Starting batch NAV update for {'user ' + user_id if user_id else 'all users'}")
 
-        # Get all active holdings
-        query = supabase.table('portfolio_holdings').select('*').eq('is_active', True)
+        # Get all active holdings (paged - PostgREST caps rows per request)
+        def holdings_query():
+            query = db.table('portfolio_holdings').select('*').eq('is_active', True)
+            if user_id:
+                query = query.eq('user_id', user_id)
+            return query.order('id')
 
-        if user_id:
-            query = query.eq('user_id', user_id)
-
-        holdings_result = query.execute()
-        holdings = holdings_result.data if holdings_result.data else []
+        holdings = await fetch_paged(holdings_query, HOLDINGS_PAGE_SIZE)
 
         print(f"[NAV Service] Found {len(holdings)} active holdings")
 
@@ -212,7 +235,7 @@ async def batch_update_navs(user_id: Optional[str] = None) -> Dict[str, Any]:
                 'schemes_updated': 0,
                 'schemes_failed': 0,
                 'notifications_created': 0
-            }
+            }, []
 
         # Group holdings by scheme_code to avoid duplicate API calls
         schemes_map = {}
@@ -262,6 +285,7 @@ async def batch_update_navs(user_id: Optional[str] = None) -> Dict[str, Any]:
 
                 if result.get('success'):
                     updated_count += 1
+                    holding.update(result['valuation'])
                     if result.get('notification_created'):
                         notifications_count += 1
                 else:
@@ -269,8 +293,12 @@ async def batch_update_navs(user_id: Optional[str] = None) -> Dict[str, Any]:
 
         # Update mutual_funds_value for all affected users
         affected_users = set(h['user_id'] for h in holdings)
-        for user_id_to_sync in affected_users:
-            await sync_mutual_funds_value(user_id_to_sync)
+        # One invalidation message for the whole batch instead of one per user
+        with invalidation_bus.batch():
+            for user_id_to_sync in affected_users:
+                await sync_mutual_funds_value(user_id_to_sync)
+                invalidate_user_portfolio(user_id_to_sync)
+                notify_valuation_changed(user_id_to_sync)
 
         stats = {
             'total_holdings': len(holdings),
@@ -284,7 +312,7 @@ async def batch_update_navs(user_id: Optional[str] = None) -> Dict[str, Any]:
         }
 
         print(f"[NAV Service] Batch update complete: {stats}")
-        return stats
+        return stats, holdings
 
     except Exception as e:
         print(f"[NAV Service] Error in batch update: {str(e)}")
@@ -304,7 +332,7 @@ async def sync_mutual_funds_value(user_id: str):
     """
     try:
         # Get total market value of all active holdings
-        holdings = supabase.table('portfolio_holdings').select('market_value').eq('user_id', user_id).eq('is_active', True).execute()
+        holdings = await db.table('portfolio_holdings').select('market_value').eq('user_id', user_id).eq('is_active', True).execute()
 
         if holdings.data:
             total_mf_value = sum(h['market_value'] for h in holdings.data)
@@ -312,11 +340,14 @@ async def sync_mutual_funds_value(user_id: str):
             total_mf_value = 0
 
         # Update assets_liabilities table
-        result = supabase.table('assets_liabilities').update({
+        result = await db.table('assets_liabilities').update({
             'mutual_funds_value': total_mf_value,
             'updated_at': datetime.now().isoformat()
         }).eq('user_id', user_id).execute()
 
+        from app.apis.financial_data.financial_cache import invalidate_user_financial_data
+        invalidate_user_financial_data(user_id)
+
         if result.data:
             print(f"[NAV Service] Synced mutual_funds_value for user {user_id}: ₹{total_mf_value:,.2f}")
         else:
@@ -327,4 +358,4 @@ async def sync_mutual_funds_value(user_id: str):
 
 
 # Export functions
-__all__ = ['fetch_latest_nav', 'update_holding_nav', 'batch_update_navs', 'sync_mutual_funds_value']
+__all__ = ['fetch_latest_nav', 'update_holding_nav', 'batch_update_navs', 'run_nav_valuation', 'sync_mutual_funds_value']
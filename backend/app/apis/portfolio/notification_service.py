@@ -3,15 +3,13 @@ Portfolio Notification Service
 Handles notification creation and email alerts for 10% portfolio changes
 """
 
-import os
+import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional
-from supabase import create_client
+from app.utils.db import db, get_supabase
 
 # Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 
 async def create_notification(
@@ -53,7 +51,7 @@ async def create_notification(
             'is_email_sent': False
         }
 
-        result = supabase.table('portfolio_notifications').insert(notification_data).execute()
+        result = await db.table('portfolio_notifications').insert(notification_data).execute()
 
         if result.data:
             notification = result.data[0]
@@ -82,11 +80,11 @@ async def send_portfolio_alert_email(user_id: str, notification_data: Dict[str,
     """
     try:
         # Get user email
-        user = supabase.table('users').select('email, name').eq('id', user_id).execute()
+        user = await db.table('users').select('email, name').eq('id', user_id).execute()
 
         if not user.data or len(user.data) == 0:
             # Try auth.users table
-            user = supabase.auth.admin.get_user_by_id(user_id)
+            user = await asyncio.to_thread(supabase.auth.admin.get_user_by_id, user_id)
             if not user:
                 print(f"[Notification Service] User {user_id} not found for email")
                 return
@@ -135,7 +133,7 @@ async def send_portfolio_alert_email(user_id: str, notification_data: Dict[str,
 
         if email_sent:
             # Update notification as email sent
-            supabase.table('portfolio_notifications').update({
+            await db.table('portfolio_notifications').update({
                 'is_email_sent': True,
                 'email_sent_at': datetime.now().isoformat()
             }).eq('id', notification_data.get('id')).execute()
@@ -306,7 +304,7 @@ async def get_unread_notifications(user_id: str, limit: int = 50) -> list:
         List of unread notifications
     """
     try:
-        result = supabase.table('portfolio_notifications').select('*').eq('user_id', user_id).eq('is_read', False).order('created_at', desc=True).limit(limit).execute()
+        result = await db.table('portfolio_notifications').select('*').eq('user_id', user_id).eq('is_read', False).order('created_at', desc=True).limit(limit).execute()
 
         return result.data if result.data else []
 
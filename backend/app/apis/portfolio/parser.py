@@ -7,20 +7,18 @@ import pdfplumber
 import pandas as pd
 import re
 import traceback
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union, BinaryIO
 from datetime import datetime
 from fuzzywuzzy import fuzz, process
 import os
-from supabase import create_client
+from app.utils.db import get_supabase
 import dotenv
 
 # Load environment variables
 dotenv.load_dotenv()
 
 # Supabase client for scheme mapping lookups
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 
 # =======================
@@ -51,6 +49,15 @@ def clean_number(value: Any) -> float:
         return 0.0
 
 
+def rewind_source(source: Union[str, BinaryIO]) -> Union[str, BinaryIO]:
+    """
+    Rewind a file handle so it can be parsed again (paths are returned unchanged)
+    """
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return source
+
+
 def extract_folio_number(text: str) -> Optional[str]:
     """
     Extract folio number from text (8-12 digits pattern)
@@ -155,13 +162,13 @@ def get_scheme_code(scheme_name: str, amc_name: str = None) -> str:
 # TEXT-BASED PARSER (Fallback)
 # =======================
 
-def parse_cams_text(file_path: str, password: str = None) -> List[Dict[str, Any]]:
+def parse_cams_text(file_path: Union[str, BinaryIO], password: str = None) -> List[Dict[str, Any]]:
     """
     Parse CAMS PDF by extracting tables properly
     CAMS format: Folio No. | ISIN | Scheme Name | Cost Value | Unit Balance | NAV Date | NAV | Market Value | Registrar
 
     Args:
-        file_path: Path to PDF file
+        file_path: Path to PDF file or binary file handle
         password: Password for protected PDFs (optional)
 
     Returns:
@@ -171,7 +178,7 @@ def parse_cams_text(file_path: str, password: str = None) -> List[Dict[str, Any]
     seen_holdings = set()  # Track unique holdings to avoid duplicates
 
     try:
-        with pdfplumber.open(file_path, password=password) as pdf:
+        with pdfplumber.open(rewind_source(file_path), password=password) as pdf:
             for page_num, page in enumerate(pdf.pages):
                 # Extract tables from the page
                 tables = page.extract_tables()
@@ -272,12 +279,12 @@ def parse_cams_text(file_path: str, password: str = None) -> List[Dict[str, Any]
 # PDF PARSER
 # =======================
 
-def parse_cams_pdf(file_path: str, password: str = None) -> List[Dict[str, Any]]:
+def parse_cams_pdf(file_path: Union[str, BinaryIO], password: str = None) -> List[Dict[str, Any]]:
     """
     Parse CAMS PDF statement to extract holdings
 
     Args:
-        file_path: Path to PDF file
+        file_path: Path to PDF file or binary file handle
         password: Password for protected PDFs (optional)
 
     Returns:
@@ -289,7 +296,7 @@ def parse_cams_pdf(file_path: str, password: str = None) -> List[Dict[str, Any]]
 
     try:
         # Open PDF with password if provided
-        with pdfplumber.open(file_path, password=password) as pdf:
+        with pdfplumber.open(rewind_source(file_path), password=password) as pdf:
             for page_num, page in enumerate(pdf.pages, 1):
                 print(f"[PDF Parser] Processing page {page_num}/{len(pdf.pages)}")
 
@@ -453,117 +460,288 @@ def parse_cams_pdf(file_path: str, password: str = None) -> List[Dict[str, Any]]
 # EXCEL PARSER
 # =======================
 
-def parse_cams_excel(file_path: str) -> List[Dict[str, Any]]:
+# Files larger than this are read with openpyxl in read-only streaming mode
+EXCEL_STREAMING_THRESHOLD = 5 * 1024 * 1024  # 5MB
+EXCEL_STREAM_CHUNK_ROWS = 5000
+
+# Header keywords used to locate the header row
+EXCEL_HEADER_PATTERN = r'folio|scheme'
+
+
+def clean_number_series(series: pd.Series) -> pd.Series:
+    """
+    Vectorized clean_number for a whole column
+    Handles rupee symbols, commas, whitespace and negatives in parentheses
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series.astype(float).fillna(0.0)
+
+    cleaned = (
+        series.astype(str)
+        .str.replace(r'[₹,\s]', '', regex=True)
+        .str.replace(r'^\((.*)\)$', r'-\1', regex=True)
+    )
+    return pd.to_numeric(cleaned, errors='coerce').fillna(0.0)
+
+
+def find_excel_header_row(df: pd.DataFrame) -> Optional[int]:
+    """
+    Find the positional index of the first row containing "Folio" or "Scheme"
+    Uses column-wise string matching instead of iterating rows
+    """
+    if df.empty:
+        return None
+
+    matches = df.apply(
+        lambda col: col.where(col.notna(), '').astype(str).str.contains(EXCEL_HEADER_PATTERN, case=False, regex=True)
+    )
+    row_has_header = matches.any(axis=1).to_numpy()
+
+    if not row_has_header.any():
+        return None
+    return int(row_has_header.argmax())
+
+
+def map_excel_columns(columns) -> Dict[str, Any]:
+    """Identify holding columns from header labels (case-insensitive)"""
+    col_mapping = {}
+    for col in columns:
+        col_lower = str(col).lower()
+        if 'folio' in col_lower:
+            col_mapping['folio'] = col
+        elif 'scheme' in col_lower or 'fund' in col_lower:
+            col_mapping['scheme'] = col
+        elif 'amc' in col_lower or 'house' in col_lower:
+            col_mapping['amc'] = col
+        elif 'unit' in col_lower or 'balance' in col_lower:
+            col_mapping['units'] = col
+        elif 'nav' in col_lower and 'date' not in col_lower:
+            col_mapping['nav'] = col
+        elif 'cost' in col_lower or 'invested' in col_lower:
+            col_mapping['cost'] = col
+        elif ('value' in col_lower or 'market' in col_lower) and 'cost' not in col_lower:
+            col_mapping['value'] = col
+    return col_mapping
+
+
+def extract_excel_holdings(
+    df: pd.DataFrame,
+    col_mapping: Dict[str, Any],
+    carry: Dict[str, Optional[str]]
+) -> pd.DataFrame:
+    """
+    Vectorized holding extraction from a block of data rows
+
+    Folio and AMC cells only appear on the first row of each group, so they are
+    forward-filled. `carry` holds the last folio/AMC seen in the previous block
+    and is updated in place, which lets streaming mode process rows in chunks.
+
+    Returns:
+        DataFrame with one row per valid holding
+    """
+    if df.empty or 'scheme' not in col_mapping:
+        return pd.DataFrame()
+
+    # Forward-fill folio numbers (8-12 digits) and AMC names
+    if 'folio' in col_mapping:
+        folio_raw = df[col_mapping['folio']]
+        folio = folio_raw.where(folio_raw.notna(), '').astype(str).str.extract(r'\b(\d{8,12})\b', expand=False)
+    else:
+        folio = pd.Series(index=df.index, dtype=object)
+    folio = folio.ffill()
+    if carry.get('folio'):
+        folio = folio.fillna(carry['folio'])
+
+    if 'amc' in col_mapping:
+        amc_raw = df[col_mapping['amc']]
+        amc = amc_raw.astype(str).str.strip().where(amc_raw.notna())
+    else:
+        amc = pd.Series(index=df.index, dtype=object)
+    amc = amc.ffill()
+    if carry.get('amc'):
+        amc = amc.fillna(carry['amc'])
+
+    last_folio = folio.dropna()
+    if not last_folio.empty:
+        carry['folio'] = last_folio.iloc[-1]
+    last_amc = amc.dropna()
+    if not last_amc.empty:
+        carry['amc'] = last_amc.iloc[-1]
+
+    # Scheme names (skip empty and too-short values)
+    scheme_raw = df[col_mapping['scheme']]
+    scheme = scheme_raw.where(scheme_raw.notna(), '').astype(str).str.strip()
+
+    def numeric(key: str) -> pd.Series:
+        if key in col_mapping:
+            return clean_number_series(df[col_mapping[key]])
+        return pd.Series(0.0, index=df.index)
+
+    units = numeric('units')
+    nav = numeric('nav')
+    cost = numeric('cost')
+    value = numeric('value')
+
+    # Validate required fields
+    valid = (scheme.str.len() >= 5) & (units > 0) & ((nav > 0) | (cost > 0) | (value > 0))
+    if not valid.any():
+        return pd.DataFrame()
+
+    # Calculate missing values
+    nav = nav.where(~((nav == 0) & (value > 0)), value / units.where(units > 0))
+    cost = cost.where(cost != 0, value.where(value > 0, nav * units))
+    avg_cost = cost / units
+
+    return pd.DataFrame({
+        'folio_number': folio.fillna('UNKNOWN'),
+        'scheme_name': scheme,
+        'amc_name': amc,
+        'unit_balance': units,
+        'avg_cost_per_unit': avg_cost,
+        'cost_value': cost,
+        'current_nav': nav,
+    })[valid]
+
+
+def is_xlsx_source(file_path: Union[str, BinaryIO]) -> bool:
+    """Check for the zip signature used by .xlsx files (legacy .xls is not zip-based)"""
+    if hasattr(file_path, 'read'):
+        rewind_source(file_path)
+        signature = file_path.read(2)
+        rewind_source(file_path)
+    else:
+        with open(file_path, 'rb') as f:
+            signature = f.read(2)
+    return signature == b'PK'
+
+
+def get_source_size(file_path: Union[str, BinaryIO]) -> int:
+    """Size in bytes of a path or seekable handle"""
+    if hasattr(file_path, 'seek'):
+        file_path.seek(0, 2)
+        size = file_path.tell()
+        file_path.seek(0)
+        return size
+    return os.path.getsize(file_path)
+
+
+def iter_excel_holdings_streaming(
+    file_path: Union[str, BinaryIO],
+    chunk_rows: int = EXCEL_STREAM_CHUNK_ROWS
+):
+    """
+    Stream an .xlsx export with openpyxl read-only mode
+
+    Rows are buffered into DataFrame blocks of `chunk_rows` and run through the
+    same vectorized extraction, so memory stays bounded for very large exports.
+
+    Yields:
+        DataFrames of extracted holdings, one per block
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(rewind_source(file_path), read_only=True, data_only=True)
+    try:
+        sheet = workbook.worksheets[0]
+        rows = sheet.iter_rows(values_only=True)
+
+        columns = None
+        col_mapping = None
+        carry = {'folio': None, 'amc': None}
+        buffer = []
+
+        def flush(block_rows):
+            nonlocal columns, col_mapping
+            block = pd.DataFrame(block_rows)
+
+            if columns is None:
+                header_row = find_excel_header_row(block)
+                if header_row is None:
+                    return pd.DataFrame()
+                columns = list(block.iloc[header_row])
+                col_mapping = map_excel_columns(columns)
+                print(f"[Excel Parser] Column mapping: {col_mapping}")
+                block = block.iloc[header_row + 1:]
+
+            block = block.reindex(columns=range(len(columns)))
+            block.columns = columns
+            return extract_excel_holdings(block.reset_index(drop=True), col_mapping, carry)
+
+        for row in rows:
+            buffer.append(row)
+            if len(buffer) >= chunk_rows:
+                yield flush(buffer)
+                buffer = []
+
+        if buffer:
+            yield flush(buffer)
+
+        if columns is None:
+            raise Exception("Could not find header row in Excel file")
+
+    finally:
+        workbook.close()
+
+
+def parse_cams_excel(file_path: Union[str, BinaryIO], streaming: Optional[bool] = None) -> List[Dict[str, Any]]:
     """
     Parse CAMS Excel statement to extract holdings
 
     Args:
-        file_path: Path to Excel file
+        file_path: Path to Excel file or binary file handle
+        streaming: Use openpyxl read-only streaming (.xlsx only).
+            None picks streaming automatically for large .xlsx files.
 
     Returns:
         List of holding dictionaries
     """
-    holdings = []
-
     try:
-        # Read Excel file
-        df = pd.read_excel(file_path, sheet_name=0)
+        if streaming is None:
+            streaming = get_source_size(file_path) > EXCEL_STREAMING_THRESHOLD and is_xlsx_source(file_path)
 
-        print(f"[Excel Parser] Loaded {len(df)} rows")
+        if streaming:
+            print("[Excel Parser] Using openpyxl read-only streaming mode")
+            blocks = [block for block in iter_excel_holdings_streaming(file_path) if not block.empty]
+            extracted = pd.concat(blocks, ignore_index=True) if blocks else pd.DataFrame()
+        else:
+            # Read Excel file without assuming the header is on the first row
+            df = pd.read_excel(rewind_source(file_path), sheet_name=0, header=None)
 
-        # Find header row (contains "Folio" or "Scheme")
-        header_row = None
-        for i, row in df.iterrows():
-            row_str = ' '.join(str(x).lower() for x in row if pd.notna(x))
-            if 'folio' in row_str or 'scheme' in row_str:
-                header_row = i
-                break
+            print(f"[Excel Parser] Loaded {len(df)} rows")
 
-        if header_row is None:
-            raise Exception("Could not find header row in Excel file")
+            # Find header row (contains "Folio" or "Scheme")
+            header_row = find_excel_header_row(df)
 
-        # Set headers
-        df.columns = df.iloc[header_row]
-        df = df.iloc[header_row + 1:].reset_index(drop=True)
-
-        # Identify columns (case-insensitive)
-        col_mapping = {}
-        for col in df.columns:
-            col_lower = str(col).lower()
-            if 'folio' in col_lower:
-                col_mapping['folio'] = col
-            elif 'scheme' in col_lower or 'fund' in col_lower:
-                col_mapping['scheme'] = col
-            elif 'amc' in col_lower or 'house' in col_lower:
-                col_mapping['amc'] = col
-            elif 'unit' in col_lower or 'balance' in col_lower:
-                col_mapping['units'] = col
-            elif 'nav' in col_lower and 'date' not in col_lower:
-                col_mapping['nav'] = col
-            elif 'cost' in col_lower or 'invested' in col_lower:
-                col_mapping['cost'] = col
-            elif ('value' in col_lower or 'market' in col_lower) and 'cost' not in col_lower:
-                col_mapping['value'] = col
-
-        print(f"[Excel Parser] Column mapping: {col_mapping}")
-
-        # Parse rows
-        current_folio = None
-        current_amc = None
-
-        for _, row in df.iterrows():
-            # Extract folio
-            if 'folio' in col_mapping and pd.notna(row[col_mapping['folio']]):
-                folio = extract_folio_number(str(row[col_mapping['folio']]))
-                if folio:
-                    current_folio = folio
-
-            # Extract AMC
-            if 'amc' in col_mapping and pd.notna(row[col_mapping['amc']]):
-                current_amc = str(row[col_mapping['amc']]).strip()
-
-            # Extract scheme
-            if 'scheme' not in col_mapping or pd.isna(row[col_mapping['scheme']]):
-                continue
-
-            scheme_name = str(row[col_mapping['scheme']]).strip()
-
-            if not scheme_name or len(scheme_name) < 5:
-                continue
-
-            # Extract numeric values
-            units = clean_number(row[col_mapping['units']]) if 'units' in col_mapping else 0
-            nav = clean_number(row[col_mapping['nav']]) if 'nav' in col_mapping else 0
-            cost = clean_number(row[col_mapping['cost']]) if 'cost' in col_mapping else 0
-            value = clean_number(row[col_mapping['value']]) if 'value' in col_mapping else 0
-
-            # Validate and calculate
-            if units > 0 and (nav > 0 or cost > 0 or value > 0):
-                if nav == 0 and value > 0 and units > 0:
-                    nav = value / units
-
-                if cost == 0 and units > 0:
-                    cost = value if value > 0 else (nav * units)
-
-                avg_cost = cost / units if units > 0 else 0
-
-                # Get scheme code
-                scheme_code = get_scheme_code(scheme_name, current_amc)
-
-                holding = {
-                    'folio_number': current_folio or 'UNKNOWN',
-                    'scheme_name': scheme_name,
-                    'scheme_code': scheme_code,
-                    'amc_name': current_amc,
-                    'unit_balance': units,
-                    'avg_cost_per_unit': avg_cost,
-                    'cost_value': cost,
-                    'current_nav': nav,
-                    'nav_date': datetime.now().date().isoformat(),
-                }
+            if header_row is None:
+                raise Exception("Could not find header row in Excel file")
+
+            # Set headers
+            df.columns = df.iloc[header_row]
+            df = df.iloc[header_row + 1:].reset_index(drop=True)
+
+            col_mapping = map_excel_columns(df.columns)
+            print(f"[Excel Parser] Column mapping: {col_mapping}")
+
+            extracted = extract_excel_holdings(df, col_mapping, {'folio': None, 'amc': None})
+
+        if extracted.empty:
+            print("[Excel Parser] Total holdings extracted: 0")
+            return []
+
+        # Resolve scheme codes once per unique (scheme, AMC) pair
+        extracted['amc_name'] = extracted['amc_name'].astype(object).where(extracted['amc_name'].notna(), None)
+        schemes = extracted[['scheme_name', 'amc_name']].drop_duplicates()
+        schemes['scheme_code'] = [
+            get_scheme_code(scheme_name, amc_name)
+            for scheme_name, amc_name in zip(schemes['scheme_name'], schemes['amc_name'])
+        ]
+        extracted = extracted.merge(schemes, on=['scheme_name', 'amc_name'], how='left')
+        extracted['nav_date'] = datetime.now().date().isoformat()
 
-                holdings.append(holding)
-                print(f"[Excel Parser] Extracted: {scheme_name} ({units} units)")
+        holdings = extracted[[
+            'folio_number', 'scheme_name', 'scheme_code', 'amc_name', 'unit_balance',
+            'avg_cost_per_unit', 'cost_value', 'current_nav', 'nav_date'
+        ]].to_dict('records')
 
         print(f"[Excel Parser] Total holdings extracted: {len(holdings)}")
         return holdings
@@ -0,0 +1,117 @@
+"""
+Portfolio Read Cache
+Per-user cached portfolio views, invalidated by every write path that changes
+holdings (upload, manual add, goal assignment, delete, NAV updates) or goals
+"""
+
+import itertools
+import threading
+from typing import Any, Dict, Hashable
+
+from app.utils.ttl_cache import TTLCache
+from app.utils.invalidation_bus import invalidation_bus, parse_tag, user_tag
+
+# Holdings + summary per user, bounded by users and by total holding rows held
+HOLDINGS_CACHE_MAX_USERS = 5000
+HOLDINGS_CACHE_MAX_ROWS = 200_000
+
+# Users with a cached goal investment summary
+GOAL_SUMMARY_CACHE_MAX_USERS = 2000
+
+# Safety net for writes made outside this process
+HOLDINGS_CACHE_TTL = 15 * 60  # seconds
+GOAL_SUMMARY_CACHE_TTL = 15 * 60  # seconds
+
+holdings_cache = TTLCache(
+    'Holdings Cache', HOLDINGS_CACHE_MAX_USERS, HOLDINGS_CACHE_TTL,
+    max_weight=HOLDINGS_CACHE_MAX_ROWS, weigher=lambda entry: max(len(entry['holdings']), 1)
+)
+goal_summary_cache = TTLCache('Goal Summary Cache', GOAL_SUMMARY_CACHE_MAX_USERS, GOAL_SUMMARY_CACHE_TTL)
+
+# Published when every user's portfolio views are dropped at once
+PORTFOLIO_TABLE_TAG = 'table:portfolio_holdings'
+
+# Bumped on every invalidation; a read that started before an invalidation
+# must not store what it loaded (it may predate the write)
+_epoch = itertools.count()
+_current_epoch = next(_epoch)
+_epoch_lock = threading.Lock()
+
+
+def bump_epoch():
+    """Make reads already in flight skip their store (call with any invalidation)"""
+    global _current_epoch
+    with _epoch_lock:
+        _current_epoch = next(_epoch)
+
+
+def read_epoch() -> int:
+    """Token to take before loading from the database; pass it to store_if_current"""
+    return _current_epoch
+
+
+def store_if_current(cache: TTLCache, key: Hashable, value: Any, epoch: int):
+    """Cache `value` unless an invalidation happened since `epoch` was read"""
+    with _epoch_lock:
+        if epoch == _current_epoch:
+            cache.set(key, value)
+
+
+def _evict_user(user_id: str):
+    bump_epoch()
+    holdings_cache.invalidate(str(user_id))
+    goal_summary_cache.invalidate(str(user_id))
+
+
+def _evict_all():
+    bump_epoch()
+    holdings_cache.clear()
+    goal_summary_cache.clear()
+
+
+def invalidate_user_portfolio(user_id: str):
+    """Drop cached holdings and goal summary for one user (call after any holding write)"""
+    if user_id:
+        _evict_user(user_id)
+        invalidation_bus.publish(user_tag(user_id))
+
+
+def invalidate_user_goals(user_id: str):
+    """Drop the cached goal summary for one user (call after goal writes)"""
+    if user_id:
+        bump_epoch()
+        goal_summary_cache.invalidate(str(user_id))
+        invalidation_bus.publish(user_tag(user_id))
+
+
+def invalidate_all_portfolios():
+    """Drop cached portfolio views for every user"""
+    _evict_all()
+    invalidation_bus.publish(PORTFOLIO_TABLE_TAG)
+
+
+def _on_remote_invalidation(tags):
+    # Another worker changed these users' holdings or goals
+    for tag in tags:
+        kind, value = parse_tag(tag)
+        if kind == 'user':
+            _evict_user(value)
+        elif tag == PORTFOLIO_TABLE_TAG:
+            _evict_all()
+
+
+invalidation_bus.subscribe(_on_remote_invalidation)
+
+
+def portfolio_cache_stats() -> Dict[str, Any]:
+    return {
+        'holdings': holdings_cache.stats(),
+        'goal_summary': goal_summary_cache.stats(),
+    }
+
+
+# Export functions
+__all__ = [
+    'holdings_cache', 'goal_summary_cache', 'read_epoch', 'store_if_current', 'bump_epoch',
+    'invalidate_user_portfolio', 'invalidate_user_goals', 'invalidate_all_portfolios', 'portfolio_cache_stats'
+]
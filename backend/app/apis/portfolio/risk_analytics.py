@@ -0,0 +1,305 @@
+"""
+Risk Analytics
+Per-scheme return and risk statistics from nav_history (rolling returns,
+volatility, drawdown, Sharpe/Sortino), cached per scheme per NAV date, and
+portfolio analytics as a value-weighted combination of those statistics
+"""
+
+import numpy as np
+import pandas as pd
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.ttl_cache import TTLCache
+
+# Rolling return windows, in years
+ROLLING_WINDOWS = {'1y': 1, '3y': 3, '5y': 5}
+
+# A window start may fall up to this many days before the first available NAV
+# on or after it (weekends, holidays, missed updates)
+WINDOW_TOLERANCE_DAYS = 7
+
+DAYS_PER_YEAR = 365.25
+
+# Annual risk-free rate for Sharpe/Sortino (approx. 91-day T-bill yield)
+RISK_FREE_RATE = 0.065
+
+# Fewer return observations than this give no risk statistics
+MIN_OBSERVATIONS = 20
+
+# nav_history is read in pages (PostgREST caps rows per request)
+NAV_PAGE_SIZE = 1000
+NAV_LOOKUP_CHUNK_SIZE = 50
+
+# Stats are keyed by (scheme_code, latest NAV date), so a new NAV is a new key
+# and stale entries simply age out; bounded by schemes and by NAV points held
+RISK_CACHE_MAX_SCHEMES = 4096
+RISK_CACHE_MAX_POINTS = 4_000_000
+RISK_CACHE_TTL = 24 * 60 * 60  # seconds
+
+scheme_risk_cache = TTLCache(
+    'Risk Analytics Cache', RISK_CACHE_MAX_SCHEMES, RISK_CACHE_TTL,
+    max_weight=RISK_CACHE_MAX_POINTS, weigher=lambda entry: max(len(entry[1]), 1)
+)
+
+
+# =======================
+# NAV SERIES
+# =======================
+
+def load_nav_series(client, scheme_codes: Iterable[str]) -> Dict[str, pd.Series]:
+    """
+    scheme_code -> NAV series indexed by date (ascending, one value per date)
+
+    Reads the scheme_nav_history view (migration 027), which already holds one
+    row per scheme and date; pages are ordered on that unique pair.
+    """
+    codes = sorted({str(code) for code in scheme_codes if code})
+    rows = []
+
+    for i in range(0, len(codes), NAV_LOOKUP_CHUNK_SIZE):
+        chunk = codes[i:i + NAV_LOOKUP_CHUNK_SIZE]
+        start = 0
+        while True:
+            page = client.table('scheme_nav_history') \
+                .select('scheme_code, nav_date, nav_value') \
+                .in_('scheme_code', chunk) \
+                .order('scheme_code') \
+                .order('nav_date') \
+                .range(start, start + NAV_PAGE_SIZE - 1) \
+                .execute().data or []
+            rows.extend(page)
+            if len(page) < NAV_PAGE_SIZE:
+                break
+            start += NAV_PAGE_SIZE
+
+    if not rows:
+        return {}
+
+    frame = pd.DataFrame(rows)
+    frame['scheme_code'] = frame['scheme_code'].astype(str)
+    frame['nav_date'] = pd.to_datetime(frame['nav_date'])
+    frame['nav_value'] = pd.to_numeric(frame['nav_value'], errors='coerce')
+    frame = frame[frame['nav_value'] > 0]
+
+    navs = frame.groupby(['scheme_code', 'nav_date'], sort=True)['nav_value'].last()
+    return {code: series.droplevel(0) for code, series in navs.groupby(level=0)}
+
+
+# =======================
+# PER-SCHEME STATISTICS
+# =======================
+
+def _round(value: Optional[float], digits: int = 4) -> Optional[float]:
+    return round(float(value), digits) if value is not None and np.isfinite(value) else None
+
+
+def rolling_returns(dates: np.ndarray, navs: np.ndarray, years: int) -> Optional[Dict[str, Any]]:
+    """
+    Annualized returns over every `years`-long window ending at each NAV date
+
+    Window starts are located with one searchsorted over the date axis.
+    """
+    window_start = dates - np.timedelta64(int(round(years * DAYS_PER_YEAR)), 'D')
+    start_idx = np.searchsorted(dates, window_start, side='left')
+    valid = (start_idx < np.arange(len(dates))) & (
+        dates[np.minimum(start_idx, len(dates) - 1)] - window_start <= np.timedelta64(WINDOW_TOLERANCE_DAYS, 'D')
+    )
+    if not valid.any():
+        return None
+
+    end_navs = navs[valid]
+    start_navs = navs[start_idx[valid]]
+    returns = np.power(end_navs / start_navs, 1.0 / years) - 1.0
+
+    return {
+        'latest': _round(returns[-1]) if valid[-1] else None,
+        'average': _round(returns.mean()),
+        'min': _round(returns.min()),
+        'max': _round(returns.max()),
+        'windows': int(valid.sum()),
+    }
+
+
+def max_drawdown(navs: np.ndarray) -> float:
+    """Largest peak-to-trough fall, as a negative fraction"""
+    return float((navs / np.maximum.accumulate(navs) - 1.0).min())
+
+
+def return_risk_stats(returns: np.ndarray, periods_per_year: float) -> Dict[str, Optional[float]]:
+    """Annualized mean return, volatility, Sharpe and Sortino from periodic returns"""
+    annual_return = returns.mean() * periods_per_year
+    volatility = returns.std(ddof=1) * np.sqrt(periods_per_year)
+
+    period_rf = RISK_FREE_RATE / periods_per_year
+    downside = np.minimum(returns - period_rf, 0.0)
+    downside_deviation = np.sqrt(np.mean(downside ** 2) * periods_per_year)
+
+    return {
+        'mean_annual_return': _round(annual_return),
+        'volatility': _round(volatility),
+        'sharpe_ratio': _round((annual_return - RISK_FREE_RATE) / volatility, 3) if volatility > 0 else None,
+        'sortino_ratio': _round((annual_return - RISK_FREE_RATE) / downside_deviation, 3) if downside_deviation > 0 else None,
+    }
+
+
+def periods_per_year(index: pd.DatetimeIndex) -> Optional[float]:
+    """Observed NAV frequency (nav_history is not guaranteed to be daily)"""
+    span_years = (index[-1] - index[0]).days / DAYS_PER_YEAR
+    return (len(index) - 1) / span_years if span_years > 0 else None
+
+
+def compute_scheme_stats(scheme_code: str, series: pd.Series) -> Dict[str, Any]:
+    """Return and risk statistics for one scheme's NAV series"""
+    dates = series.index.values.astype('datetime64[D]')
+    navs = series.to_numpy(dtype=float)
+
+    stats: Dict[str, Any] = {
+        'scheme_code': scheme_code,
+        'start_date': series.index[0].date().isoformat(),
+        'nav_date': series.index[-1].date().isoformat(),
+        'observations': len(navs),
+        'rolling_returns': {label: rolling_returns(dates, navs, years) for label, years in ROLLING_WINDOWS.items()},
+        'cagr': None,
+        'max_drawdown': _round(max_drawdown(navs)),
+        'mean_annual_return': None,
+        'volatility': None,
+        'sharpe_ratio': None,
+        'sortino_ratio': None,
+    }
+
+    frequency = periods_per_year(series.index)
+    if frequency and len(navs) > MIN_OBSERVATIONS:
+        span_years = (series.index[-1] - series.index[0]).days / DAYS_PER_YEAR
+        stats['cagr'] = _round((navs[-1] / navs[0]) ** (1.0 / span_years) - 1.0)
+        stats.update(return_risk_stats(navs[1:] / navs[:-1] - 1.0, frequency))
+
+    return stats
+
+
+def get_scheme_stats(client, nav_dates: Dict[str, Any]) -> Dict[str, Tuple[Dict[str, Any], pd.Series]]:
+    """
+    (stats, NAV series) per scheme, from the cache where the latest NAV date matches
+
+    Args:
+        nav_dates: scheme_code -> latest NAV date known for it (e.g. holding.nav_date)
+    """
+    results = {}
+    missing = []
+    for code, nav_date in nav_dates.items():
+        entry = scheme_risk_cache.get((code, str(nav_date)))
+        if entry is None:
+            missing.append(code)
+        else:
+            results[code] = entry
+
+    if missing:
+        for code, series in load_nav_series(client, missing).items():
+            entry = (compute_scheme_stats(code, series), series)
+            results[code] = entry
+            scheme_risk_cache.set((code, str(nav_dates[code])), entry)
+
+    return results
+
+
+# =======================
+# PORTFOLIO
+# =======================
+
+def correlation_matrix(series_by_code: Dict[str, pd.Series]) -> pd.DataFrame:
+    """Pairwise correlation of periodic returns over the aligned (forward-filled) date axis"""
+    navs = pd.concat(series_by_code, axis=1).sort_index().ffill()
+    return navs.pct_change(fill_method=None).corr(min_periods=MIN_OBSERVATIONS)
+
+
+def _weighted(values: List[Optional[float]], weights: np.ndarray) -> Optional[float]:
+    """Weighted mean over the entries that have a value (weights renormalized)"""
+    array = np.array([np.nan if v is None else v for v in values], dtype=float)
+    mask = np.isfinite(array)
+    if not mask.any() or weights[mask].sum() <= 0:
+        return None
+    return float(np.dot(array[mask], weights[mask]) / weights[mask].sum())
+
+
+def portfolio_risk(client, holdings: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Portfolio analytics for a user's holdings
+
+    Holdings are combined per scheme by market value. Returns, drawdown and
+    ratios are value-weighted scheme statistics; volatility uses the
+    correlation between held schemes (sqrt(w' D C D w)).
+    """
+    values: Dict[str, float] = {}
+    nav_dates: Dict[str, Any] = {}
+    for holding in holdings:
+        code = str(holding.get('scheme_code') or '')
+        value = float(holding.get('market_value') or 0)
+        if code and value > 0:
+            values[code] = values.get(code, 0.0) + value
+            nav_dates[code] = max(str(holding.get('nav_date') or ''), str(nav_dates.get(code) or ''))
+
+    total_value = sum(values.values())
+    scheme_entries = get_scheme_stats(client, nav_dates) if nav_dates else {}
+    codes = [code for code in values if code in scheme_entries]
+    covered_value = sum(values[code] for code in codes)
+
+    result: Dict[str, Any] = {
+        'as_of': date.today().isoformat(),
+        'portfolio': {
+            'schemes_count': len(values),
+            'schemes_with_history': len(codes),
+            'value_coverage': _round(covered_value / total_value) if total_value > 0 else None,
+        },
+        'schemes': [],
+        'correlation': {},
+    }
+    if not codes:
+        return result
+
+    weights = np.array([values[code] / covered_value for code in codes])
+    stats = [scheme_entries[code][0] for code in codes]
+    result['schemes'] = [{**s, 'weight': _round(w)} for s, w in zip(stats, weights)]
+
+    correlation = correlation_matrix({code: scheme_entries[code][1] for code in codes}) \
+        .reindex(index=codes, columns=codes).to_numpy(copy=True)
+    np.fill_diagonal(correlation, 1.0)
+    result['correlation'] = {
+        code: {other: _round(correlation[i, j], 3) for j, other in enumerate(codes) if np.isfinite(correlation[i, j])}
+        for i, code in enumerate(codes)
+    }
+
+    portfolio = result['portfolio']
+    for field in ('cagr', 'mean_annual_return', 'max_drawdown', 'sharpe_ratio', 'sortino_ratio'):
+        portfolio[field] = _round(_weighted([s[field] for s in stats], weights))
+    portfolio['rolling_returns'] = {
+        label: _round(_weighted([(s['rolling_returns'][label] or {}).get('latest') for s in stats], weights))
+        for label in ROLLING_WINDOWS
+    }
+
+    # Schemes without volatility, or pairs without enough overlap, are left out
+    volatilities = np.array([np.nan if s['volatility'] is None else s['volatility'] for s in stats])
+    usable = np.isfinite(volatilities)
+    if usable.any():
+        w = weights[usable] / weights[usable].sum()
+        dv = w * volatilities[usable]
+        c = np.nan_to_num(correlation[np.ix_(usable, usable)], nan=0.0)
+        volatility = float(np.sqrt(max(dv @ c @ dv, 0.0)))
+        portfolio['volatility'] = _round(volatility)
+        annual_return = portfolio['mean_annual_return']
+        portfolio['sharpe_ratio'] = _round((annual_return - RISK_FREE_RATE) / volatility, 3) \
+            if annual_return is not None and volatility > 0 else portfolio['sharpe_ratio']
+    else:
+        portfolio['volatility'] = None
+
+    return result
+
+
+def risk_cache_stats() -> Dict[str, Any]:
+    return scheme_risk_cache.stats()
+
+
+# Export functions
+__all__ = [
+    'load_nav_series', 'compute_scheme_stats', 'get_scheme_stats', 'correlation_matrix',
+    'portfolio_risk', 'risk_cache_stats', 'scheme_risk_cache'
+]
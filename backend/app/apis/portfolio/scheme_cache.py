@@ -0,0 +1,91 @@
+"""
+Scheme Metadata Cache
+Bounded LRU + TTL cache of scheme_master rows keyed by scheme_code, with the
+ETag/Last-Modified validators used for HTTP revalidation
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from app.utils.ttl_cache import TTLCache
+
+# Scheme rows kept in memory (a full row is ~1KB)
+SCHEME_CACHE_MAX_ENTRIES = 4096
+
+# Safety net for changes made outside the sync job (sync commits clear the cache)
+SCHEME_CACHE_TTL = 6 * 60 * 60  # seconds
+
+# Browser/CDN freshness before revalidating with If-None-Match / If-Modified-Since
+SCHEME_DETAILS_MAX_AGE = 3600  # seconds
+
+
+scheme_metadata_cache = TTLCache('Scheme Cache', SCHEME_CACHE_MAX_ENTRIES, SCHEME_CACHE_TTL)
+
+
+# =======================
+# HTTP VALIDATORS
+# =======================
+
+def parse_last_updated(value: Any) -> Optional[datetime]:
+    """scheme_master.last_updated as an aware UTC datetime, truncated to whole seconds"""
+    if not value:
+        return None
+    try:
+        parsed = value if isinstance(value, datetime) else datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).replace(microsecond=0)
+
+
+def build_scheme_entry(scheme: Dict[str, Any]) -> Dict[str, Any]:
+    """Cache entry for a scheme row: the row plus its ETag and Last-Modified"""
+    digest = hashlib.sha1(json.dumps(scheme, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+    return {
+        'scheme': scheme,
+        'etag': f'"{digest}"',
+        'last_modified': parse_last_updated(scheme.get('last_updated')),
+    }
+
+
+def scheme_cache_headers(entry: Dict[str, Any]) -> Dict[str, str]:
+    headers = {
+        'ETag': entry['etag'],
+        'Cache-Control': f'public, max-age={SCHEME_DETAILS_MAX_AGE}',
+    }
+    if entry['last_modified']:
+        headers['Last-Modified'] = format_datetime(entry['last_modified'], usegmt=True)
+    return headers
+
+
+def is_not_modified(request_headers: Mapping[str, str], entry: Dict[str, Any]) -> bool:
+    """
+    Conditional GET check (RFC 9110): If-None-Match wins over If-Modified-Since
+    """
+    if_none_match = request_headers.get('if-none-match')
+    if if_none_match:
+        tags = [tag.strip() for tag in if_none_match.split(',')]
+        return '*' in tags or any(tag.removeprefix('W/') == entry['etag'] for tag in tags)
+
+    if_modified_since = request_headers.get('if-modified-since')
+    if if_modified_since and entry['last_modified']:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return entry['last_modified'] <= since
+
+    return False
+
+
+# Export functions
+__all__ = [
+    'scheme_metadata_cache', 'build_scheme_entry',
+    'scheme_cache_headers', 'is_not_modified'
+]
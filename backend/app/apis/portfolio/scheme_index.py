@@ -0,0 +1,273 @@
+"""
+Scheme Search Index
+In-process autocomplete index over scheme_master: a prefix trie plus token-level
+inverted lists, with documents stored in rank order so searches can stop early
+"""
+
+import asyncio
+import math
+import re
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .scheme_cache import scheme_metadata_cache
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+')
+
+# scheme_master is read in pages (PostgREST caps rows per request)
+SCHEME_PAGE_SIZE = 1000
+
+# How often a search may trigger a check for a newer scheme_master
+VERSION_CHECK_INTERVAL = 600  # seconds
+
+# Candidates collected (in static rank order) before query-aware re-ranking
+CANDIDATE_FACTOR = 3
+
+SEARCH_FIELDS = ('scheme_code', 'scheme_name', 'amc_name', 'category')
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Lowercase alphanumeric tokens"""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def scheme_rank_score(scheme_name: str, popularity: int = 0) -> float:
+    """
+    Static ranking: popular schemes first, Direct and Growth plans ahead of
+    Regular and IDCW/dividend variants
+    """
+    name = scheme_name.lower()
+    score = math.log1p(popularity) * 10
+
+    if 'direct' in name:
+        score += 5
+    if 'growth' in name:
+        score += 3
+    if 'idcw' in name or 'dividend' in name or 'bonus' in name:
+        score -= 2
+
+    return score
+
+
+class _TrieNode:
+    __slots__ = ('children', 'docs')
+
+    def __init__(self):
+        self.children = {}
+        self.docs = array('I')  # Docs with a token under this prefix, in rank order
+
+
+class SchemeSearchIndex:
+    """
+    Autocomplete index over scheme records
+
+    Document ids are assigned in static rank order, so every posting list
+    (trie node or inverted list) is already sorted best-first.
+    """
+
+    def __init__(self, schemes: Iterable[Dict[str, Any]], popularity: Optional[Dict[str, int]] = None, version: Optional[str] = None):
+        popularity = popularity or {}
+        schemes = [s for s in schemes if s.get('scheme_code') and s.get('scheme_name')]
+        schemes.sort(key=lambda s: (
+            -scheme_rank_score(s['scheme_name'], popularity.get(str(s['scheme_code']), 0)),
+            len(s['scheme_name'])
+        ))
+
+        self.version = version
+        self.built_at = time.time()
+        self._records: List[Dict[str, Any]] = []
+        self._names: List[str] = []
+        self._doc_tokens: List[Tuple[str, ...]] = []
+        self._inverted: Dict[str, array] = {}
+        self._root = _TrieNode()
+
+        for doc_id, scheme in enumerate(schemes):
+            self._records.append({field: scheme.get(field) for field in SEARCH_FIELDS})
+            self._names.append(scheme['scheme_name'].lower())
+
+            tokens = tuple(sorted(set(tokenize(scheme['scheme_name']) + tokenize(scheme.get('amc_name')))))
+            self._doc_tokens.append(tokens)
+
+            for token in tokens:
+                postings = self._inverted.get(token)
+                if postings is None:
+                    postings = self._inverted[token] = array('I')
+                postings.append(doc_id)
+
+                node = self._root
+                for char in token:
+                    child = node.children.get(char)
+                    if child is None:
+                        child = node.children[char] = _TrieNode()
+                    node = child
+                    # Tokens of one doc share prefixes - add the doc to each node once
+                    if not node.docs or node.docs[-1] != doc_id:
+                        node.docs.append(doc_id)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _prefix_postings(self, prefix: str) -> Optional[array]:
+        node = self._root
+        for char in prefix:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node.docs
+
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find schemes whose name/AMC tokens match every query term
+
+        Completed terms (followed by more input) match whole tokens and fall back
+        to prefix matching; the term being typed always matches as a prefix.
+        """
+        terms = tokenize(query)
+        if not terms or limit <= 0:
+            return []
+
+        last_is_complete = query[-1:].isspace()
+        matchers = []
+
+        for i, term in enumerate(terms):
+            is_prefix = i == len(terms) - 1 and not last_is_complete
+            postings = None if is_prefix else self._inverted.get(term)
+            if postings is None:
+                is_prefix = True
+                postings = self._prefix_postings(term)
+                if postings is None:
+                    return []
+            matchers.append((len(postings), term, is_prefix, postings))
+
+        # Drive from the most selective term, check the rest per candidate
+        matchers.sort(key=lambda m: m[0])
+        _, _, _, driver = matchers[0]
+        checks = [(term, is_prefix) for _, term, is_prefix, _ in matchers[1:]]
+
+        candidates = []
+        wanted = limit * CANDIDATE_FACTOR
+        for doc_id in driver:
+            tokens = self._doc_tokens[doc_id]
+            if all(
+                any(token.startswith(term) for token in tokens) if is_prefix else term in tokens
+                for term, is_prefix in checks
+            ):
+                candidates.append(doc_id)
+                if len(candidates) >= wanted:
+                    break
+
+        # Names starting with the query text go first; rank order is kept otherwise
+        query_text = ' '.join(terms)
+        candidates.sort(key=lambda doc_id: not self._names[doc_id].startswith(query_text))
+
+        return [dict(self._records[doc_id]) for doc_id in candidates[:limit]]
+
+
+# =======================
+# LOADING & REFRESH
+# =======================
+
+_index: Optional[SchemeSearchIndex] = None
+_refresh_task: Optional[asyncio.Task] = None
+_last_version_check = 0.0
+
+
+def get_scheme_index() -> Optional[SchemeSearchIndex]:
+    """Current index, or None while it has not been loaded yet"""
+    return _index
+
+
+def _fetch_all(client, table: str, columns: str, order_by: str, **filters) -> List[Dict[str, Any]]:
+    # Pages need a stable order on a unique key, or rows can be skipped or repeated
+    rows = []
+    start = 0
+    while True:
+        query = client.table(table).select(columns)
+        for column, value in filters.items():
+            query = query.eq(column, value)
+        page = query.order(order_by).range(start, start + SCHEME_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < SCHEME_PAGE_SIZE:
+            return rows
+        start += SCHEME_PAGE_SIZE
+
+
+def fetch_scheme_catalog_version(client) -> Optional[str]:
+    """Latest scheme_master.last_updated - changes whenever the scheme sync writes"""
+    result = client.table('scheme_master').select('last_updated').order('last_updated', desc=True).limit(1).execute()
+    return result.data[0]['last_updated'] if result.data else None
+
+
+def build_scheme_index(client) -> SchemeSearchIndex:
+    """Load active schemes plus mapping usage counts and build a fresh index (blocking)"""
+    started = time.perf_counter()
+    version = fetch_scheme_catalog_version(client)
+    schemes = _fetch_all(client, 'scheme_master', ', '.join(SEARCH_FIELDS), 'scheme_code', is_active=True)
+
+    popularity = {}
+    try:
+        for row in _fetch_all(client, 'scheme_mappings', 'scheme_code, usage_count', 'id'):
+            code = str(row.get('scheme_code'))
+            popularity[code] = popularity.get(code, 0) + (row.get('usage_count') or 0)
+    except Exception as e:
+        print(f"[Scheme Index] Popularity unavailable, ranking by plan type only: {str(e)}")
+
+    index = SchemeSearchIndex(schemes, popularity, version)
+    print(f"[Scheme Index] Built index over {len(index)} schemes in {time.perf_counter() - started:.2f}s")
+    return index
+
+
+async def refresh_scheme_index(client):
+    """Rebuild the index off the event loop and swap it in"""
+    global _index, _last_version_check
+
+    if not client:
+        return
+
+    try:
+        index = await asyncio.to_thread(build_scheme_index, client)
+        previous, _index = _index, index
+        _last_version_check = time.time()
+
+        # A newer catalog (e.g. synced by another process) also invalidates cached scheme details
+        if previous is not None and previous.version != index.version:
+            scheme_metadata_cache.clear()
+    except Exception as e:
+        print(f"[Scheme Index] Refresh failed: {str(e)}")
+
+
+def schedule_scheme_index_refresh(client):
+    """Start a background rebuild unless one is already running"""
+    global _refresh_task
+
+    if _refresh_task is not None and not _refresh_task.done():
+        return
+    _refresh_task = asyncio.get_running_loop().create_task(refresh_scheme_index(client))
+
+
+async def _check_version(client):
+    try:
+        version = await asyncio.to_thread(fetch_scheme_catalog_version, client)
+        if _index is None or version != _index.version:
+            print(f"[Scheme Index] scheme_master changed ({version}), rebuilding")
+            schedule_scheme_index_refresh(client)
+    except Exception as e:
+        print(f"[Scheme Index] Version check failed: {str(e)}")
+
+
+def maybe_check_scheme_index_version(client):
+    """Throttled background check for a newer scheme_master (picks up out-of-process syncs)"""
+    global _last_version_check
+
+    if not client or time.time() - _last_version_check < VERSION_CHECK_INTERVAL:
+        return
+    _last_version_check = time.time()
+    asyncio.get_running_loop().create_task(_check_version(client))
+
+
+# Export functions
+__all__ = [
+    'SchemeSearchIndex', 'get_scheme_index', 'build_scheme_index', 'refresh_scheme_index',
+    'schedule_scheme_index_refresh', 'maybe_check_scheme_index_version'
+]
@@ -0,0 +1,288 @@
+"""
+Tax Lot Engine
+FIFO lot matching and STCG/LTCG computation for mutual fund holdings,
+fed by transactions from the CAS transaction parser
+"""
+
+import numpy as np
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.utils.asset_classifier import detect_asset_class
+from .transaction_parser import CASTransaction, REDEMPTION, SWITCH_OUT
+
+# Units are matched as integers in 1/10000ths to avoid float drift in cumulative sums
+UNIT_SCALE = 10_000
+
+# Holding period (days) above which a gain is long-term, by asset class
+LTCG_THRESHOLD_DAYS = {
+    'Equity': 365,
+    'Hybrid': 365,
+    'Debt': 1095,
+    'Liquid': 1095,
+    'Gold': 1095,
+}
+DEFAULT_LTCG_THRESHOLD_DAYS = 365
+
+SELL_TYPES = (REDEMPTION, SWITCH_OUT)
+
+
+class LotBook:
+    """
+    FIFO lots for one folio + scheme, stored as parallel numpy arrays
+
+    Purchases become lots in date order. Because FIFO consumes lots strictly in
+    order, the k-th sale covers an interval [matched_before_k, matched_through_k)
+    on the cumulative-units axis, so matching is a binary search of that interval
+    against the cumulative lot units - no per-unit or per-lot loop.
+
+    A sale can only draw on lots bought on or before its date. Units sold beyond
+    those lots (held before the statement period) are reported as unmatched,
+    which makes the matched position a running clamp:
+        matched_through_k = min(matched_through_{k-1} + units_k, available_k)
+    solved in closed form as cum_sold_k + min(0, running min of available_j - cum_sold_j).
+    """
+
+    def __init__(self, folio_number: str, scheme_name: str, isin: Optional[str]):
+        self.folio_number = folio_number
+        self.scheme_name = scheme_name
+        self.isin = isin
+        self._buys: List[Tuple[date, float, float]] = []
+        self._sells: List[Tuple[date, float, float]] = []
+
+    def add(self, transaction: CASTransaction):
+        """Add a parsed transaction (sales are any unit outflow)"""
+        units = abs(transaction.units)
+        if units == 0:
+            return
+
+        price = transaction.amount / units if transaction.amount > 0 else transaction.nav
+        entry = (transaction.transaction_date, units, price)
+
+        if transaction.transaction_type in SELL_TYPES or transaction.units < 0:
+            self._sells.append(entry)
+        else:
+            self._buys.append(entry)
+
+    @staticmethod
+    def _arrays(entries: List[Tuple[date, float, float]]):
+        if not entries:
+            return (np.empty(0, dtype='datetime64[D]'), np.empty(0, dtype=np.int64), np.empty(0))
+        entries = sorted(entries, key=lambda e: e[0])
+        dates = np.array([e[0] for e in entries], dtype='datetime64[D]')
+        units = np.rint(np.array([e[1] for e in entries]) * UNIT_SCALE).astype(np.int64)
+        prices = np.array([e[2] for e in entries], dtype=float)
+        return dates, units, prices
+
+    def match(self) -> Dict[str, Any]:
+        """
+        Match sales against lots FIFO
+
+        Returns:
+            Dict of numpy arrays: realized matches (one row per lot slice consumed
+            by a sale), open lots, and units sold that no lot on or before the
+            sale date covered
+        """
+        buy_dates, buy_units, buy_prices = self._arrays(self._buys)
+        sell_dates, sell_units, sell_prices = self._arrays(self._sells)
+
+        cum_buy = np.cumsum(buy_units)
+        start_buy = cum_buy - buy_units
+
+        # Units bought on or before each sale date (same-day purchases count)
+        bought_by_sale = np.concatenate(([0], cum_buy))[np.searchsorted(buy_dates, sell_dates, side='right')]
+
+        # Matched position after each sale, and units sold so far that no earlier lot covered
+        cum_sell = np.cumsum(sell_units)
+        shortfall = np.minimum.accumulate(np.minimum(bought_by_sale - cum_sell, 0))
+        matched_through = cum_sell + shortfall
+        matched_before = np.concatenate(([0], matched_through[:-1])) if len(matched_through) else matched_through
+        total_matched = int(matched_through[-1]) if len(matched_through) else 0
+
+        # Lots overlapping each sale's interval: first lot ending after the start,
+        # last lot starting before the end
+        if len(sell_units) and len(buy_units):
+            first_lot = np.searchsorted(cum_buy, matched_before, side='right')
+            last_lot = np.minimum(np.searchsorted(cum_buy, matched_through, side='left'), len(cum_buy) - 1)
+            counts = np.maximum(last_lot - first_lot + 1, 0)
+
+            sale_idx = np.repeat(np.arange(len(sell_units)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            lot_idx = np.repeat(first_lot, counts) + offsets
+
+            overlap = (
+                np.minimum(cum_buy[lot_idx], matched_through[sale_idx])
+                - np.maximum(start_buy[lot_idx], matched_before[sale_idx])
+            )
+            keep = overlap > 0
+            sale_idx, lot_idx, overlap = sale_idx[keep], lot_idx[keep], overlap[keep]
+        else:
+            sale_idx = lot_idx = np.empty(0, dtype=np.int64)
+            overlap = np.empty(0, dtype=np.int64)
+
+        matched_units = overlap / UNIT_SCALE
+        realized = {
+            'sale_date': sell_dates[sale_idx],
+            'purchase_date': buy_dates[lot_idx],
+            'units': matched_units,
+            'cost': matched_units * buy_prices[lot_idx],
+            'proceeds': matched_units * sell_prices[sale_idx],
+        }
+
+        # Units left in each lot after all sales
+        remaining = np.clip(cum_buy - np.maximum(start_buy, total_matched), 0, buy_units) / UNIT_SCALE
+        open_mask = remaining > 0
+        open_lots = {
+            'purchase_date': buy_dates[open_mask],
+            'units': remaining[open_mask],
+            'cost': remaining[open_mask] * buy_prices[open_mask],
+        }
+
+        return {
+            'realized': realized,
+            'open_lots': open_lots,
+            'unmatched_units': -int(shortfall[-1]) / UNIT_SCALE if len(shortfall) else 0.0,
+        }
+
+
+def classify_terms(purchase_dates: np.ndarray, end_dates, threshold_days: int):
+    """
+    Vectorized holding-period classification
+
+    Returns:
+        (holding_days, is_long_term) arrays
+    """
+    holding_days = (np.asarray(end_dates, dtype='datetime64[D]') - purchase_dates).astype(np.int64)
+    return holding_days, holding_days > threshold_days
+
+
+def build_lot_books(transactions: Iterable[CASTransaction]) -> Dict[Tuple[str, str], LotBook]:
+    """Group a transaction stream into lot books keyed by (folio_number, scheme_name)"""
+    books = {}
+    for transaction in transactions:
+        key = (transaction.folio_number, transaction.scheme_name)
+        book = books.get(key)
+        if book is None:
+            book = books[key] = LotBook(transaction.folio_number, transaction.scheme_name, transaction.isin)
+        book.add(transaction)
+    return books
+
+
+def compute_capital_gains(
+    transactions: Iterable[CASTransaction],
+    current_navs: Optional[Dict[str, float]] = None,
+    as_of: Optional[date] = None,
+    asset_class_of: Optional[Callable[[str], str]] = None,
+    include_lots: bool = False
+) -> Dict[str, Any]:
+    """
+    Compute realized and unrealized STCG/LTCG for a whole portfolio
+
+    Args:
+        transactions: Parsed CAS transactions (any order)
+        current_navs: Current NAV by ISIN or scheme name, for unrealized gains.
+            Falls back to the last transaction NAV for the scheme.
+        as_of: Valuation date for unrealized gains (default today)
+        asset_class_of: Scheme name -> asset class, to pick the LTCG threshold
+            (default: detect_asset_class)
+        include_lots: Include per-lot realized matches and open lots in the output
+
+    Returns:
+        Portfolio totals plus per-scheme breakdown
+    """
+    if asset_class_of is None:
+        asset_class_of = detect_asset_class
+
+    transactions = list(transactions)
+    current_navs = current_navs or {}
+    as_of = as_of or date.today()
+
+    # Last seen NAV per scheme as the fallback valuation
+    last_navs = {}
+    for transaction in sorted(transactions, key=lambda t: t.transaction_date):
+        if transaction.nav > 0:
+            last_navs[(transaction.folio_number, transaction.scheme_name)] = transaction.nav
+
+    totals = {
+        'realized_stcg': 0.0,
+        'realized_ltcg': 0.0,
+        'unrealized_stcg': 0.0,
+        'unrealized_ltcg': 0.0,
+    }
+    schemes = []
+
+    for key, book in build_lot_books(transactions).items():
+        asset_class = asset_class_of(book.scheme_name)
+        threshold = LTCG_THRESHOLD_DAYS.get(asset_class, DEFAULT_LTCG_THRESHOLD_DAYS)
+        matched = book.match()
+
+        realized = matched['realized']
+        realized_gain = realized['proceeds'] - realized['cost']
+        realized_days, realized_long = classify_terms(realized['purchase_date'], realized['sale_date'], threshold)
+
+        open_lots = matched['open_lots']
+        nav = current_navs.get(book.isin) or current_navs.get(book.scheme_name) or last_navs.get(key, 0.0)
+        open_value = open_lots['units'] * nav
+        unrealized_gain = open_value - open_lots['cost']
+        open_days, open_long = classify_terms(open_lots['purchase_date'], np.datetime64(as_of, 'D'), threshold)
+
+        scheme_summary = {
+            'folio_number': book.folio_number,
+            'scheme_name': book.scheme_name,
+            'isin': book.isin,
+            'asset_class': asset_class,
+            'ltcg_threshold_days': threshold,
+            'realized_stcg': float(realized_gain[~realized_long].sum()),
+            'realized_ltcg': float(realized_gain[realized_long].sum()),
+            'unrealized_stcg': float(unrealized_gain[~open_long].sum()),
+            'unrealized_ltcg': float(unrealized_gain[open_long].sum()),
+            'open_units': float(open_lots['units'].sum()),
+            'open_cost': float(open_lots['cost'].sum()),
+            'current_nav': nav,
+            'unmatched_units': matched['unmatched_units'],
+        }
+
+        if include_lots:
+            scheme_summary['realized_lots'] = [
+                {
+                    'sale_date': str(sale_date),
+                    'purchase_date': str(purchase_date),
+                    'units': float(units),
+                    'cost': float(cost),
+                    'proceeds': float(proceeds),
+                    'holding_days': int(days),
+                    'term': 'LTCG' if is_long else 'STCG',
+                }
+                for sale_date, purchase_date, units, cost, proceeds, days, is_long in zip(
+                    realized['sale_date'], realized['purchase_date'], realized['units'],
+                    realized['cost'], realized['proceeds'], realized_days, realized_long
+                )
+            ]
+            scheme_summary['open_lots'] = [
+                {
+                    'purchase_date': str(purchase_date),
+                    'units': float(units),
+                    'cost': float(cost),
+                    'holding_days': int(days),
+                    'term': 'LTCG' if is_long else 'STCG',
+                }
+                for purchase_date, units, cost, days, is_long in zip(
+                    open_lots['purchase_date'], open_lots['units'], open_lots['cost'], open_days, open_long
+                )
+            ]
+
+        for field in totals:
+            totals[field] += scheme_summary[field]
+        schemes.append(scheme_summary)
+
+    return {
+        'as_of': as_of.isoformat(),
+        **totals,
+        'total_realized': totals['realized_stcg'] + totals['realized_ltcg'],
+        'total_unrealized': totals['unrealized_stcg'] + totals['unrealized_ltcg'],
+        'schemes': schemes,
+    }
+
+
+# Export functions
+__all__ = ['LotBook', 'build_lot_books', 'classify_terms', 'compute_capital_gains', 'LTCG_THRESHOLD_DAYS']
@@ -0,0 +1,224 @@
+"""
+CAS Transaction Parser
+Streams folio-level transactions (purchases, SIP instalments, redemptions, switches)
+out of CAMS consolidated account statements, one page at a time
+"""
+
+import pdfplumber
+import re
+from datetime import date, datetime
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Union
+
+from .parser import rewind_source
+
+# Transaction types
+PURCHASE = 'PURCHASE'
+SIP = 'SIP'
+REDEMPTION = 'REDEMPTION'
+SWITCH_IN = 'SWITCH_IN'
+SWITCH_OUT = 'SWITCH_OUT'
+DIVIDEND_REINVEST = 'DIVIDEND_REINVEST'
+
+TRANSACTION_TYPES = (PURCHASE, SIP, REDEMPTION, SWITCH_IN, SWITCH_OUT, DIVIDEND_REINVEST)
+
+# Rows per bulk insert
+TRANSACTION_BATCH_SIZE = 500
+
+
+class CASTransaction(NamedTuple):
+    """Single unit-bearing transaction from a CAS statement"""
+    folio_number: str
+    scheme_name: str
+    isin: Optional[str]
+    transaction_date: date
+    transaction_type: str
+    amount: float
+    units: float
+    nav: float
+    unit_balance: float
+    description: str
+
+    def to_row(self) -> Dict[str, Any]:
+        """Row dict for bulk insert (dates as ISO strings)"""
+        row = self._asdict()
+        row['transaction_date'] = self.transaction_date.isoformat()
+        return row
+
+
+# =======================
+# LINE PATTERNS
+# =======================
+
+_NUMBER = r'\(?-?[\d,]+\.\d+\)?'
+
+FOLIO_PATTERN = re.compile(r'Folio\s*No\s*[:.]?\s*([\d]+(?:\s*/\s*[\d]+)?)', re.IGNORECASE)
+ISIN_PATTERN = re.compile(r'ISIN\s*:\s*(INF[A-Z0-9]{9})', re.IGNORECASE)
+SCHEME_PREFIX_PATTERN = re.compile(r'^[A-Z0-9]+\s*-\s*')
+SCHEME_SUFFIX_PATTERN = re.compile(r'\s*-?\s*(?:ISIN\s*:|\(Advisor|Registrar\s*:).*$', re.IGNORECASE)
+
+# DD-Mon-YYYY <description> <amount> <units> <nav> <unit balance>
+TRANSACTION_PATTERN = re.compile(
+    rf'^(\d{{2}}-[A-Za-z]{{3}}-\d{{4}})\s+(.+?)\s+({_NUMBER})\s+({_NUMBER})\s+({_NUMBER})\s+({_NUMBER})\s*$'
+)
+
+
+def parse_amount(value: str) -> float:
+    """Parse a CAS number; parentheses mean negative"""
+    cleaned = value.replace(',', '').strip()
+    if cleaned.startswith('(') and cleaned.endswith(')'):
+        cleaned = '-' + cleaned[1:-1]
+    return float(cleaned)
+
+
+def classify_transaction(description: str, units: float) -> str:
+    """
+    Map a CAS transaction description to a transaction type
+
+    Switches and STPs are split into in/out by the sign of the units;
+    any other unit outflow (redemptions, SWPs) is a redemption.
+    """
+    desc = description.lower()
+
+    if 'switch' in desc or re.search(r'\bstp\b', desc) or 'systematic transfer' in desc:
+        return SWITCH_IN if units > 0 else SWITCH_OUT
+    if units < 0:
+        return REDEMPTION
+    if 'reinvest' in desc:
+        return DIVIDEND_REINVEST
+    if re.search(r'\bsip\b', desc) or 'systematic investment' in desc:
+        return SIP
+    return PURCHASE
+
+
+# =======================
+# LINE PARSER
+# =======================
+
+class StatementState:
+    """Folio and scheme context, carried across page boundaries"""
+
+    def __init__(self):
+        self.folio_number = None
+        self.scheme_name = None
+        self.isin = None
+
+
+def parse_transaction_lines(lines: Iterable[str], state: StatementState) -> Iterator[CASTransaction]:
+    """
+    Parse statement text lines into transactions
+
+    Args:
+        lines: Text lines (one page, or any contiguous slice of the statement)
+        state: Folio/scheme context, updated in place
+
+    Yields:
+        CASTransaction records
+    """
+    for raw_line in lines:
+        line = raw_line.strip()
+        if not line:
+            continue
+
+        match = TRANSACTION_PATTERN.match(line)
+        if match:
+            if not state.scheme_name:
+                continue
+
+            txn_date, description, amount, units, nav, balance = match.groups()
+            try:
+                units_value = parse_amount(units)
+                transaction = CASTransaction(
+                    folio_number=state.folio_number or 'UNKNOWN',
+                    scheme_name=state.scheme_name,
+                    isin=state.isin,
+                    transaction_date=datetime.strptime(txn_date, '%d-%b-%Y').date(),
+                    transaction_type=classify_transaction(description, units_value),
+                    amount=abs(parse_amount(amount)),
+                    units=units_value,
+                    nav=parse_amount(nav),
+                    unit_balance=parse_amount(balance),
+                    description=description.strip()
+                )
+            except ValueError:
+                continue
+
+            yield transaction
+            continue
+
+        folio_match = FOLIO_PATTERN.search(line)
+        if folio_match:
+            state.folio_number = re.sub(r'\s+', '', folio_match.group(1))
+            state.scheme_name = None
+            state.isin = None
+            continue
+
+        isin_match = ISIN_PATTERN.search(line)
+        if isin_match:
+            state.isin = isin_match.group(1).upper()
+            scheme_name = SCHEME_SUFFIX_PATTERN.sub('', line)
+            scheme_name = SCHEME_PREFIX_PATTERN.sub('', scheme_name).strip(' -')
+            if scheme_name:
+                state.scheme_name = scheme_name
+
+
+# =======================
+# STATEMENT PARSER
+# =======================
+
+def iter_cas_transactions(file_path: Union[str, BinaryIO], password: str = None) -> Iterator[CASTransaction]:
+    """
+    Stream transactions out of a CAMS CAS PDF
+
+    Pages are read one at a time and their cached layout objects are released
+    before moving on, so memory stays bounded for multi-year statements.
+
+    Args:
+        file_path: Path to PDF file or binary file handle
+        password: Password for protected PDFs (optional)
+
+    Yields:
+        CASTransaction records in statement order
+    """
+    state = StatementState()
+
+    with pdfplumber.open(rewind_source(file_path), password=password) as pdf:
+        for page in pdf.pages:
+            text = page.extract_text() or ''
+            yield from parse_transaction_lines(text.splitlines(), state)
+            page.flush_cache()
+
+
+def transaction_batches(
+    transactions: Iterable[CASTransaction],
+    batch_size: int = TRANSACTION_BATCH_SIZE,
+    **extra_fields
+) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Group a transaction stream into row batches for bulk insert
+
+    Args:
+        transactions: Transaction stream (e.g. from iter_cas_transactions)
+        batch_size: Rows per batch
+        extra_fields: Constant columns added to every row (e.g. user_id)
+
+    Yields:
+        Lists of row dicts
+    """
+    batch = []
+    for transaction in transactions:
+        row = transaction.to_row()
+        row.update(extra_fields)
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+# Export functions
+__all__ = [
+    'CASTransaction', 'iter_cas_transactions', 'parse_transaction_lines',
+    'transaction_batches', 'StatementState', 'TRANSACTION_TYPES'
+]
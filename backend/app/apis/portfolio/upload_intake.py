@@ -0,0 +1,99 @@
+"""
+Upload Intake
+Streams uploaded CAMS statements into spooled temp files with size limits and content hashing
+"""
+
+import hashlib
+import tempfile
+from typing import BinaryIO
+from fastapi import UploadFile
+
+# Upload limits
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10MB
+READ_CHUNK_SIZE = 256 * 1024  # 256KB per read
+SPOOL_MEMORY_LIMIT = 1024 * 1024  # Roll over to disk above 1MB
+
+
+class UploadTooLargeError(Exception):
+    """Raised as soon as a streamed upload exceeds the allowed size"""
+    pass
+
+
+class SpooledUpload:
+    """
+    Spooled copy of an uploaded file
+
+    Attributes:
+        handle: Binary file handle positioned at the start of the content
+        size: Number of bytes received
+        sha256: Hex digest of the content
+    """
+
+    def __init__(self, handle: BinaryIO, size: int, sha256: str):
+        self.handle = handle
+        self.size = size
+        self.sha256 = sha256
+
+    def close(self):
+        """Close the handle - spooled files are removed from disk on close"""
+        if not self.handle.closed:
+            self.handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+async def spool_upload(
+    upload: UploadFile,
+    max_size: int = MAX_UPLOAD_SIZE,
+    chunk_size: int = READ_CHUNK_SIZE
+) -> SpooledUpload:
+    """
+    Copy an upload in chunks into a spooled temp file
+
+    The content is hashed while streaming and the size limit is checked on
+    every chunk. Starlette has already spooled the multipart body by the time
+    this runs, so this check only guards the file part; oversized requests are
+    refused earlier by RequestSizeLimitMiddleware.
+
+    Args:
+        upload: Incoming FastAPI upload
+        max_size: Maximum allowed size in bytes
+        chunk_size: Bytes to read per chunk
+
+    Returns:
+        SpooledUpload rewound to the start
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_size
+    """
+    spooled = tempfile.SpooledTemporaryFile(max_size=SPOOL_MEMORY_LIMIT, mode='w+b')
+    digest = hashlib.sha256()
+    size = 0
+
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+
+            size += len(chunk)
+            if size > max_size:
+                raise UploadTooLargeError(f"Upload exceeds {max_size} bytes")
+
+            digest.update(chunk)
+            spooled.write(chunk)
+
+        spooled.seek(0)
+        return SpooledUpload(spooled, size, digest.hexdigest())
+
+    except BaseException:
+        spooled.close()
+        raise
+
+
+# Export functions
+__all__ = ['spool_upload', 'SpooledUpload', 'UploadTooLargeError', 'MAX_UPLOAD_SIZE']
@@ -0,0 +1,227 @@
+"""
+Valuation Stream
+Push channel for live portfolio valuation: clients subscribe to their own
+holdings and receive only the holdings that changed plus new totals whenever
+the NAV job or an upload rewrites them (in this worker, or in another one via
+the invalidation bus)
+"""
+
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from app.utils.invalidation_bus import invalidation_bus, parse_tag
+
+# Holding fields that make up a client's valuation view
+VALUATION_FIELDS = (
+    'id', 'scheme_name', 'scheme_code', 'folio_number', 'unit_balance', 'current_nav', 'nav_date',
+    'cost_value', 'market_value', 'absolute_profit', 'absolute_return_percentage', 'goal_id'
+)
+
+# Changes for a user within this window are coalesced into one push
+PUBLISH_DEBOUNCE = 0.25  # seconds
+
+# Messages buffered per connection; a slower client is resynced with a snapshot
+SUBSCRIBER_QUEUE_SIZE = 16
+
+# Idle keepalive for proxies that drop silent connections
+KEEPALIVE_INTERVAL = 25  # seconds
+
+
+def valuation_view(holding: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: holding.get(field) for field in VALUATION_FIELDS}
+
+
+class Subscriber:
+    """One connection's outgoing message buffer"""
+
+    __slots__ = ('queue', 'needs_snapshot', 'getter')
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.needs_snapshot = False
+        # Pending queue read, kept across keepalive timeouts instead of being cancelled
+        self.getter: Optional[asyncio.Future] = None
+
+    def close(self):
+        if self.getter is not None:
+            self.getter.cancel()
+            self.getter = None
+
+    def offer(self, message: str):
+        """Queue an encoded message without blocking; overflow means resync"""
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.needs_snapshot = True
+            self.queue.put_nowait(None)  # wake the sender
+
+
+class _UserChannel:
+    __slots__ = ('subscribers', 'holdings', 'summary')
+
+    def __init__(self):
+        self.subscribers: Set[Subscriber] = set()
+        self.holdings: Dict[str, Dict[str, Any]] = {}  # last published view per holding id
+        self.summary: Optional[Dict[str, Any]] = None
+
+
+class ValuationHub:
+    """
+    Per-user fan-out of valuation deltas
+
+    The delta for a user is computed and JSON-encoded once, then handed to each
+    of that user's connections as the same string; users without connections
+    cost nothing. Publishes may come from any thread.
+    """
+
+    def __init__(self):
+        self._channels: Dict[str, _UserChannel] = {}
+        self._pending: Set[str] = set()
+        self._flush_task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loader: Optional[Callable[[str], Dict[str, Any]]] = None
+
+    def set_loader(self, loader: Callable[[str], Dict[str, Any]]):
+        """Blocking user_id -> {'holdings': [...], 'summary': {...}} used to read fresh valuations"""
+        self._loader = loader
+
+    def connection_count(self) -> int:
+        return sum(len(channel.subscribers) for channel in self._channels.values())
+
+    async def _load(self, user_id: str) -> Dict[str, Any]:
+        return await asyncio.to_thread(self._loader, user_id)
+
+    def snapshot_message(self, user_id: str) -> str:
+        channel = self._channels[user_id]
+        return json.dumps({
+            'type': 'snapshot',
+            'holdings': list(channel.holdings.values()),
+            'summary': channel.summary,
+        }, default=str)
+
+    async def subscribe(self, user_id: str) -> Subscriber:
+        """Register a connection; its first message is the current snapshot"""
+        self._loop = asyncio.get_running_loop()
+        subscriber = Subscriber()
+        channel = self._channels.get(user_id)
+
+        if channel is None:
+            portfolio = await self._load(user_id)
+            # Another connection for the same user may have subscribed meanwhile
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = _UserChannel()
+                channel.holdings = {str(h['id']): valuation_view(h) for h in portfolio['holdings']}
+                channel.summary = portfolio['summary']
+
+        channel.subscribers.add(subscriber)
+        subscriber.offer(self.snapshot_message(user_id))
+        return subscriber
+
+    def unsubscribe(self, user_id: str, subscriber: Subscriber):
+        subscriber.close()
+        channel = self._channels.get(user_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(subscriber)
+        if not channel.subscribers:
+            del self._channels[user_id]
+
+    def publish(self, user_id: str):
+        """Mark a user's valuation as changed (safe to call from any thread)"""
+        if not user_id or str(user_id) not in self._channels or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._schedule(str(user_id))
+        else:
+            self._loop.call_soon_threadsafe(self._schedule, str(user_id))
+
+    def _schedule(self, user_id: str):
+        self._pending.add(user_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = self._loop.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(PUBLISH_DEBOUNCE)
+        while self._pending:
+            users, self._pending = self._pending, set()
+            users = [user_id for user_id in users if user_id in self._channels]
+            results = await asyncio.gather(*(self._load(user_id) for user_id in users), return_exceptions=True)
+            for user_id, portfolio in zip(users, results):
+                if isinstance(portfolio, Exception):
+                    print(f"[Valuation Stream] Could not load portfolio for {user_id}: {str(portfolio)}")
+                    continue
+                self._push_delta(user_id, portfolio)
+
+    def _push_delta(self, user_id: str, portfolio: Dict[str, Any]):
+        channel = self._channels.get(user_id)
+        if channel is None:
+            return
+
+        holdings = {str(h['id']): valuation_view(h) for h in portfolio['holdings']}
+        changed: List[Dict[str, Any]] = [view for holding_id, view in holdings.items() if channel.holdings.get(holding_id) != view]
+        removed = [holding_id for holding_id in channel.holdings if holding_id not in holdings]
+
+        channel.holdings = holdings
+        if not changed and not removed and portfolio['summary'] == channel.summary:
+            return
+        channel.summary = portfolio['summary']
+
+        message = json.dumps({
+            'type': 'delta',
+            'changed': changed,
+            'removed': removed,
+            'summary': channel.summary,
+        }, default=str)
+        for subscriber in channel.subscribers:
+            subscriber.offer(message)
+
+    async def next_message(self, user_id: str, subscriber: Subscriber) -> Optional[str]:
+        """
+        Next encoded message for a connection, or None after KEEPALIVE_INTERVAL idle
+
+        The queue read is not cancelled on timeout (a cancelled get can drop a
+        message that arrives as the timeout fires); the next call resumes it.
+        """
+        if subscriber.getter is None:
+            subscriber.getter = asyncio.ensure_future(subscriber.queue.get())
+        done, _ = await asyncio.wait({subscriber.getter}, timeout=KEEPALIVE_INTERVAL)
+        if not done:
+            return None
+        message = subscriber.getter.result()
+        subscriber.getter = None
+        if subscriber.needs_snapshot and user_id in self._channels:
+            subscriber.needs_snapshot = False
+            return self.snapshot_message(user_id)
+        return message
+
+
+valuation_hub = ValuationHub()
+
+
+def notify_valuation_changed(user_id: str):
+    """Push the latest valuation to a user's live connections, if any"""
+    valuation_hub.publish(user_id)
+
+
+def _on_remote_invalidation(tags):
+    # Another worker changed these users' rows (NAV job, uploads); users without
+    # connections here are skipped by publish
+    for tag in tags:
+        kind, value = parse_tag(tag)
+        if kind == 'user':
+            valuation_hub.publish(value)
+
+
+invalidation_bus.subscribe(_on_remote_invalidation)
+
+
+# Export functions
+__all__ = ['valuation_hub', 'notify_valuation_changed', 'ValuationHub']
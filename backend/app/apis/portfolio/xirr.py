@@ -0,0 +1,392 @@
+"""
+XIRR Engine
+Annualized money-weighted returns from dated cash flows, solved for many
+holdings at once: a vectorized Newton-Raphson pass over a padded
+(cash flow sets x flows) matrix, with a vectorized bisection fallback for
+rows Newton cannot settle
+"""
+
+import numpy as np
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .transaction_parser import DIVIDEND_REINVEST
+
+CashFlow = Tuple[date, float]
+
+DAYS_PER_YEAR = 365.0
+
+# Annualizing returns over shorter spans gives meaningless rates
+MIN_XIRR_DAYS = 30
+
+NEWTON_MAX_ITERATIONS = 50
+NEWTON_TOLERANCE = 1e-9  # relative to the largest cash flow of the set
+INITIAL_GUESS = 0.1
+
+# Bracketing fallback: rates scanned for a sign change, then bisected
+BRACKET_GRID = np.concatenate([
+    np.linspace(-0.99, -0.1, 18), np.linspace(-0.08, 1.0, 55), np.linspace(1.25, 10.0, 36)
+])
+BISECTION_ITERATIONS = 100
+
+# Reinvested dividends buy units with money that never left the investor
+INTERNAL_TRANSACTION_TYPES = (DIVIDEND_REINVEST,)
+
+# Units left before a statement's first transaction below this are rounding noise
+OPENING_UNITS_TOLERANCE = 0.001
+
+# Cash flow sources
+SOURCE_TRANSACTIONS = 'transactions'
+SOURCE_TRANSACTIONS_WITH_OPENING = 'transactions_with_opening_balance'
+SOURCE_SIP_ESTIMATE = 'sip_estimate'
+SOURCE_LUMPSUM_ESTIMATE = 'lumpsum_estimate'
+
+
+# =======================
+# SOLVER
+# =======================
+
+def _pad_cash_flows(cash_flow_sets: Sequence[Sequence[CashFlow]]):
+    """Padded amount and year-offset matrices (offsets from each set's first flow)"""
+    width = max((len(flows) for flows in cash_flow_sets), default=0)
+    amounts = np.zeros((len(cash_flow_sets), max(width, 1)))
+    years = np.zeros_like(amounts)
+
+    for row, flows in enumerate(cash_flow_sets):
+        if not flows:
+            continue
+        ordinals = np.array([flow_date.toordinal() for flow_date, _ in flows], dtype=float)
+        amounts[row, :len(flows)] = [amount for _, amount in flows]
+        years[row, :len(flows)] = (ordinals - ordinals.min()) / DAYS_PER_YEAR
+
+    return amounts, years
+
+
+def _npv(amounts: np.ndarray, years: np.ndarray, rates: np.ndarray) -> np.ndarray:
+    """NPV of each row at its rate (padding contributes zero)"""
+    return (amounts * np.power(1.0 + rates[:, None], -years)).sum(axis=1)
+
+
+def _newton(amounts: np.ndarray, years: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """Vectorized Newton-Raphson; rows that do not converge come back as NaN"""
+    rates = np.full(len(amounts), INITIAL_GUESS)
+    converged = np.zeros(len(amounts), dtype=bool)
+    active = np.ones(len(amounts), dtype=bool)
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for _ in range(NEWTON_MAX_ITERATIONS):
+            if not active.any():
+                break
+
+            a, t, r = amounts[active], years[active], rates[active]
+            discount = np.power(1.0 + r[:, None], -t)
+            npv = (a * discount).sum(axis=1)
+            derivative = (-t * a * discount / (1.0 + r[:, None])).sum(axis=1)
+            step = npv / derivative
+
+            done = (np.abs(npv) <= NEWTON_TOLERANCE * scale[active]) | (np.abs(step) < 1e-12)
+            # Rates at or below -100% are meaningless; move halfway towards -1 instead
+            new_rates = r - step
+            new_rates = np.where(new_rates <= -1.0, (r - 1.0) / 2.0, new_rates)
+
+            rows = np.flatnonzero(active)
+            rates[rows] = np.where(done, r, new_rates)
+            converged[rows[done]] = True
+
+            # Finished rows, and rows whose iterates blew up, stop iterating
+            active[rows[done | ~np.isfinite(new_rates)]] = False
+
+    rates[~converged] = np.nan
+    return rates
+
+
+def _bisect(amounts: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Vectorized bisection inside the first sign change of NPV over BRACKET_GRID"""
+    count = len(amounts)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        grid_npv = np.stack([_npv(amounts, years, np.full(count, rate)) for rate in BRACKET_GRID], axis=1)
+
+    sign_change = np.signbit(grid_npv[:, :-1]) != np.signbit(grid_npv[:, 1:])
+    sign_change &= np.isfinite(grid_npv[:, :-1]) & np.isfinite(grid_npv[:, 1:])
+    has_bracket = sign_change.any(axis=1)
+    first = sign_change.argmax(axis=1)
+
+    low = BRACKET_GRID[first].astype(float)
+    high = BRACKET_GRID[np.minimum(first + 1, len(BRACKET_GRID) - 1)].astype(float)
+    low_npv = grid_npv[np.arange(count), first]
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for _ in range(BISECTION_ITERATIONS):
+            mid = (low + high) / 2.0
+            mid_npv = _npv(amounts, years, mid)
+            same_side = np.signbit(mid_npv) == np.signbit(low_npv)
+            low = np.where(same_side, mid, low)
+            low_npv = np.where(same_side, mid_npv, low_npv)
+            high = np.where(same_side, high, mid)
+
+    return np.where(has_bracket, (low + high) / 2.0, np.nan)
+
+
+def xirr_batch(cash_flow_sets: Sequence[Sequence[CashFlow]]) -> List[Optional[float]]:
+    """
+    Solve XIRR for many cash flow sets in one call
+
+    Args:
+        cash_flow_sets: One list of (date, amount) per holding/goal/portfolio.
+            Investments are negative, redemptions and the current value positive.
+
+    Returns:
+        Annualized rate per set as a fraction (0.12 = 12%), or None when the set
+        has no solution (no investment, no inflow, or spans under MIN_XIRR_DAYS)
+    """
+    if not cash_flow_sets:
+        return []
+
+    amounts, years = _pad_cash_flows(cash_flow_sets)
+    solvable = (
+        (amounts < 0).any(axis=1)
+        & (amounts > 0).any(axis=1)
+        & (years.max(axis=1) >= MIN_XIRR_DAYS / DAYS_PER_YEAR)
+    )
+    scale = np.maximum(np.abs(amounts).max(axis=1), 1.0)
+
+    rates = np.full(len(amounts), np.nan)
+    if solvable.any():
+        rates[solvable] = _newton(amounts[solvable], years[solvable], scale[solvable])
+
+        retry = solvable & np.isnan(rates)
+        if retry.any():
+            rates[retry] = _bisect(amounts[retry], years[retry])
+
+    return [float(rate) if np.isfinite(rate) else None for rate in rates]
+
+
+def xirr(cash_flows: Sequence[CashFlow]) -> Optional[float]:
+    """XIRR of a single cash flow set"""
+    return xirr_batch([cash_flows])[0]
+
+
+# =======================
+# CASH FLOW BUILDERS
+# =======================
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).date()
+    except ValueError:
+        return None
+
+
+def normalize_folio(folio_number: Any) -> str:
+    """Folio without the CAS check-digit suffix ('12345678 / 0' -> '12345678')"""
+    return str(folio_number or '').split('/')[0].strip()
+
+
+def transaction_cash_flows(transactions: Iterable[Dict[str, Any]]) -> List[CashFlow]:
+    """
+    Purchases as outflows, redemptions as inflows (units sign gives the direction);
+    dividend reinvestments are skipped - their units are already in the market value
+    """
+    flows = []
+    for transaction in transactions:
+        if transaction.get('transaction_type') in INTERNAL_TRANSACTION_TYPES:
+            continue
+        flow_date = _as_date(transaction.get('transaction_date'))
+        amount = abs(float(transaction.get('amount') or 0))
+        if flow_date is None or amount == 0:
+            continue
+        units = float(transaction.get('units') or 0)
+        flows.append((flow_date, amount if units < 0 else -amount))
+    return flows
+
+
+def opening_balance_flow(transactions: List[Dict[str, Any]]) -> Optional[CashFlow]:
+    """
+    Outflow for units held before the first transaction of a statement window
+
+    CAS statements for a date range start from an opening balance; those units
+    are valued at the first transaction's NAV on its date, as if bought then.
+    Returns None when the history starts from zero units.
+    """
+    dated = [t for t in transactions if _as_date(t.get('transaction_date')) is not None]
+    if not dated:
+        return None
+    first_date = min(_as_date(t['transaction_date']) for t in dated)
+    # Same-day transactions: the smallest balance before any of them is the opening balance
+    opening_units, nav = min(
+        (float(t.get('unit_balance') or 0) - float(t.get('units') or 0), float(t.get('nav') or 0))
+        for t in dated if _as_date(t['transaction_date']) == first_date
+    )
+    if opening_units <= OPENING_UNITS_TOLERANCE or nav <= 0:
+        return None
+    return first_date, -opening_units * nav
+
+
+def estimated_cash_flows(holding: Dict[str, Any], as_of: date) -> Tuple[List[CashFlow], str]:
+    """
+    Cash flows for a holding without transaction history
+
+    With a monthly SIP, the cost value is spread over monthly instalments ending
+    last month; otherwise it is a single investment on the date the holding was added.
+    """
+    cost_value = float(holding.get('cost_value') or 0)
+    monthly_sip = float(holding.get('monthly_sip_amount') or 0)
+    if cost_value <= 0:
+        return [], SOURCE_LUMPSUM_ESTIMATE
+
+    if monthly_sip > 0:
+        instalments = max(int(round(cost_value / monthly_sip)), 1)
+        amount = cost_value / instalments
+        flows = []
+        for months_back in range(instalments, 0, -1):
+            month_index = as_of.year * 12 + as_of.month - 1 - months_back
+            flow_date = date(month_index // 12, month_index % 12 + 1, min(as_of.day, 28))
+            flows.append((flow_date, -amount))
+        return flows, SOURCE_SIP_ESTIMATE
+
+    start = _as_date(holding.get('created_at')) or as_of
+    return [(start, -cost_value)], SOURCE_LUMPSUM_ESTIMATE
+
+
+def holding_cash_flows(
+    holding: Dict[str, Any],
+    transactions: Optional[List[Dict[str, Any]]],
+    as_of: date
+) -> Tuple[List[CashFlow], str]:
+    """
+    Full cash flow set for a holding: history (actual or estimated) plus the
+    current market value as a terminal inflow
+
+    Returns:
+        (cash flows, source)
+    """
+    flows = transaction_cash_flows(transactions or [])
+    source = SOURCE_TRANSACTIONS
+    if flows:
+        opening = opening_balance_flow(transactions)
+        if opening is not None:
+            flows.insert(0, opening)
+            source = SOURCE_TRANSACTIONS_WITH_OPENING
+    else:
+        flows, source = estimated_cash_flows(holding, as_of)
+
+    valuation_date = _as_date(holding.get('nav_date')) or as_of
+    market_value = float(holding.get('market_value') or 0)
+    if market_value > 0:
+        flows.append((max(valuation_date, max((d for d, _ in flows), default=valuation_date)), market_value))
+
+    return flows, source
+
+
+def group_transactions_by_holding(
+    holdings: List[Dict[str, Any]],
+    transactions: List[Dict[str, Any]]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Assign stored CAS transactions to holdings: by folio + ISIN, then by folio + scheme name
+
+    Returns:
+        holding id -> transactions
+    """
+    by_isin = {}
+    by_name = {}
+    for holding in holdings:
+        folio = normalize_folio(holding.get('folio_number'))
+        if holding.get('isin'):
+            by_isin[(folio, str(holding['isin']).upper())] = holding['id']
+        by_name[(folio, str(holding.get('scheme_name') or '').lower())] = holding['id']
+
+    grouped: Dict[str, List[Dict[str, Any]]] = {}
+    for transaction in transactions:
+        folio = normalize_folio(transaction.get('folio_number'))
+        holding_id = by_isin.get((folio, str(transaction.get('isin') or '').upper())) \
+            or by_name.get((folio, str(transaction.get('scheme_name') or '').lower()))
+        if holding_id:
+            grouped.setdefault(holding_id, []).append(transaction)
+
+    return grouped
+
+
+def portfolio_xirr(
+    holdings: List[Dict[str, Any]],
+    transactions: List[Dict[str, Any]],
+    as_of: Optional[date] = None
+) -> Dict[str, Any]:
+    """
+    Per-holding, per-goal and whole-portfolio XIRR in one batched solve
+
+    Goal and portfolio rates use the union of their holdings' cash flows
+    (not an average of holding rates).
+
+    Returns:
+        {'portfolio': {...}, 'holdings': [...], 'goals': [...]} with rates in percent
+    """
+    as_of = as_of or date.today()
+    transactions_by_holding = group_transactions_by_holding(holdings, transactions)
+
+    holding_flows = []
+    sources = []
+    for holding in holdings:
+        flows, source = holding_cash_flows(holding, transactions_by_holding.get(holding['id']), as_of)
+        holding_flows.append(flows)
+        sources.append(source)
+
+    goal_ids = []
+    goal_flows: Dict[str, List[CashFlow]] = {}
+    for holding, flows in zip(holdings, holding_flows):
+        goal_id = holding.get('goal_id')
+        if goal_id:
+            if goal_id not in goal_flows:
+                goal_ids.append(goal_id)
+                goal_flows[goal_id] = []
+            goal_flows[goal_id].extend(flows)
+
+    all_flows = [flow for flows in holding_flows for flow in flows]
+    rates = xirr_batch(holding_flows + [goal_flows[g] for g in goal_ids] + [all_flows])
+
+    def as_percent(rate: Optional[float]) -> Optional[float]:
+        return round(rate * 100, 2) if rate is not None else None
+
+    holding_results = [
+        {
+            'holding_id': holding['id'],
+            'scheme_name': holding.get('scheme_name'),
+            'folio_number': holding.get('folio_number'),
+            'goal_id': holding.get('goal_id'),
+            'xirr_percentage': as_percent(rate),
+            'absolute_return_percentage': holding.get('absolute_return_percentage'),
+            'cash_flow_source': source,
+            'cash_flow_count': len(flows),
+        }
+        for holding, flows, source, rate in zip(holdings, holding_flows, sources, rates)
+    ]
+
+    goal_rates = rates[len(holdings):len(holdings) + len(goal_ids)]
+    goal_results = [
+        {'goal_id': goal_id, 'xirr_percentage': as_percent(rate), 'cash_flow_count': len(goal_flows[goal_id])}
+        for goal_id, rate in zip(goal_ids, goal_rates)
+    ]
+
+    return {
+        'as_of': as_of.isoformat(),
+        'portfolio': {
+            'xirr_percentage': as_percent(rates[-1]),
+            'holdings_count': len(holdings),
+            'estimated_holdings': sum(1 for source in sources if source in (SOURCE_SIP_ESTIMATE, SOURCE_LUMPSUM_ESTIMATE)),
+        },
+        'holdings': holding_results,
+        'goals': goal_results,
+    }
+
+
+# Export functions
+__all__ = [
+    'xirr', 'xirr_batch', 'holding_cash_flows', 'transaction_cash_flows', 'opening_balance_flow',
+    'group_transactions_by_holding', 'portfolio_xirr'
+]
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime, date, timedelta
+import asyncio
 import os
-from supabase import create_client
+import numpy as np
+from app.utils.db import db, get_supabase, fetch_paged
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
+from .snapshot_stage import SNAPSHOT_CONFLICT_KEY
+from .details_codec import attach_holdings_details, encode_replacement_details
+from .downsampling import downsample_indices, METHODS, LTTB
 
 router = APIRouter(prefix="/routes")
 
@@ -16,7 +21,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Portfolio Snapshots - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Portfolio Snapshots - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Portfolio snapshots operations will fail.")
 elif supabase:
@@ -45,6 +50,23 @@ class SnapshotResponse(BaseModel):
     created_at: str
 
 
+# Columns returned for weekly/monthly chart points (no holdings_details)
+ROLLUP_COLUMNS = "snapshot_date, period_start, total_investment, current_value, total_profit, overall_return, holdings_count"
+
+
+async def fetch_snapshot_rollups(user_id: str, period_type: str, cutoff_date: str) -> List[Dict[str, Any]]:
+    """Last snapshot of each week or month since cutoff_date, newest first"""
+    response = await db.table("portfolio_snapshot_rollups")\
+        .select(ROLLUP_COLUMNS)\
+        .eq("user_id", user_id)\
+        .eq("period_type", period_type)\
+        .gte("snapshot_date", cutoff_date)\
+        .order("snapshot_date", desc=True)\
+        .execute()
+
+    return response.data or []
+
+
 @router.post("/portfolio-snapshots")
 async def save_portfolio_snapshot(
     snapshot: PortfolioSnapshot,
@@ -53,6 +75,9 @@ async def save_portfolio_snapshot(
     """
     Save or update a daily portfolio snapshot
     Uses UPSERT to avoid duplicates (one snapshot per user per day)
+
+    The nightly NAV job writes every user's snapshot; this endpoint only
+    refreshes the current day on demand.
     """
     # SECURITY: Verify user can only save their own snapshots
     snapshot.user_id = sanitize_user_id(snapshot.user_id)
@@ -75,29 +100,32 @@ async def save_portfolio_snapshot(
             "updated_at": datetime.utcnow().isoformat()
         }
 
-        # Check if snapshot already exists for today
-        existing = supabase.table("portfolio_daily_snapshots")\
-            .select("*")\
-            .eq("user_id", snapshot.user_id)\
-            .eq("snapshot_date", snapshot.snapshot_date)\
-            .execute()
-
-        if existing.data and len(existing.data) > 0:
-            # Update existing snapshot
-            response = supabase.table("portfolio_daily_snapshots")\
-                .update(snapshot_data)\
-                .eq("user_id", snapshot.user_id)\
-                .eq("snapshot_date", snapshot.snapshot_date)\
-                .execute()
-
-            print(f"[OK] Updated portfolio snapshot for user {snapshot.user_id} on {snapshot.snapshot_date}")
+        # Keep the details written by the nightly snapshot stage unless the client sends its own;
+        # sent details are stored encoded, replacing the stage's blob (reads prefer the blob)
+        rebased_rows = []
+        if snapshot.holdings_details is None:
+            snapshot_data.pop("holdings_details")
         else:
-            # Insert new snapshot
-            response = supabase.table("portfolio_daily_snapshots")\
-                .insert(snapshot_data)\
-                .execute()
+            encoded, rebased_rows = await asyncio.to_thread(
+                encode_replacement_details, supabase, snapshot.user_id,
+                date.fromisoformat(snapshot.snapshot_date), snapshot.holdings_details
+            )
+            snapshot_data.update(encoded)
+            snapshot_data["holdings_details"] = None
+
+        # Later deltas re-encoded against a replaced keyframe go in the same statement,
+        # with the same columns (PostgREST bulk upserts need uniform keys)
+        rows = [snapshot_data] + [
+            {**{column: row.get(column) for column in snapshot_data}, "updated_at": snapshot_data["updated_at"]}
+            for row in rebased_rows
+        ]
+
+        # Single upsert on the (user_id, snapshot_date) unique key
+        response = await db.table("portfolio_daily_snapshots")\
+            .upsert(rows, on_conflict=SNAPSHOT_CONFLICT_KEY)\
+            .execute()
 
-            print(f"[OK] Created portfolio snapshot for user {snapshot.user_id} on {snapshot.snapshot_date}")
+        print(f"[OK] Saved portfolio snapshot for user {snapshot.user_id} on {snapshot.snapshot_date}")
 
         return {
             "success": True,
@@ -137,7 +165,7 @@ async def get_portfolio_snapshots(
 
     try:
         # Build query
-        query = supabase.table("portfolio_daily_snapshots")\
+        query = db.table("portfolio_daily_snapshots")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("snapshot_date", desc=True)
@@ -149,13 +177,14 @@ async def get_portfolio_snapshots(
             cutoff_date = (date.today() - timedelta(days=days)).isoformat()
             query = query.gte("snapshot_date", cutoff_date)
 
-        response = query.execute()
+        response = await query.execute()
+        snapshots = await asyncio.to_thread(attach_holdings_details, supabase, response.data or [])
 
         return {
             "success": True,
             "user_id": user_id,
-            "snapshots": response.data if response.data else [],
-            "count": len(response.data) if response.data else 0
+            "snapshots": snapshots,
+            "count": len(snapshots)
         }
 
     except Exception as e:
@@ -183,9 +212,9 @@ async def get_daily_change(
         today = date.today().isoformat()
         yesterday = (date.today() - timedelta(days=1)).isoformat()
 
-        # Fetch snapshots
-        response = supabase.table("portfolio_daily_snapshots")\
-            .select("*")\
+        # Fetch snapshots (totals only - details are not needed here)
+        response = await db.table("portfolio_daily_snapshots")\
+            .select("snapshot_date, current_value, total_profit, overall_return")\
             .eq("user_id", user_id)\
             .in_("snapshot_date", [today, yesterday])\
             .execute()
@@ -244,6 +273,8 @@ async def get_weekly_snapshots(
 ):
     """
     Get weekly portfolio snapshots (last day of each week)
+
+    Read from portfolio_snapshot_rollups, which a trigger keeps in step with daily snapshots.
     """
     # SECURITY: Verify user can only access their own weekly snapshots
     user_id = sanitize_user_id(user_id)
@@ -255,34 +286,7 @@ async def get_weekly_snapshots(
     try:
         # Get snapshots for the specified number of weeks
         cutoff_date = (date.today() - timedelta(weeks=weeks)).isoformat()
-
-        response = supabase.table("portfolio_daily_snapshots")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .gte("snapshot_date", cutoff_date)\
-            .order("snapshot_date", desc=False)\
-            .execute()
-
-        if not response.data:
-            return {
-                "success": True,
-                "user_id": user_id,
-                "weekly_snapshots": [],
-                "count": 0
-            }
-
-        # Group by week and take the last snapshot of each week
-        weekly_data = {}
-        for snapshot in response.data:
-            snapshot_date = datetime.fromisoformat(snapshot['snapshot_date'])
-            # Get ISO week number
-            week_key = f"{snapshot_date.year}-W{snapshot_date.isocalendar()[1]:02d}"
-            # Keep the latest snapshot for each week
-            if week_key not in weekly_data or snapshot['snapshot_date'] > weekly_data[week_key]['snapshot_date']:
-                weekly_data[week_key] = snapshot
-
-        weekly_snapshots = list(weekly_data.values())
-        weekly_snapshots.sort(key=lambda x: x['snapshot_date'], reverse=True)
+        weekly_snapshots = await fetch_snapshot_rollups(user_id, 'week', cutoff_date)
 
         return {
             "success": True,
@@ -304,6 +308,8 @@ async def get_monthly_snapshots(
 ):
     """
     Get monthly portfolio snapshots (last day of each month)
+
+    Read from portfolio_snapshot_rollups, which a trigger keeps in step with daily snapshots.
     """
     # SECURITY: Verify user can only access their own monthly snapshots
     user_id = sanitize_user_id(user_id)
@@ -315,33 +321,7 @@ async def get_monthly_snapshots(
     try:
         # Get snapshots for the specified number of months
         cutoff_date = (date.today() - timedelta(days=months * 30)).isoformat()
-
-        response = supabase.table("portfolio_daily_snapshots")\
-            .select("*")\
-            .eq("user_id", user_id)\
-            .gte("snapshot_date", cutoff_date)\
-            .order("snapshot_date", desc=False)\
-            .execute()
-
-        if not response.data:
-            return {
-                "success": True,
-                "user_id": user_id,
-                "monthly_snapshots": [],
-                "count": 0
-            }
-
-        # Group by month and take the last snapshot of each month
-        monthly_data = {}
-        for snapshot in response.data:
-            snapshot_date = datetime.fromisoformat(snapshot['snapshot_date'])
-            month_key = f"{snapshot_date.year}-{snapshot_date.month:02d}"
-            # Keep the latest snapshot for each month
-            if month_key not in monthly_data or snapshot['snapshot_date'] > monthly_data[month_key]['snapshot_date']:
-                monthly_data[month_key] = snapshot
-
-        monthly_snapshots = list(monthly_data.values())
-        monthly_snapshots.sort(key=lambda x: x['snapshot_date'], reverse=True)
+        monthly_snapshots = await fetch_snapshot_rollups(user_id, 'month', cutoff_date)
 
         return {
             "success": True,
@@ -355,6 +335,94 @@ async def get_monthly_snapshots(
         raise HTTPException(status_code=500, detail=f"Failed to fetch monthly snapshots: {str(e)}")
 
 
+# Chartable series: table, value columns (the first drives downsampling)
+TIME_SERIES_SOURCES = {
+    "portfolio": ("portfolio_daily_snapshots", ("current_value", "total_investment", "total_profit", "overall_return")),
+    "net_worth": ("net_worth_history", ("net_worth", "total_assets", "total_liabilities")),
+}
+
+TIME_SERIES_PAGE_SIZE = 1000
+DEFAULT_MAX_POINTS = 500
+
+
+async def fetch_time_series_rows(table: str, columns: tuple, user_id: str, start: Optional[str], end: Optional[str]) -> List[Dict[str, Any]]:
+    """Dated rows for a user in ascending order, narrow projection, paged past the row cap"""
+    def make_query():
+        query = db.table(table)\
+            .select(", ".join(("snapshot_date",) + columns))\
+            .eq("user_id", user_id)
+        if start:
+            query = query.gte("snapshot_date", start)
+        if end:
+            query = query.lte("snapshot_date", end)
+        return query.order("snapshot_date")
+
+    return await fetch_paged(make_query, TIME_SERIES_PAGE_SIZE)
+
+
+@router.get("/time-series/{user_id}")
+async def get_time_series(
+    user_id: str,
+    series: str = "portfolio",
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    max_points: int = Query(DEFAULT_MAX_POINTS, ge=3, le=5000),
+    method: str = LTTB,
+    current_user: User = Depends(get_authorized_user)
+):
+    """
+    Chart series for a date range, downsampled on the server
+
+    Parameters:
+    - series: "portfolio" (daily snapshots) or "net_worth" (net worth history)
+    - from / to: Optional date range (YYYY-MM-DD, inclusive)
+    - max_points: Most points returned (default 500)
+    - method: "lttb" (shape-preserving) or "minmax" (keeps every bucket's extremes)
+    """
+    # SECURITY: Verify user can only access their own history
+    user_id = sanitize_user_id(user_id)
+    verify_user_ownership(current_user, user_id)
+
+    if series not in TIME_SERIES_SOURCES:
+        raise HTTPException(status_code=400, detail=f"Unknown series '{series}'. Use one of: {', '.join(TIME_SERIES_SOURCES)}")
+    if method not in METHODS:
+        raise HTTPException(status_code=400, detail=f"Unknown method '{method}'. Use one of: {', '.join(METHODS)}")
+
+    if not supabase:
+        raise HTTPException(status_code=500, detail="Database not initialized")
+
+    try:
+        table, columns = TIME_SERIES_SOURCES[series]
+        rows = await fetch_time_series_rows(
+            table, columns, user_id,
+            from_date.isoformat() if from_date else None,
+            to_date.isoformat() if to_date else None
+        )
+
+        if len(rows) > max_points:
+            x = np.array([date.fromisoformat(row["snapshot_date"]).toordinal() for row in rows], dtype=float)
+            y = np.array([float(row[columns[0]] or 0) for row in rows])
+            points = [rows[i] for i in downsample_indices(x, y, max_points, method)]
+        else:
+            points = rows
+
+        return {
+            "success": True,
+            "user_id": user_id,
+            "series": series,
+            "method": method,
+            "from": rows[0]["snapshot_date"] if rows else None,
+            "to": rows[-1]["snapshot_date"] if rows else None,
+            "total_points": len(rows),
+            "points": points,
+            "count": len(points)
+        }
+
+    except Exception as e:
+        print(f"[ERROR] Failed to fetch {series} time series for user {user_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch time series: {str(e)}")
+
+
 @router.delete("/portfolio-snapshots/{user_id}")
 async def delete_user_snapshots(
     user_id: str,
@@ -371,7 +439,7 @@ async def delete_user_snapshots(
         raise HTTPException(status_code=500, detail="Database not initialized")
 
     try:
-        response = supabase.table("portfolio_daily_snapshots")\
+        response = await db.table("portfolio_daily_snapshots")\
             .delete()\
             .eq("user_id", user_id)\
             .execute()
@@ -0,0 +1,239 @@
+"""
+Snapshot Details Codec
+Compact storage for portfolio_daily_snapshots.holdings_details: a full keyframe
+every KEYFRAME_INTERVAL_DAYS, and per-day deltas against that keyframe holding
+only the fields that changed (NAV, NAV date, market value), each packed as
+zlib-compressed JSON in a bytea column
+"""
+
+import json
+import zlib
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Days between full keyframes; any day decodes from its keyframe plus one delta
+KEYFRAME_INTERVAL_DAYS = 30
+
+ENCODING_KEYFRAME = 'keyframe'
+ENCODING_DELTA = 'delta'
+
+# Columns holding the encoded details
+DETAILS_COLUMNS = ('details_blob', 'details_encoding', 'keyframe_date')
+
+KEYFRAME_LOOKUP_CHUNK_SIZE = 200
+
+COMPRESSION_LEVEL = 6
+
+Details = Dict[str, Dict[str, Any]]
+
+
+# =======================
+# PACKING
+# =======================
+
+def pack(payload: Any) -> str:
+    """Compressed payload as a PostgREST bytea literal"""
+    raw = json.dumps(payload, separators=(',', ':'), default=str).encode('utf-8')
+    return '\\x' + zlib.compress(raw, COMPRESSION_LEVEL).hex()
+
+
+def unpack(value: Any) -> Any:
+    """Inverse of pack (accepts the '\\x...' hex text PostgREST returns, or raw bytes)"""
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith('\\x') else value)
+    return json.loads(zlib.decompress(value).decode('utf-8'))
+
+
+# =======================
+# ENCODE / DECODE
+# =======================
+
+def diff_details(details: Details, keyframe: Details) -> Dict[str, Any]:
+    """Fields that differ from the keyframe per holding, plus holdings removed since it"""
+    changed = {}
+    for holding_id, fields in details.items():
+        base = keyframe.get(holding_id)
+        if base is None:
+            changed[holding_id] = fields
+            continue
+        delta = {field: value for field, value in fields.items() if base.get(field) != value}
+        if delta:
+            changed[holding_id] = delta
+    removed = [holding_id for holding_id in keyframe if holding_id not in details]
+    return {'changed': changed, 'removed': removed}
+
+
+def apply_delta(keyframe: Details, delta: Dict[str, Any]) -> Details:
+    """Details for a day from its keyframe and delta (the keyframe is not modified)"""
+    removed = set(delta.get('removed') or ())
+    details = {holding_id: dict(fields) for holding_id, fields in keyframe.items() if holding_id not in removed}
+    for holding_id, fields in (delta.get('changed') or {}).items():
+        details.setdefault(holding_id, {}).update(fields)
+    return details
+
+
+def encode_details(
+    details: Details,
+    snapshot_date: date,
+    keyframe: Optional[Tuple[date, Details]] = None
+) -> Dict[str, Any]:
+    """
+    Encoded column values for one snapshot's details
+
+    Args:
+        details: holding id -> fields for the day
+        snapshot_date: Day of the snapshot
+        keyframe: (date, details) of the user's latest keyframe before this day, if any
+
+    Returns:
+        Values for details_blob, details_encoding and keyframe_date
+    """
+    if keyframe is not None:
+        keyframe_day, keyframe_details = keyframe
+        if keyframe_day < snapshot_date and (snapshot_date - keyframe_day).days < KEYFRAME_INTERVAL_DAYS:
+            return {
+                'details_blob': pack(diff_details(details, keyframe_details)),
+                'details_encoding': ENCODING_DELTA,
+                'keyframe_date': keyframe_day.isoformat(),
+            }
+
+    return {
+        'details_blob': pack(details),
+        'details_encoding': ENCODING_KEYFRAME,
+        'keyframe_date': snapshot_date.isoformat(),
+    }
+
+
+def decode_details(row: Dict[str, Any], keyframes: Dict[Tuple[str, str], Details]) -> Optional[Details]:
+    """
+    holdings_details for a snapshot row
+
+    Rows written before encoding (or by clients) keep plain holdings_details;
+    delta rows need their keyframe in `keyframes`, keyed by (user_id, keyframe_date).
+    """
+    if not row.get('details_blob'):
+        return row.get('holdings_details')
+
+    payload = unpack(row['details_blob'])
+    if row.get('details_encoding') == ENCODING_KEYFRAME:
+        return payload
+
+    keyframe = keyframes.get((str(row['user_id']), str(row['keyframe_date'])))
+    if keyframe is None:
+        return row.get('holdings_details')
+    return apply_delta(keyframe, payload)
+
+
+# =======================
+# DATABASE HELPERS
+# =======================
+
+def load_latest_keyframes(client, user_ids: Iterable[str], before: date) -> Dict[str, Tuple[date, Details]]:
+    """user_id -> (date, details) of the latest keyframe within the interval before `before`"""
+    ids = sorted({str(user_id) for user_id in user_ids})
+    since = (before - timedelta(days=KEYFRAME_INTERVAL_DAYS - 1)).isoformat()
+    keyframes: Dict[str, Tuple[date, Details]] = {}
+
+    for i in range(0, len(ids), KEYFRAME_LOOKUP_CHUNK_SIZE):
+        result = client.table('portfolio_daily_snapshots') \
+            .select('user_id, snapshot_date, details_blob') \
+            .in_('user_id', ids[i:i + KEYFRAME_LOOKUP_CHUNK_SIZE]) \
+            .eq('details_encoding', ENCODING_KEYFRAME) \
+            .gte('snapshot_date', since) \
+            .lt('snapshot_date', before.isoformat()) \
+            .order('snapshot_date', desc=True) \
+            .execute()
+        for row in result.data or []:
+            if row['user_id'] not in keyframes:  # newest first
+                keyframes[row['user_id']] = (date.fromisoformat(row['snapshot_date']), unpack(row['details_blob']))
+
+    return keyframes
+
+
+def encode_replacement_details(
+    client,
+    user_id: str,
+    snapshot_date: date,
+    details: Details
+) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+    """
+    Encoded columns for details that replace a stored snapshot's (client saves)
+
+    A day stored as a keyframe stays one. The deltas that reference it were
+    diffed against its old content, so each is decoded with the old keyframe
+    and re-diffed against the new one; the caller writes them together with
+    the replaced day. Any other day is encoded against the user's latest
+    keyframe before it.
+
+    Returns:
+        (encoded columns for the day, stored delta rows with re-encoded details_blob)
+    """
+    existing = client.table('portfolio_daily_snapshots') \
+        .select('details_blob, details_encoding') \
+        .eq('user_id', user_id) \
+        .eq('snapshot_date', snapshot_date.isoformat()) \
+        .execute().data or []
+
+    if existing and existing[0].get('details_encoding') == ENCODING_KEYFRAME:
+        previous = unpack(existing[0]['details_blob'])
+        dependents = client.table('portfolio_daily_snapshots') \
+            .select('*') \
+            .eq('user_id', user_id) \
+            .eq('details_encoding', ENCODING_DELTA) \
+            .eq('keyframe_date', snapshot_date.isoformat()) \
+            .order('snapshot_date') \
+            .execute().data or []
+        for row in dependents:
+            day_details = apply_delta(previous, unpack(row['details_blob']))
+            row['details_blob'] = pack(diff_details(day_details, details))
+        return encode_details(details, snapshot_date), dependents
+
+    keyframe = load_latest_keyframes(client, [user_id], snapshot_date).get(str(user_id))
+    return encode_details(details, snapshot_date, keyframe), []
+
+
+def load_keyframes_for_rows(client, rows: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Details]:
+    """Keyframes referenced by delta rows that are not themselves in `rows`"""
+    keyframes = {
+        (str(row['user_id']), str(row['snapshot_date'])): unpack(row['details_blob'])
+        for row in rows
+        if row.get('details_blob') and row.get('details_encoding') == ENCODING_KEYFRAME
+    }
+    missing: Dict[str, set] = {}
+    for row in rows:
+        if row.get('details_blob') and row.get('details_encoding') == ENCODING_DELTA:
+            key = (str(row['user_id']), str(row['keyframe_date']))
+            if key not in keyframes:
+                missing.setdefault(key[0], set()).add(key[1])
+
+    for user_id, dates in missing.items():
+        result = client.table('portfolio_daily_snapshots') \
+            .select('user_id, snapshot_date, details_blob') \
+            .eq('user_id', user_id) \
+            .eq('details_encoding', ENCODING_KEYFRAME) \
+            .in_('snapshot_date', sorted(dates)) \
+            .execute()
+        for row in result.data or []:
+            keyframes[(str(row['user_id']), str(row['snapshot_date']))] = unpack(row['details_blob'])
+
+    return keyframes
+
+
+def attach_holdings_details(client, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Replace the encoded columns of snapshot rows with decoded holdings_details,
+    so responses keep their original shape
+    """
+    keyframes = load_keyframes_for_rows(client, rows)
+    for row in rows:
+        row['holdings_details'] = decode_details(row, keyframes)
+        for column in DETAILS_COLUMNS:
+            row.pop(column, None)
+    return rows
+
+
+# Export functions
+__all__ = [
+    'encode_details', 'decode_details', 'diff_details', 'apply_delta',
+    'load_latest_keyframes', 'encode_replacement_details', 'attach_holdings_details', 'KEYFRAME_INTERVAL_DAYS'
+]
@@ -0,0 +1,76 @@
+"""
+Time-Series Downsampling
+Index selection for chart series: Largest-Triangle-Three-Buckets (keeps the
+visual shape) and min/max bucketing (keeps every extreme)
+"""
+
+import numpy as np
+
+LTTB = 'lttb'
+MINMAX = 'minmax'
+METHODS = (LTTB, MINMAX)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of the points kept by Largest-Triangle-Three-Buckets
+
+    First and last points are always kept; each bucket in between keeps the
+    point forming the largest triangle with the previous pick and the mean of
+    the next bucket.
+    """
+    n = len(x)
+    if max_points >= n:
+        return np.arange(n)
+    if max_points < 3:
+        return np.array([0, n - 1])
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(int)
+    selected = np.empty(max_points, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start, next_end = edges[i + 1], (edges[i + 2] if i + 2 < len(edges) else n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - avg_x) * (y[start:end] - py) - (px - x[start:end]) * (avg_y - py))
+        previous = start + int(areas.argmax())
+        selected[i + 1] = previous
+
+    return selected
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Indices of each bucket's minimum and maximum (two points per bucket), plus
+    the first and last points
+    """
+    n = len(y)
+    if max_points >= n:
+        return np.arange(n)
+
+    buckets = max((max_points - 2) // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(int)
+    picks = [0, n - 1]
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end > start:
+            segment = y[start:end]
+            picks.extend((start + int(segment.argmin()), start + int(segment.argmax())))
+
+    return np.unique(picks)
+
+
+def downsample_indices(x: np.ndarray, y: np.ndarray, max_points: int, method: str = LTTB) -> np.ndarray:
+    """Sorted indices of the points to keep"""
+    if method == MINMAX:
+        return minmax_indices(y, max_points)
+    return lttb_indices(x, y, max_points)
+
+
+# Export functions
+__all__ = ['lttb_indices', 'minmax_indices', 'downsample_indices', 'METHODS', 'LTTB', 'MINMAX']
@@ -0,0 +1,119 @@
+"""
+Snapshot Stage
+Builds every user's daily portfolio snapshot from the nightly NAV valuation
+batch and writes them in chunked bulk upserts, so daily history is complete
+without any client traffic
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .details_codec import encode_details, load_latest_keyframes
+
+# Rows per upsert request (each row carries encoded holdings details)
+SNAPSHOT_UPSERT_CHUNK_SIZE = 500
+
+SNAPSHOT_CONFLICT_KEY = 'user_id,snapshot_date'
+
+# Per-holding fields kept in holdings_details
+SNAPSHOT_HOLDING_FIELDS = (
+    'scheme_code', 'scheme_name', 'folio_number', 'unit_balance',
+    'current_nav', 'nav_date', 'cost_value', 'market_value'
+)
+
+
+def build_daily_snapshots(holdings: List[Dict[str, Any]], snapshot_date: date) -> List[Dict[str, Any]]:
+    """
+    One portfolio_daily_snapshots row per user from valued holdings
+
+    Totals follow calculate_summary (overall_return in percent);
+    holdings_details maps holding id to its valuation on the day.
+    """
+    if not holdings:
+        return []
+
+    frame = pd.DataFrame(holdings, columns=['id', 'user_id', *SNAPSHOT_HOLDING_FIELDS])
+    frame['cost_value'] = pd.to_numeric(frame['cost_value'], errors='coerce').fillna(0.0)
+    frame['market_value'] = pd.to_numeric(frame['market_value'], errors='coerce').fillna(0.0)
+
+    totals = frame.groupby('user_id', sort=False).agg(
+        total_investment=('cost_value', 'sum'),
+        current_value=('market_value', 'sum'),
+        holdings_count=('id', 'size'),
+    )
+    totals['total_profit'] = totals['current_value'] - totals['total_investment']
+    invested = totals['total_investment'].where(totals['total_investment'] > 0)
+    totals['overall_return'] = (totals['total_profit'] / invested * 100).fillna(0.0)
+
+    details: Dict[str, Dict[str, Any]] = {}
+    for holding in holdings:
+        details.setdefault(holding['user_id'], {})[str(holding['id'])] = {
+            field: holding.get(field) for field in SNAPSHOT_HOLDING_FIELDS
+        }
+
+    snapshot_day = snapshot_date.isoformat()
+    updated_at = datetime.utcnow().isoformat()
+    return [
+        {
+            'user_id': str(user_id),
+            'snapshot_date': snapshot_day,
+            'total_investment': round(float(row.total_investment), 2),
+            'current_value': round(float(row.current_value), 2),
+            'total_profit': round(float(row.total_profit), 2),
+            'overall_return': round(float(row.overall_return), 4),
+            'holdings_count': int(row.holdings_count),
+            'holdings_details': details[user_id],
+            'updated_at': updated_at,
+        }
+        for user_id, row in totals.iterrows()
+    ]
+
+
+def encode_snapshot_details(client, rows: List[Dict[str, Any]], snapshot_date: date) -> List[Dict[str, Any]]:
+    """
+    Move holdings_details into the compact keyframe/delta columns
+
+    Each user's details are stored as a delta against their latest keyframe,
+    or as a new keyframe when the last one is too old.
+    """
+    keyframes = load_latest_keyframes(client, (row['user_id'] for row in rows), snapshot_date)
+    for row in rows:
+        row.update(encode_details(row['holdings_details'], snapshot_date, keyframes.get(row['user_id'])))
+        row['holdings_details'] = None
+    return rows
+
+
+def upsert_snapshots(client, rows: List[Dict[str, Any]], chunk_size: int = SNAPSHOT_UPSERT_CHUNK_SIZE) -> int:
+    """Upsert snapshot rows in chunks on (user_id, snapshot_date); returns rows written"""
+    written = 0
+    for i in range(0, len(rows), chunk_size):
+        chunk = rows[i:i + chunk_size]
+        client.table('portfolio_daily_snapshots').upsert(chunk, on_conflict=SNAPSHOT_CONFLICT_KEY).execute()
+        written += len(chunk)
+    return written
+
+
+def run_snapshot_stage(client, holdings: List[Dict[str, Any]], snapshot_date: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Snapshot stage of the nightly NAV pipeline (blocking)
+
+    Args:
+        holdings: Valued active holdings from the NAV batch
+        snapshot_date: Day the snapshots are for (defaults to today)
+
+    Returns:
+        Stats dict with users and rows written
+    """
+    snapshot_date = snapshot_date or date.today()
+    rows = encode_snapshot_details(client, build_daily_snapshots(holdings, snapshot_date), snapshot_date)
+    written = upsert_snapshots(client, rows)
+
+    print(f"[Snapshot Stage] Wrote {written} snapshots for {snapshot_date} "
+          f"in {(written + SNAPSHOT_UPSERT_CHUNK_SIZE - 1) // SNAPSHOT_UPSERT_CHUNK_SIZE} batch(es)")
+    return {'snapshot_date': snapshot_date.isoformat(), 'snapshots_written': written}
+
+
+# Export functions
+__all__ = ['build_daily_snapshots', 'encode_snapshot_details', 'upsert_snapshots', 'run_snapshot_stage']
@@ -7,8 +7,10 @@ from fastapi import APIRouter, HTTPException, Request, Depends
 from pydantic import BaseModel
 from typing import List, Optional, Dict, Any
 from datetime import datetime
+import asyncio
 import os
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import invalidate_tags, user_tag
 import sys
 import traceback
 
@@ -24,9 +26,7 @@ from app.security import verify_user_ownership, sanitize_user_id, verify_user_or
 router = APIRouter(prefix="/routes")
 
 # Set up Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 if not supabase:
     print("WARNING: Supabase client not initialized in privacy API")
@@ -69,7 +69,7 @@ async def save_user_consent(
             raise HTTPException(status_code=500, detail="Database not initialized")
 
         # Get user from database
-        user_response = supabase.from_("users").select("id, email").eq("id", data.userId).execute()
+        user_response = await db.from_("users").select("id, email").eq("id", data.userId).execute()
 
         if not user_response.data or len(user_response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -96,7 +96,7 @@ async def save_user_consent(
             }
 
             # Check if consent record exists
-            existing = supabase.from_("consent_tracking")\
+            existing = await db.from_("consent_tracking")\
                 .select("id")\
                 .eq("user_id", user_id)\
                 .eq("consent_type", consent.type)\
@@ -104,18 +104,19 @@ async def save_user_consent(
 
             if existing.data and len(existing.data) > 0:
                 # Update existing consent
-                supabase.from_("consent_tracking")\
+                await db.from_("consent_tracking")\
                     .update(consent_data)\
                     .eq("user_id", user_id)\
                     .eq("consent_type", consent.type)\
                     .execute()
             else:
                 # Insert new consent
-                supabase.from_("consent_tracking").insert(consent_data).execute()
+                await db.from_("consent_tracking").insert(consent_data).execute()
 
             # Log audit event
             action = 'consent_given' if consent.given else 'consent_withdrawn'
-            log_audit(
+            await asyncio.to_thread(
+                log_audit,
                 user_id=user_id,
                 action=action,
                 request=request,
@@ -151,7 +152,7 @@ async def get_user_consents(
             raise HTTPException(status_code=500, detail="Database not initialized")
 
         # Get consents
-        response = supabase.from_("consent_tracking")\
+        response = await db.from_("consent_tracking")\
             .select("*")\
             .eq("user_id", user_id)\
             .execute()
@@ -159,7 +160,8 @@ async def get_user_consents(
         consents = response.data if response.data else []
 
         # Log audit event
-        log_audit(
+        await asyncio.to_thread(
+            log_audit,
             user_id=user_id,
             action='data_read',
             request=request,
@@ -199,7 +201,7 @@ async def delete_user_account(
             raise HTTPException(status_code=500, detail="Database not initialized")
 
         # Verify user exists
-        user_response = supabase.from_("users").select("id, email").eq("id", user_id).execute()
+        user_response = await db.from_("users").select("id, email").eq("id", user_id).execute()
 
         if not user_response.data or len(user_response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -207,7 +209,8 @@ async def delete_user_account(
         user_email = user_response.data[0]["email"]
 
         # Log the deletion audit event BEFORE deleting (since audit logs will be deleted too)
-        log_audit(
+        await asyncio.to_thread(
+            log_audit,
             user_id=user_id,
             action='data_delete',
             request=request,
@@ -220,17 +223,17 @@ async def delete_user_account(
         # These will CASCADE delete related records due to ON DELETE CASCADE in schema
 
         # 1. Delete audit logs for this user
-        supabase.from_("audit_logs").delete().eq("user_id", user_id).execute()
+        await db.from_("audit_logs").delete().eq("user_id", user_id).execute()
 
         # 2. Delete consent tracking
-        supabase.from_("consent_tracking").delete().eq("user_id", user_id).execute()
+        await db.from_("consent_tracking").delete().eq("user_id", user_id).execute()
 
         # 3. Delete risk assessments
-        supabase.from_("risk_assessments").delete().eq("user_id", user_id).execute()
+        await db.from_("risk_assessments").delete().eq("user_id", user_id).execute()
 
         # 4. Delete financial data (this should cascade to related tables)
         # Get personal_info records
-        personal_info_response = supabase.from_("personal_info")\
+        personal_info_response = await db.from_("personal_info")\
             .select("id")\
             .eq("user_id", user_id)\
             .execute()
@@ -240,19 +243,25 @@ async def delete_user_account(
                 pi_id = pi["id"]
 
                 # Delete goals
-                supabase.from_("goals").delete().eq("personal_info_id", pi_id).execute()
+                await db.from_("goals").delete().eq("personal_info_id", pi_id).execute()
 
                 # Delete risk appetite
-                supabase.from_("risk_appetite").delete().eq("personal_info_id", pi_id).execute()
+                await db.from_("risk_appetite").delete().eq("personal_info_id", pi_id).execute()
 
                 # Delete assets and liabilities
-                supabase.from_("assets_liabilities").delete().eq("personal_info_id", pi_id).execute()
+                await db.from_("assets_liabilities").delete().eq("personal_info_id", pi_id).execute()
 
             # Delete personal info
-            supabase.from_("personal_info").delete().eq("user_id", user_id).execute()
+            await db.from_("personal_info").delete().eq("user_id", user_id).execute()
+
+            from app.apis.financial_data.financial_cache import invalidate_user_financial_data
+            invalidate_user_financial_data(user_id)
+
+        # Cached responses of every per-user read endpoint
+        invalidate_tags(user_tag(user_id))
 
         # 5. Finally, delete the user (this will cascade to profiles if foreign key is set)
-        supabase.from_("users").delete().eq("id", user_id).execute()
+        await db.from_("users").delete().eq("id", user_id).execute()
 
         print(f"Successfully deleted user account: {user_id} ({user_email})")
 
@@ -286,11 +295,12 @@ async def get_audit_logs_endpoint(
         user_id = sanitize_user_id(user_id)
         verify_user_ownership(current_user, user_id)
 
-        logs = get_user_audit_logs(user_id, limit)
+        logs = await asyncio.to_thread(get_user_audit_logs, user_id, limit)
 
         # Log this access
         if request:
-            log_audit(
+            await asyncio.to_thread(
+                log_audit,
                 user_id=user_id,
                 action='data_read',
                 request=request,
@@ -326,7 +336,7 @@ async def get_inactive_users_endpoint(
         if not is_admin_user(current_user):
             raise HTTPException(status_code=403, detail="Admin access required")
 
-        inactive_users = get_inactive_users(months)
+        inactive_users = await asyncio.to_thread(get_inactive_users, months)
 
         return {
             "success": True,
@@ -360,7 +370,7 @@ async def log_pdf_export(
             raise HTTPException(status_code=500, detail="Database not initialized")
 
         # Get user email for breach detection
-        user_response = supabase.from_("users").select("email").eq("id", user_id).execute()
+        user_response = await db.from_("users").select("email").eq("id", user_id).execute()
 
         if not user_response.data or len(user_response.data) == 0:
             raise HTTPException(status_code=404, detail="User not found")
@@ -368,7 +378,8 @@ async def log_pdf_export(
         user_email = user_response.data[0]["email"]
 
         # Log the export
-        log_audit(
+        await asyncio.to_thread(
+            log_audit,
             user_id=user_id,
             action='export_data',
             request=request,
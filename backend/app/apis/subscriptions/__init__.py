@@ -4,7 +4,8 @@ from typing import Optional, List
 from datetime import datetime, timedelta
 import secrets
 import string
-from supabase import create_client
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag, table_tag
 import os
 import sys
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
@@ -15,12 +16,13 @@ from app.security import verify_user_ownership, sanitize_user_id
 router = APIRouter(prefix="/routes")
 
 # Supabase setup
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 print(f"[Subscriptions API] Initialized with Supabase: {supabase is not None}")
 
+# Active promos carry a countdown and slot counts, so keep them short-lived
+ACTIVE_PROMOS_CACHE_TTL = 60  # seconds
+
 # ============================================
 # MODELS
 # ============================================
@@ -121,7 +123,7 @@ async def validate_promo_code(data: PromoCodeValidation):
         print(f"[Validate Promo] Checking code: {data.code}")
 
         # Fetch promo code
-        response = supabase.from_("promo_codes")\
+        response = await db.from_("promo_codes")\
             .select("*")\
             .eq("code", data.code.upper())\
             .execute()
@@ -191,7 +193,7 @@ async def get_promo_stats(code: str):
 
         print(f"[Promo Stats] Fetching stats for: {code}")
 
-        response = supabase.from_("promo_codes")\
+        response = await db.from_("promo_codes")\
             .select("*")\
             .eq("code", code.upper())\
             .execute()
@@ -229,6 +231,7 @@ async def get_promo_stats(code: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/active-promos")
+@cached_route(table_tag("promo_codes"), ttl_seconds=ACTIVE_PROMOS_CACHE_TTL)
 async def get_active_promos():
     """Get all active promo campaigns"""
     try:
@@ -237,7 +240,7 @@ async def get_active_promos():
 
         print(f"[Active Promos] Fetching all active promos")
 
-        response = supabase.from_("promo_codes")\
+        response = await db.from_("promo_codes")\
             .select("code, code_name, code_type, total_slots, used_slots, end_date, benefits")\
             .eq("is_active", True)\
             .order("created_at", desc=False)\
@@ -292,7 +295,7 @@ async def create_subscription(
         print(f"[Create Subscription] User: {data.user_id}, Plan: {data.plan_name}, Promo: {data.promo_code}")
 
         # Fetch plan details
-        plan_response = supabase.from_("subscription_plans")\
+        plan_response = await db.from_("subscription_plans")\
             .select("*")\
             .eq("plan_name", data.plan_name)\
             .eq("is_active", True)\
@@ -310,7 +313,7 @@ async def create_subscription(
 
         if data.promo_code:
             print(f"[Create Subscription] Validating promo code: {data.promo_code}")
-            promo_response = supabase.from_("promo_codes")\
+            promo_response = await db.from_("promo_codes")\
                 .select("*")\
                 .eq("code", data.promo_code.upper())\
                 .eq("is_active", True)\
@@ -328,11 +331,12 @@ async def create_subscription(
                 # Increment used slots
                 if promo['total_slots']:
                     new_used_slots = promo['used_slots'] + 1
-                    supabase.from_("promo_codes")\
+                    await db.from_("promo_codes")\
                         .update({"used_slots": new_used_slots, "updated_at": datetime.now().isoformat()})\
                         .eq("id", promo['id'])\
                         .execute()
                     print(f"[Create Subscription] Updated promo slots: {new_used_slots}/{promo['total_slots']}")
+                    invalidate_tags(table_tag("promo_codes"))
 
         # Generate unique access code
         access_code = generate_access_code()
@@ -360,7 +364,7 @@ async def create_subscription(
             "payment_status": "completed" if data.payment_id else "pending"
         }
 
-        sub_response = supabase.from_("user_subscriptions")\
+        sub_response = await db.from_("user_subscriptions")\
             .insert(subscription_data)\
             .execute()
 
@@ -369,10 +373,11 @@ async def create_subscription(
 
         subscription_id = sub_response.data[0]['id']
         print(f"[Create Subscription] Created subscription: {subscription_id}")
+        invalidate_tags(user_tag(data.user_id))
 
         # Track promo code usage
         if data.promo_code and promo_response.data and len(promo_response.data) > 0:
-            supabase.from_("promo_code_usage")\
+            await db.from_("promo_code_usage")\
                 .insert({
                     "promo_code_id": promo_response.data[0]['id'],
                     "user_id": data.user_id,
@@ -434,7 +439,7 @@ async def validate_access_code(
         print(f"[Validate Access Code] User: {data.user_id}, Code: {data.access_code}")
 
         # Check if code exists and belongs to user
-        response = supabase.from_("user_subscriptions")\
+        response = await db.from_("user_subscriptions")\
             .select("*, subscription_plans(*)")\
             .eq("user_id", data.user_id)\
             .eq("access_code", data.access_code)\
@@ -460,12 +465,13 @@ async def validate_access_code(
             }
 
         # Mark code as redeemed
-        supabase.from_("user_subscriptions")\
+        await db.from_("user_subscriptions")\
             .update({"code_redeemed_at": datetime.now().isoformat(), "updated_at": datetime.now().isoformat()})\
             .eq("id", subscription['id'])\
             .execute()
 
         print(f"[Validate Access Code] Code redeemed successfully")
+        invalidate_tags(user_tag(data.user_id))
 
         return {
             "valid": True,
@@ -480,6 +486,7 @@ async def validate_access_code(
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/user-subscription/{user_id}")
+@cached_route("user:{user_id}")
 async def get_user_subscription(
     user_id: str,
     current_user: User = Depends(get_authorized_user)
@@ -495,7 +502,7 @@ async def get_user_subscription(
 
         print(f"[User Subscription] Fetching for user: {user_id}")
 
-        response = supabase.from_("user_subscriptions")\
+        response = await db.from_("user_subscriptions")\
             .select("*, subscription_plans(*)")\
             .eq("user_id", user_id)\
             .eq("status", "active")\
@@ -8,7 +8,7 @@ import random
 import string
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from supabase import create_client
+from app.utils.db import db, get_supabase
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id, is_admin_user
 
@@ -23,7 +23,7 @@ supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
 print(f"Support Tickets - Supabase URL: {supabase_url[:30] if supabase_url else 'NOT SET'}...")
 print(f"Support Tickets - Supabase SERVICE_KEY: {'YES' if supabase_key else 'NO'}")
 
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 if not supabase_key:
     print("CRITICAL_ERROR: SUPABASE_SERVICE_KEY is not set. Support ticket operations will fail.")
 elif supabase:
@@ -171,7 +171,7 @@ async def create_support_ticket(
         # Ensure uniqueness by checking if it already exists
         max_retries = 5
         for _ in range(max_retries):
-            existing = supabase.table("support_tickets").select("id").eq("ticket_id", ticket_id).execute()
+            existing = await db.table("support_tickets").select("id").eq("ticket_id", ticket_id).execute()
             if not existing.data:
                 break
             ticket_id = generate_ticket_id()
@@ -194,7 +194,7 @@ async def create_support_ticket(
         }
 
         # Insert into database
-        response = supabase.table("support_tickets").insert(ticket_data).execute()
+        response = await db.table("support_tickets").insert(ticket_data).execute()
 
         if not response.data:
             raise HTTPException(status_code=500, detail="Failed to create support ticket")
@@ -243,7 +243,7 @@ async def get_user_support_tickets(
         raise HTTPException(status_code=500, detail="Database not initialized")
 
     try:
-        response = supabase.table("support_tickets")\
+        response = await db.table("support_tickets")\
             .select("*")\
             .eq("user_id", user_id)\
             .order("created_at", desc=True)\
@@ -273,7 +273,7 @@ async def get_all_support_tickets(current_user: User = Depends(get_authorized_us
         raise HTTPException(status_code=500, detail="Database not initialized")
 
     try:
-        response = supabase.table("support_tickets")\
+        response = await db.table("support_tickets")\
             .select("*")\
             .order("created_at", desc=True)\
             .execute()
@@ -317,7 +317,7 @@ async def update_support_ticket(
         if update.resolution is not None:
             update_data["resolution"] = update.resolution
 
-        response = supabase.table("support_tickets")\
+        response = await db.table("support_tickets")\
             .update(update_data)\
             .eq("id", ticket_id)\
             .execute()
@@ -350,7 +350,7 @@ async def get_support_ticket(
         raise HTTPException(status_code=500, detail="Database not initialized")
 
     try:
-        response = supabase.table("support_tickets")\
+        response = await db.table("support_tickets")\
             .select("*")\
             .eq("id", ticket_id)\
             .execute()
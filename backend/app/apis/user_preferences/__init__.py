@@ -2,17 +2,15 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from supabase import create_client
-import os
+from app.utils.db import db, get_supabase
+from app.utils.read_cache import cached_route, invalidate_tags, user_tag
 from databutton_app.mw.auth_mw import User, get_authorized_user
 from app.security import verify_user_ownership, sanitize_user_id
 
 router = APIRouter(prefix="/routes")
 
 # Supabase setup
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 print(f"[User Preferences API] Initialized with Supabase: {supabase is not None}")
 
@@ -51,7 +49,7 @@ async def save_user_preferences(
         print(f"[Save Preferences] User: {data.user_id}, Type: {data.preference_type}")
 
         # Check if preference already exists
-        existing = supabase.from_("user_preferences")\
+        existing = await db.from_("user_preferences")\
             .select("*")\
             .eq("user_id", data.user_id)\
             .eq("preference_type", data.preference_type)\
@@ -81,7 +79,7 @@ async def save_user_preferences(
                 # For other preferences, merge values
                 updated_value = {**existing_value, **data.preference_value}
 
-            response = supabase.from_("user_preferences")\
+            response = await db.from_("user_preferences")\
                 .update({
                     "preference_value": updated_value,
                     "updated_at": datetime.now().isoformat()
@@ -101,7 +99,7 @@ async def save_user_preferences(
                     'created_at': datetime.now().isoformat()
                 }
 
-            response = supabase.from_("user_preferences")\
+            response = await db.from_("user_preferences")\
                 .insert({
                     "user_id": data.user_id,
                     "preference_type": data.preference_type,
@@ -111,6 +109,8 @@ async def save_user_preferences(
 
             print(f"[Save Preferences] Created new preference")
 
+        invalidate_tags(user_tag(data.user_id))
+
         return UserPreferenceResponse(
             success=True,
             message="Preference saved successfully",
@@ -127,6 +127,7 @@ async def save_user_preferences(
 
 
 @router.get("/get-user-preferences/{user_id}/{preference_type}")
+@cached_route("user:{user_id}")
 async def get_user_preferences(
     user_id: str,
     preference_type: str,
@@ -143,7 +144,7 @@ async def get_user_preferences(
 
         print(f"[Get Preferences] User: {user_id}, Type: {preference_type}")
 
-        response = supabase.from_("user_preferences")\
+        response = await db.from_("user_preferences")\
             .select("*")\
             .eq("user_id", user_id)\
             .eq("preference_type", preference_type)\
@@ -176,6 +177,7 @@ async def get_user_preferences(
 
 
 @router.get("/get-all-user-preferences/{user_id}")
+@cached_route("user:{user_id}")
 async def get_all_user_preferences(
     user_id: str,
     current_user: User = Depends(get_authorized_user)
@@ -191,7 +193,7 @@ async def get_all_user_preferences(
 
         print(f"[Get All Preferences] User: {user_id}")
 
-        response = supabase.from_("user_preferences")\
+        response = await db.from_("user_preferences")\
             .select("*")\
             .eq("user_id", user_id)\
             .execute()
@@ -230,11 +232,12 @@ async def reset_user_preference(
 
         print(f"[Reset Preference] User: {user_id}, Type: {preference_type}")
 
-        response = supabase.from_("user_preferences")\
+        response = await db.from_("user_preferences")\
             .delete()\
             .eq("user_id", user_id)\
             .eq("preference_type", preference_type)\
             .execute()
+        invalidate_tags(user_tag(user_id))
 
         return {
             "success": True,
@@ -7,9 +7,10 @@ import logging
 import time
 from collections import defaultdict
 from datetime import datetime, timedelta
+from typing import Dict
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
 
 logger = logging.getLogger(__name__)
 
@@ -200,3 +201,70 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
         )
 
         return response
+
+
+class _RequestTooLarge(Exception):
+    pass
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Rejects request bodies over a per-path byte limit before the route reads them.
+    Starlette spools the whole multipart form before an endpoint runs, so the
+    limit is checked here: against Content-Length up front, and by counting
+    bytes as they arrive for bodies sent without one.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _RequestTooLarge()
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # Once the body is over the limit, whatever the app answers is replaced by the 413
+            if exceeded:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send, limit)
+
+    async def _reject(self, scope, receive, send, limit: int):
+        logger.warning(f"[SECURITY] Request body over {limit} bytes rejected: {scope['path']}")
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Request too large. Maximum {limit // (1024 * 1024)}MB allowed."}
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,115 @@
+"""
+Backfill precomputed asset classes
+1. Classify scheme_master rows synced before asset_class existed
+2. Copy scheme_master.asset_class onto existing portfolio holdings
+
+Safe to re-run: only rows whose value differs are written.
+
+Usage: python backend/app/tasks/backfill_asset_class.py
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List
+
+# Add parent directory to path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+# Load environment variables from .env file
+import dotenv
+env_path = Path(__file__).parent.parent.parent / '.env'
+dotenv.load_dotenv(env_path)
+
+from supabase import create_client, Client
+from app.tasks.fetch_scheme_list import build_scheme_record, record_digest
+from app.utils.asset_classifier import detect_asset_class
+
+READ_PAGE_SIZE = 1000
+WRITE_CHUNK_SIZE = 500
+ID_CHUNK_SIZE = 200  # ids travel in the URL of an in.() filter
+
+
+def fetch_all(supabase: Client, table: str, columns: str, order_by: str) -> List[Dict[str, Any]]:
+    """Read a whole table in pages (PostgREST caps rows per request), ordered on a unique key"""
+    rows = []
+    start = 0
+    while True:
+        page = supabase.table(table).select(columns).order(order_by).range(start, start + READ_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < READ_PAGE_SIZE:
+            return rows
+        start += READ_PAGE_SIZE
+
+
+def backfill_scheme_master(supabase: Client) -> Dict[str, str]:
+    """
+    Classify schemes that have no asset_class yet
+
+    Returns:
+        scheme_code -> asset_class for every scheme
+    """
+    schemes = fetch_all(supabase, 'scheme_master', 'scheme_code, scheme_name, asset_class', 'scheme_code')
+    asset_classes = {}
+    updates = []
+
+    for scheme in schemes:
+        scheme_code = str(scheme['scheme_code'])
+        if scheme.get('asset_class'):
+            asset_classes[scheme_code] = scheme['asset_class']
+            continue
+
+        record = build_scheme_record(scheme_code, (scheme.get('scheme_name') or '').strip())
+        asset_classes[scheme_code] = record['asset_class']
+        # Store the digest too, so the next scheme sync treats the row as unchanged
+        updates.append({**record, 'record_digest': record_digest(record)})
+
+    for i in range(0, len(updates), WRITE_CHUNK_SIZE):
+        supabase.table('scheme_master').upsert(updates[i:i + WRITE_CHUNK_SIZE], on_conflict='scheme_code').execute()
+
+    print(f"[Asset Class Backfill] scheme_master: {len(updates)} of {len(schemes)} schemes classified")
+    return asset_classes
+
+
+def backfill_holdings(supabase: Client, asset_classes: Dict[str, str]) -> int:
+    """Set portfolio_holdings.asset_class from scheme_master (by name for unknown scheme codes)"""
+    holdings = fetch_all(supabase, 'portfolio_holdings', 'id, scheme_code, scheme_name, asset_class', 'id')
+
+    # Group holdings needing a change by target class - one update per class and id chunk
+    ids_by_class: Dict[str, List[str]] = {}
+    for holding in holdings:
+        asset_class = asset_classes.get(str(holding.get('scheme_code'))) or detect_asset_class(holding.get('scheme_name') or '')
+        if holding.get('asset_class') != asset_class:
+            ids_by_class.setdefault(asset_class, []).append(holding['id'])
+
+    updated = 0
+    for asset_class, ids in ids_by_class.items():
+        for i in range(0, len(ids), ID_CHUNK_SIZE):
+            chunk = ids[i:i + ID_CHUNK_SIZE]
+            supabase.table('portfolio_holdings').update({'asset_class': asset_class}).in_('id', chunk).execute()
+            updated += len(chunk)
+
+    print(f"[Asset Class Backfill] portfolio_holdings: {updated} of {len(holdings)} holdings updated")
+    return updated
+
+
+def run_backfill():
+    supabase_url = os.getenv("SUPABASE_URL")
+    supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
+
+    if not supabase_url or not supabase_key:
+        print("[ERROR] SUPABASE_URL or SUPABASE_SERVICE_KEY not set")
+        return
+
+    supabase: Client = create_client(supabase_url, supabase_key)
+
+    asset_classes = backfill_scheme_master(supabase)
+    backfill_holdings(supabase, asset_classes)
+
+
+if __name__ == "__main__":
+    print("=" * 60)
+    print("Asset Class Backfill")
+    print("=" * 60)
+    run_backfill()
+    print("=" * 60)
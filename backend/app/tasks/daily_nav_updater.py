@@ -7,17 +7,14 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, date
 import asyncio
-import os
-from supabase import create_client
+from app.utils.db import get_supabase
 import traceback
 
 # Initialize scheduler
 scheduler = AsyncIOScheduler()
 
 # Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 
 # =======================
@@ -75,6 +72,7 @@ async def daily_nav_update_job():
     3. Check for 10% changes and create notifications
     4. Send email alerts
     5. Sync net worth values
+    6. Write every user's daily portfolio snapshot
     """
     job_id = None
     today = date.today()
@@ -85,17 +83,26 @@ async def daily_nav_update_job():
         print(f"{'='*60}\n")
 
         # Create job record
-        job_id = create_job_record(today)
+        job_id = await asyncio.to_thread(create_job_record, today)
 
         if not job_id:
             print("[Daily NAV Updater] Failed to create job record - aborting")
             return
 
         # Import NAV service
-        from app.apis.portfolio.nav_service import batch_update_navs
+        from app.apis.portfolio.nav_service import run_nav_valuation
 
         # Run batch NAV update for all users
-        stats = await batch_update_navs(user_id=None)
+        stats, valued_holdings = await run_nav_valuation(user_id=None)
+
+        # Snapshot stage - daily totals straight from the valuation batch
+        try:
+            from app.apis.portfolio_snapshots.snapshot_stage import run_snapshot_stage
+            snapshot_stats = await asyncio.to_thread(run_snapshot_stage, supabase, valued_holdings, today)
+            stats['snapshots_written'] = snapshot_stats['snapshots_written']
+        except Exception as e:
+            print(f"[Daily NAV Updater] Snapshot stage failed: {str(e)}")
+            print(traceback.format_exc())
 
         print(f"\n[Daily NAV Updater] Job completed successfully!")
         print(f"  Total Holdings: {stats.get('total_holdings', 0)}")
@@ -105,9 +112,10 @@ async def daily_nav_update_job():
         print(f"  Holdings Updated: {stats.get('holdings_updated', 0)}")
         print(f"  Notifications Created: {stats.get('notifications_created', 0)}")
         print(f"  Users Affected: {stats.get('users_affected', 0)}")
+        print(f"  Snapshots Written: {stats.get('snapshots_written', 0)}")
 
         # Update job record with success
-        update_job_record(job_id, 'COMPLETED', stats)
+        await asyncio.to_thread(update_job_record, job_id, 'COMPLETED', stats)
 
     except Exception as e:
         error_msg = f"Job failed: {str(e)}\n{traceback.format_exc()}"
@@ -115,7 +123,7 @@ async def daily_nav_update_job():
 
         # Update job record with failure
         if job_id:
-            update_job_record(job_id, 'FAILED', {}, error_log=error_msg)
+            await asyncio.to_thread(update_job_record, job_id, 'FAILED', {}, error_log=error_msg)
 
     finally:
         print(f"\n{'='*60}")
@@ -139,6 +147,20 @@ def scheduled_nav_update():
     asyncio.create_task(daily_nav_update_job())
 
 
+# Schedule the scheme list sync weekly (Sunday 6 AM IST) - only changed schemes are written
+@scheduler.scheduled_job(
+    trigger=CronTrigger(day_of_week='sun', hour=6, minute=0, timezone='Asia/Kolkata'),
+    id='weekly_scheme_sync',
+    name='Weekly Scheme List Sync'
+)
+def scheduled_scheme_sync():
+    """Wrapper to run async scheme sync in scheduler"""
+    from app.tasks.fetch_scheme_list import fetch_all_schemes
+
+    print(f"\n[Scheduler] Triggered weekly scheme sync at {datetime.now()}")
+    asyncio.create_task(fetch_all_schemes())
+
+
 # Manual trigger function for testing
 async def trigger_manual_update():
     """Manually trigger NAV update (for testing)"""
@@ -153,6 +175,8 @@ print("""
 ===============================================================
  Job ID:        daily_nav_update
  Schedule:      Every day at 7:00 PM IST
+ Job ID:        weekly_scheme_sync
+ Schedule:      Every Sunday at 6:00 AM IST
  Timezone:      Asia/Kolkata
  Status:        Ready
 ===============================================================
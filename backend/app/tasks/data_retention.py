@@ -7,15 +7,13 @@ Does NOT auto-delete users - requires manual admin decision.
 import os
 from datetime import datetime, timedelta
 from typing import List, Dict
-from supabase import create_client
+from app.utils.db import get_supabase
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
 # Set up Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 # Email configuration
 ADMIN_EMAIL = "seyonshomefashion@gmail.com"
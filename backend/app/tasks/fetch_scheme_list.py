@@ -1,17 +1,21 @@
 """
 Fetch complete list of mutual fund schemes from MFAPI
-Run this script once to populate the scheme_master table
-Then optionally schedule weekly to refresh
+Run this script once to populate the scheme_master table; later runs only write
+schemes whose content digest changed and deactivate schemes dropped from MFAPI
+(scheduled weekly by the daily NAV updater's scheduler)
 
 Usage: python backend/app/tasks/fetch_scheme_list.py
 """
 
 import asyncio
 import aiohttp
+import hashlib
+import json
 from datetime import datetime
 import os
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -22,11 +26,183 @@ env_path = Path(__file__).parent.parent.parent / '.env'
 dotenv.load_dotenv(env_path)
 
 from supabase import create_client, Client
+from app.utils.asset_classifier import classify_scheme
 
 MFAPI_BASE_URL = "https://api.mfapi.in/mf"
 
+# Stored digests are read in pages (PostgREST caps rows per request)
+SYNC_READ_PAGE_SIZE = 1000
+SYNC_UPSERT_CHUNK_SIZE = 500
+SYNC_DEACTIVATE_CHUNK_SIZE = 200  # scheme codes travel in the URL of an in.() filter
+SYNC_WRITE_CONCURRENCY = 4
+
+# Refuse to deactivate more than this share of active schemes in one run
+MAX_DEACTIVATION_RATIO = 0.2
+
+# Callbacks run after a successful sync (e.g. in-process scheme search index refresh)
+scheme_sync_listeners = []
+
+
+def add_scheme_sync_listener(callback):
+    """Register a callback (sync or async, no arguments) to run after each successful sync"""
+    if callback not in scheme_sync_listeners:
+        scheme_sync_listeners.append(callback)
+
+
+async def notify_scheme_sync():
+    """Run all scheme sync listeners; a failing listener does not fail the sync"""
+    for callback in scheme_sync_listeners:
+        try:
+            result = callback()
+            if asyncio.iscoroutine(result):
+                await result
+        except Exception as e:
+            print(f"[Scheme Fetch] Sync listener failed: {str(e)}")
+
+
+# =======================
+# DIFF-BASED SYNC
+# =======================
+
+def build_scheme_record(scheme_code: str, scheme_name: str) -> Dict[str, Any]:
+    """scheme_master columns owned by the sync, including the precomputed classification"""
+    asset_class, sub_category = classify_scheme(scheme_name)
+
+    return {
+        'scheme_code': scheme_code,
+        'scheme_name': scheme_name,
+        'asset_class': asset_class,
+        'sub_category': sub_category,
+    }
+
+
+def scheme_record(scheme: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Synced scheme_master columns for one MFAPI scheme (None if incomplete)"""
+    scheme_code = str(scheme.get('schemeCode', '')).strip()
+    scheme_name = (scheme.get('schemeName') or '').strip()
+
+    if not scheme_code or not scheme_name:
+        return None
+
+    return build_scheme_record(scheme_code, scheme_name)
+
+
+def record_digest(record: Dict[str, Any]) -> str:
+    """Stable SHA-256 of the synced columns - a row is rewritten only when this changes"""
+    return hashlib.sha256(json.dumps(record, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def load_stored_digests(supabase: Client) -> Dict[str, Dict[str, Any]]:
+    """scheme_code -> {record_digest, is_active} for every scheme_master row (paged)"""
+    stored = {}
+    start = 0
+    while True:
+        page = supabase.table('scheme_master') \
+            .select('scheme_code, record_digest, is_active') \
+            .order('scheme_code') \
+            .range(start, start + SYNC_READ_PAGE_SIZE - 1) \
+            .execute().data or []
+        for row in page:
+            stored[str(row['scheme_code'])] = row
+        if len(page) < SYNC_READ_PAGE_SIZE:
+            return stored
+        start += SYNC_READ_PAGE_SIZE
+
+
+def diff_schemes(schemes: List[Dict[str, Any]], stored: Dict[str, Dict[str, Any]]):
+    """
+    Compare the MFAPI feed against stored digests
+
+    Returns:
+        (rows to upsert, scheme codes to deactivate, unchanged count)
+    """
+    records = {}
+    for scheme in schemes:
+        record = scheme_record(scheme)
+        if record:
+            records[record['scheme_code']] = record  # Last occurrence wins on duplicate codes
+
+    upserts = []
+    unchanged = 0
+    for scheme_code, record in records.items():
+        digest = record_digest(record)
+        existing = stored.get(scheme_code)
+        if existing and existing.get('record_digest') == digest and existing.get('is_active'):
+            unchanged += 1
+            continue
+        upserts.append({**record, 'record_digest': digest, 'is_active': True})
+
+    deactivations = [
+        scheme_code for scheme_code, row in stored.items()
+        if row.get('is_active') and scheme_code not in records
+    ]
+
+    return upserts, deactivations, unchanged
+
+
+async def run_chunked_writes(write, chunks: List[Any], concurrency: int = SYNC_WRITE_CONCURRENCY) -> int:
+    """Run a blocking write per chunk on worker threads, at most `concurrency` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(chunk):
+        async with semaphore:
+            await asyncio.to_thread(write, chunk)
+            return len(chunk)
+
+    return sum(await asyncio.gather(*(run(chunk) for chunk in chunks)))
+
+
+async def sync_scheme_master(supabase: Client, schemes: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Write only new/changed schemes and deactivate schemes missing from the feed
+
+    Returns:
+        Sync statistics
+    """
+    stored = await asyncio.to_thread(load_stored_digests, supabase)
+    upserts, deactivations, unchanged = diff_schemes(schemes, stored)
+
+    active_count = sum(1 for row in stored.values() if row.get('is_active'))
+    if deactivations and len(deactivations) > active_count * MAX_DEACTIVATION_RATIO:
+        # A truncated feed would otherwise switch off a large part of the catalog
+        print(f"[Scheme Fetch] ⚠️ Feed is missing {len(deactivations)} of {active_count} active schemes - skipping deactivation")
+        deactivations = []
+
+    now = datetime.now().isoformat()
+
+    def upsert_chunk(rows):
+        supabase.table('scheme_master').upsert(
+            [{**row, 'last_updated': now} for row in rows],
+            on_conflict='scheme_code'
+        ).execute()
+
+    def deactivate_chunk(scheme_codes):
+        supabase.table('scheme_master') \
+            .update({'is_active': False, 'last_updated': now}) \
+            .in_('scheme_code', scheme_codes) \
+            .execute()
+
+    written = await run_chunked_writes(
+        upsert_chunk, [upserts[i:i + SYNC_UPSERT_CHUNK_SIZE] for i in range(0, len(upserts), SYNC_UPSERT_CHUNK_SIZE)]
+    )
+    deactivated = await run_chunked_writes(
+        deactivate_chunk,
+        [deactivations[i:i + SYNC_DEACTIVATE_CHUNK_SIZE] for i in range(0, len(deactivations), SYNC_DEACTIVATE_CHUNK_SIZE)]
+    )
+
+    return {
+        'feed_schemes': len(schemes),
+        'stored_schemes': len(stored),
+        'new': sum(1 for row in upserts if row['scheme_code'] not in stored),
+        'changed': sum(1 for row in upserts if row['scheme_code'] in stored),
+        'unchanged': unchanged,
+        'written': written,
+        'deactivated': deactivated,
+    }
+
+
 async def fetch_all_schemes():
-    """Fetch complete list of mutual fund schemes from MFAPI"""
+    """Fetch complete list of mutual fund schemes from MFAPI and sync scheme_master"""
 
     # Initialize Supabase client
     supabase_url = os.getenv("SUPABASE_URL")
@@ -52,49 +228,18 @@ async def fetch_all_schemes():
                 schemes = await response.json()
                 print(f"[Scheme Fetch] Found {len(schemes)} schemes")
 
-                # Insert into database in batches
-                batch_size = 100
-                total_inserted = 0
-                total_updated = 0
-
-                for i in range(0, len(schemes), batch_size):
-                    batch = schemes[i:i+batch_size]
-                    records = []
-
-                    for scheme in batch:
-                        # Extract scheme details
-                        scheme_code = str(scheme.get('schemeCode', ''))
-                        scheme_name = scheme.get('schemeName', '')
-
-                        if not scheme_code or not scheme_name:
-                            continue
-
-                        records.append({
-                            'scheme_code': scheme_code,
-                            'scheme_name': scheme_name,
-                            'is_active': True,
-                            'last_updated': datetime.now().isoformat()
-                        })
-
-                    if records:
-                        # Upsert to handle duplicates
-                        result = supabase.table('scheme_master').upsert(
-                            records,
-                            on_conflict='scheme_code'
-                        ).execute()
-
-                        batch_num = i // batch_size + 1
-                        total_batches = (len(schemes) + batch_size - 1) // batch_size
-                        print(f"[Scheme Fetch] Batch {batch_num}/{total_batches}: Inserted {len(records)} schemes")
-                        total_inserted += len(records)
-
-                print(f"[Scheme Fetch] ✅ Completed!")
-                print(f"[Scheme Fetch] Total schemes processed: {total_inserted}")
-
-                # Verify count in database
-                count_result = supabase.table('scheme_master').select('id', count='exact').execute()
-                db_count = count_result.count if hasattr(count_result, 'count') else 0
-                print(f"[Scheme Fetch] Total schemes in database: {db_count}")
+            stats = await sync_scheme_master(supabase, schemes)
+
+            print(f"[Scheme Fetch] ✅ Completed!")
+            print(f"[Scheme Fetch] New: {stats['new']}, Changed: {stats['changed']}, "
+                  f"Unchanged: {stats['unchanged']}, Deactivated: {stats['deactivated']}")
+
+            if stats['written'] or stats['deactivated']:
+                await notify_scheme_sync()
+            else:
+                print("[Scheme Fetch] scheme_master already up to date")
+
+            return stats
 
         except Exception as e:
             print(f"[ERROR] Scheme fetch failed: {str(e)}")
@@ -0,0 +1,184 @@
+"""
+Asset Class Classifier
+Maps mutual fund scheme names to an asset class (Equity, Debt, Hybrid, Gold, Liquid)
+and a finer sub-category. Runs once per scheme during the scheme list sync; the
+result is stored on scheme_master and joined onto holdings by scheme_code.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_ASSET_CLASS = 'Equity'
+
+# Priority order matters: the first class with any keyword in the name wins
+# (e.g. "Gold ETF Fund of Fund" is Gold, "Liquid Fund - Growth" is Liquid)
+ASSET_CLASS_RULES = [
+    ('Gold', ['gold']),
+    ('Liquid', ['liquid', 'overnight', 'ultra short']),
+    ('Debt', [
+        'debt', 'bond', 'income', 'gilt', 'treasury', 'corporate bond',
+        'banking', 'psu', 'credit', 'duration', 'dynamic bond', 'money market'
+    ]),
+    ('Hybrid', [
+        'hybrid', 'balanced', 'aggressive', 'conservative', 'dynamic asset',
+        'multi asset', 'equity savings'
+    ]),
+    ('Equity', [
+        'equity', 'stock', 'elss', 'large cap', 'mid cap', 'small cap',
+        'multi cap', 'flexi cap', 'focused', 'dividend', 'growth', 'value',
+        'index', 'nifty', 'sensex', 'sector', 'thematic'
+    ]),
+]
+
+# Sub-categories within each asset class, also in priority order
+SUB_CATEGORY_RULES = {
+    'Equity': [
+        ('ELSS', ['elss', 'tax saver', 'tax saving']),
+        ('Large & Mid Cap', ['large & mid', 'large and mid']),
+        ('Large Cap', ['large cap', 'largecap', 'bluechip', 'blue chip']),
+        ('Mid Cap', ['mid cap', 'midcap']),
+        ('Small Cap', ['small cap', 'smallcap']),
+        ('Multi Cap', ['multi cap', 'multicap']),
+        ('Flexi Cap', ['flexi cap', 'flexicap']),
+        ('Focused', ['focused']),
+        ('Dividend Yield', ['dividend yield']),
+        ('Value/Contra', ['value', 'contra']),
+        ('Index/ETF', ['index', 'nifty', 'sensex', 'etf']),
+        ('Sectoral/Thematic', ['sector', 'thematic', 'infrastructure', 'pharma', 'technology', 'consumption']),
+    ],
+    'Debt': [
+        ('Gilt', ['gilt']),
+        ('Banking & PSU', ['banking', 'psu']),
+        ('Corporate Bond', ['corporate bond']),
+        ('Credit Risk', ['credit']),
+        ('Dynamic Bond', ['dynamic bond']),
+        ('Money Market', ['money market']),
+        ('Floater', ['floater', 'floating']),
+        ('Short Duration', ['short duration', 'short term', 'low duration']),
+        ('Medium Duration', ['medium duration', 'medium term']),
+        ('Long Duration', ['long duration']),
+    ],
+    'Liquid': [
+        ('Overnight', ['overnight']),
+        ('Ultra Short Duration', ['ultra short']),
+        ('Liquid', ['liquid']),
+    ],
+    'Hybrid': [
+        ('Equity Savings', ['equity savings']),
+        ('Balanced Advantage', ['balanced advantage', 'dynamic asset']),
+        ('Multi Asset', ['multi asset']),
+        ('Aggressive Hybrid', ['aggressive']),
+        ('Conservative Hybrid', ['conservative']),
+        ('Balanced Hybrid', ['balanced', 'hybrid']),
+    ],
+    'Gold': [
+        ('Gold Fund of Fund', ['fund of fund', 'fof']),
+        ('Gold ETF', ['etf']),
+    ],
+}
+DEFAULT_SUB_CATEGORY = {'Gold': 'Gold Fund'}
+
+# scheme_master lookups per request (scheme codes travel in the URL of an in.() filter)
+LOOKUP_CHUNK_SIZE = 200
+
+
+class MultiPatternMatcher:
+    """
+    Single compiled regex over every keyword of an ordered rule list
+
+    Each keyword list becomes a named group inside a lookahead, so one scan of
+    the text finds keywords at every position (same semantics as substring
+    tests) and the highest-priority label wins.
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, List[str]]]):
+        self.labels = [label for label, _ in rules]
+        groups = []
+        for i, (_, keywords) in enumerate(rules):
+            alternatives = '|'.join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+            groups.append(f'(?P<g{i}>{alternatives})')
+        self._pattern = re.compile(f"(?=(?:{'|'.join(groups)}))")
+
+    def first(self, text: str) -> Optional[str]:
+        """Highest-priority label with a keyword in `text` (expects lowercase text)"""
+        best = None
+        for match in self._pattern.finditer(text):
+            rank = int(match.lastgroup[1:])
+            if best is None or rank < best:
+                best = rank
+                if rank == 0:
+                    break
+        return self.labels[best] if best is not None else None
+
+
+_asset_class_matcher = MultiPatternMatcher(ASSET_CLASS_RULES)
+_sub_category_matchers = {asset_class: MultiPatternMatcher(rules) for asset_class, rules in SUB_CATEGORY_RULES.items()}
+
+
+@lru_cache(maxsize=8192)
+def classify_scheme(scheme_name: str) -> Tuple[str, Optional[str]]:
+    """
+    Classify a scheme name
+
+    Returns:
+        (asset_class, sub_category) - sub_category is None when no rule matches
+    """
+    name = (scheme_name or '').lower()
+    asset_class = _asset_class_matcher.first(name) or DEFAULT_ASSET_CLASS
+
+    matcher = _sub_category_matchers.get(asset_class)
+    sub_category = (matcher.first(name) if matcher else None) or DEFAULT_SUB_CATEGORY.get(asset_class)
+    return asset_class, sub_category
+
+
+def detect_asset_class(scheme_name: str) -> str:
+    """
+    Detect asset class from mutual fund scheme name
+    Returns: Equity, Debt, Hybrid, Gold, or Liquid
+    """
+    return classify_scheme(scheme_name)[0]
+
+
+# =======================
+# SCHEME_MASTER LOOKUPS
+# =======================
+
+def fetch_scheme_asset_classes(client, scheme_codes: Iterable[str]) -> Dict[str, str]:
+    """scheme_code -> stored asset_class for the given codes (codes without one are omitted)"""
+    codes = sorted({str(code) for code in scheme_codes if code})
+    asset_classes = {}
+
+    for i in range(0, len(codes), LOOKUP_CHUNK_SIZE):
+        result = client.table('scheme_master') \
+            .select('scheme_code, asset_class') \
+            .in_('scheme_code', codes[i:i + LOOKUP_CHUNK_SIZE]) \
+            .execute()
+        for row in result.data or []:
+            if row.get('asset_class'):
+                asset_classes[str(row['scheme_code'])] = row['asset_class']
+
+    return asset_classes
+
+
+def stamp_asset_classes(client, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Set asset_class on holding rows from scheme_master, classifying by name
+    only for schemes the sync has not classified yet
+    """
+    try:
+        stored = fetch_scheme_asset_classes(client, (row.get('scheme_code') for row in rows)) if client else {}
+    except Exception as e:
+        print(f"[Asset Class] scheme_master lookup failed, classifying by name: {str(e)}")
+        stored = {}
+
+    for row in rows:
+        row['asset_class'] = stored.get(str(row.get('scheme_code'))) or detect_asset_class(row.get('scheme_name', ''))
+    return rows
+
+
+# Export functions
+__all__ = [
+    'classify_scheme', 'detect_asset_class', 'fetch_scheme_asset_classes',
+    'stamp_asset_classes', 'MultiPatternMatcher'
+]
@@ -3,17 +3,14 @@ Audit logging utility for tracking all data access and modifications.
 Logs user actions with IP address, user agent, and metadata.
 """
 
-import os
 from datetime import datetime
 from typing import Optional, Dict, Any
 from fastapi import Request
-from supabase import create_client
+from app.utils.db import get_supabase
 import json
 
 # Set up Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 # Valid actions for audit logging
 VALID_ACTIONS = [
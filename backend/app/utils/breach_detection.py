@@ -10,12 +10,10 @@ from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from fastapi import Request
-from supabase import create_client
+from app.utils.db import get_supabase
 
 # Set up Supabase client
-supabase_url = os.getenv("SUPABASE_URL")
-supabase_key = os.getenv("SUPABASE_SERVICE_KEY")
-supabase = create_client(supabase_url, supabase_key) if supabase_url and supabase_key else None
+supabase = get_supabase()
 
 # Email configuration
 ADMIN_EMAIL = "seyonshomefashion@gmail.com"
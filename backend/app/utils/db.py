@@ -0,0 +1,159 @@
+"""
+Database access layer.
+One shared Supabase client for blocking code (sync endpoints, worker threads,
+scripts) and one async PostgREST client over an HTTP/2 keep-alive pool for
+async handlers, so queries from the event loop neither block it nor open a
+new connection per request.
+"""
+
+import os
+import threading
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from supabase import Client, create_client
+
+# Async pool limits (per worker process)
+POOL_MAX_CONNECTIONS = 50
+POOL_MAX_KEEPALIVE = 20
+POOL_KEEPALIVE_EXPIRY = 30  # seconds
+
+REQUEST_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# PostgREST caps rows per request
+DEFAULT_PAGE_SIZE = 1000
+
+_sync_client: Optional[Client] = None
+_sync_lock = threading.Lock()
+
+# httpx async clients are bound to the loop that created them; scripts using
+# asyncio.run() get their own
+_async_clients: Dict[asyncio.AbstractEventLoop, AsyncPostgrestClient] = {}
+
+
+def _credentials():
+    # Read at first use, so scripts that load .env after importing still work
+    return os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
+
+
+def is_configured() -> bool:
+    url, key = _credentials()
+    return bool(url and key)
+
+
+def get_supabase() -> Optional[Client]:
+    """Shared synchronous Supabase client (None when credentials are not set)"""
+    global _sync_client
+    if _sync_client is None and is_configured():
+        with _sync_lock:
+            if _sync_client is None:
+                _sync_client = create_client(*_credentials())
+                print("[DB] Supabase client initialized")
+    return _sync_client
+
+
+def _create_async_client() -> AsyncPostgrestClient:
+    url, key = _credentials()
+    http = httpx.AsyncClient(
+        http2=True,
+        timeout=REQUEST_TIMEOUT,
+        follow_redirects=True,
+        limits=httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return AsyncPostgrestClient(
+        f"{url}/rest/v1",
+        headers={
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        },
+        http_client=http,
+    )
+
+
+def get_db() -> AsyncPostgrestClient:
+    """Async PostgREST client for the running event loop"""
+    if not is_configured():
+        raise RuntimeError("Supabase credentials are not set (SUPABASE_URL / SUPABASE_SERVICE_KEY)")
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        for stale in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[stale]
+        client = _async_clients[loop] = _create_async_client()
+    return client
+
+
+class _AsyncDatabase:
+    """
+    Module-level handle to the current loop's async client
+
+    `await db.table('x').select('*').eq('id', 1).execute()` - the same query
+    builder as the sync client, awaited.
+    """
+
+    def table(self, table: str):
+        return get_db().from_(table)
+
+    def from_(self, table: str):
+        return get_db().from_(table)
+
+    def rpc(self, func: str, params: Optional[Dict[str, Any]] = None):
+        return get_db().rpc(func, params or {})
+
+
+db = _AsyncDatabase()
+
+
+async def close_db():
+    """Close the async pool of the running loop (app shutdown)"""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+        print("[DB] Async connection pool closed")
+
+
+# =======================
+# QUERY HELPERS
+# =======================
+
+async def fetch_all(query) -> List[Dict[str, Any]]:
+    """Rows returned by a query builder ([] when none)"""
+    return (await query.execute()).data or []
+
+
+async def fetch_first(query) -> Optional[Dict[str, Any]]:
+    """First row returned by a query builder, or None"""
+    rows = await fetch_all(query)
+    return rows[0] if rows else None
+
+
+async def fetch_paged(make_query: Callable[[], Any], page_size: int = DEFAULT_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """
+    Every row of an ordered query, read page by page
+
+    Args:
+        make_query: Returns a fresh (ordered) query builder for each page
+    """
+    rows: List[Dict[str, Any]] = []
+    start = 0
+    while True:
+        page = await fetch_all(make_query().range(start, start + page_size - 1))
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+
+# Export functions
+__all__ = [
+    'db', 'get_db', 'get_supabase', 'close_db', 'is_configured',
+    'fetch_all', 'fetch_first', 'fetch_paged'
+]
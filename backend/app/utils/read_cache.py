@@ -0,0 +1,383 @@
+"""
+Read-Through Cache
+Caches the responses of read endpoints under tags (`user:{id}`,
+`table:promo_codes`), so a write endpoint drops everything derived from the
+rows it changed with one `invalidate_tags` call.
+
+Entries live in a pluggable backend: in-process (default, one cache per
+worker) or a SQLite file shared by every worker on the host
+(READ_CACHE_BACKEND=sqlite). Invalidations are also published on the
+invalidation bus, so in-process caches in other workers evict them too.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Tuple
+
+from app.utils.invalidation_bus import invalidation_bus, user_tag, table_tag
+from app.utils.ttl_cache import TTLCache
+
+READ_CACHE_MAX_ENTRIES = 20000
+
+# Safety net for writes made outside the app (dashboard edits, scripts)
+READ_CACHE_TTL = 5 * 60  # seconds
+
+BACKEND_MEMORY = 'memory'
+BACKEND_SQLITE = 'sqlite'
+
+# Argument types that identify a cached call; routes taking anything else
+# (request bodies, Request objects) are called through uncached
+_KEY_TYPES = (str, int, float, bool, type(None))
+
+_MISSING = object()
+
+
+# =======================
+# BACKENDS
+# =======================
+
+class MemoryBackend:
+    """Per-process store: a TTLCache plus a tag -> keys index"""
+
+    def __init__(self, name: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self._entries = TTLCache(name, max_entries, ttl_seconds)
+        self._tag_keys: Dict[str, Set[str]] = {}
+        self._key_tags: Dict[str, Tuple[str, ...]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        item = self._entries.get(key)
+        return _MISSING if item is None else item[0]
+
+    def set(self, key: str, value: Any, tags: Tuple[str, ...], ttl_seconds: Optional[float] = None):
+        # Values are wrapped so a cached None is told apart from a miss
+        self._entries.set(key, (value,), ttl_seconds)
+        with self._lock:
+            self._unindex(key)
+            self._key_tags[key] = tags
+            for tag in tags:
+                self._tag_keys.setdefault(tag, set()).add(key)
+            # Entries evicted or expired inside the TTLCache leave their keys
+            # behind; sweep them once the index outgrows the cache
+            if len(self._key_tags) > 2 * self._entries.max_entries:
+                for stale in [k for k in self._key_tags if k not in self._entries]:
+                    self._unindex(stale)
+
+    def _unindex(self, key: str):
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tag_keys.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tag_keys[tag]
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tag_keys.get(tag, ()))
+            for key in keys:
+                self._unindex(key)
+        for key in keys:
+            self._entries.invalidate(key)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._tag_keys.clear()
+            self._key_tags.clear()
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            tags = len(self._tag_keys)
+        return {**self._entries.stats(), 'backend': BACKEND_MEMORY, 'tags': tags}
+
+
+class SQLiteBackend:
+    """
+    Host-wide store in a SQLite file (WAL mode), shared by every worker process
+
+    Expiry uses wall-clock time since entries outlive the process that wrote
+    them; LRU order follows each entry's last read.
+    """
+
+    # Sets between expiry / size sweeps
+    PRUNE_INTERVAL = 64
+
+    def __init__(self, name: str, path: str, max_entries: int, ttl_seconds: float):
+        self.name = name
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+        with self._connect() as conn:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS cache_entries (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    expires_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS cache_tags (
+                    tag TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    PRIMARY KEY (tag, key)
+                );
+                CREATE INDEX IF NOT EXISTS idx_cache_tags_key ON cache_tags(key);
+                CREATE INDEX IF NOT EXISTS idx_cache_entries_used_at ON cache_entries(used_at);
+            """)
+        print(f"[{self.name}] Shared SQLite store at {path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Any:
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT value, expires_at FROM cache_entries WHERE key = ?", (key,)).fetchone()
+        if row is None or row[1] < now:
+            with self._lock:
+                self.misses += 1
+            return _MISSING
+        conn.execute("UPDATE cache_entries SET used_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.hits += 1
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, tags: Tuple[str, ...], ttl_seconds: Optional[float] = None):
+        now = time.time()
+        expires_at = now + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, blob, expires_at, now)
+            )
+            conn.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+            conn.executemany("INSERT OR IGNORE INTO cache_tags (tag, key) VALUES (?, ?)", [(tag, key) for tag in tags])
+
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_INTERVAL == 0
+        if prune:
+            self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float):
+        """Drop expired entries, then the least recently used ones above max_entries"""
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+            excess = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0] - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY used_at LIMIT ?)",
+                    (excess,)
+                )
+            conn.execute("DELETE FROM cache_tags WHERE key NOT IN (SELECT key FROM cache_entries)")
+
+    def invalidate_tags(self, tags: Iterable[str]) -> int:
+        tags = list(tags)
+        if not tags:
+            return 0
+        marks = ','.join('?' * len(tags))
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            removed = conn.execute(
+                f"DELETE FROM cache_entries WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({marks}))",
+                tags
+            ).rowcount
+            conn.execute(
+                f"DELETE FROM cache_tags WHERE key IN (SELECT key FROM cache_tags WHERE tag IN ({marks}))",
+                tags
+            )
+        with self._lock:
+            self.invalidations += removed
+        return removed
+
+    def clear(self):
+        conn = self._connect()
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("DELETE FROM cache_tags")
+
+    def stats(self) -> Dict[str, Any]:
+        conn = self._connect()
+        entries = conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        tags = conn.execute("SELECT COUNT(DISTINCT tag) FROM cache_tags").fetchone()[0]
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'backend': BACKEND_SQLITE,
+                'path': self.path,
+                'entries': entries,
+                'tags': tags,
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+                'invalidations': self.invalidations,
+            }
+
+
+# =======================
+# READ-THROUGH CACHE
+# =======================
+
+class ReadThroughCache:
+    """Tagged cache in front of a backend, with a decorator for route functions"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def generation(self) -> int:
+        """Token read before loading; pass it to `set` so a load that raced an invalidation is not stored"""
+        with self._lock:
+            return self._generation
+
+    def get(self, key: str) -> Any:
+        """Cached value, or the module's _MISSING sentinel"""
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any, tags: Iterable[str], ttl_seconds: Optional[float] = None,
+            generation: Optional[int] = None) -> bool:
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return False
+        self.backend.set(key, value, tuple(tags), ttl_seconds)
+        return True
+
+    def invalidate_tags(self, *tags: str) -> int:
+        """Drop every entry carrying any of `tags` (call after the write succeeds)"""
+        with self._lock:
+            self._generation += 1
+        return self.backend.invalidate_tags(tags)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+        self.backend.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.backend.stats()
+
+    def cached(self, *tags: str, ttl_seconds: Optional[float] = None):
+        """
+        Cache a route function's result, keyed by its arguments
+
+        Tags are templates over the route's arguments, e.g. 'user:{user_id}'.
+        The caller (`current_user.sub`) is part of the key, so a cached response
+        is only served to the user whose ownership check produced it. Calls with
+        arguments other than plain values (request bodies, Request objects) and
+        calls that raise are never cached. Place below the @router decorator.
+        """
+        def decorator(func: Callable):
+            signature = inspect.signature(func)
+            prefix = f"{func.__module__}.{func.__qualname__}"
+
+            def lookup(args, kwargs):
+                bound = signature.bind(*args, **kwargs)
+                bound.apply_defaults()
+                parts = []
+                for name, value in bound.arguments.items():
+                    if hasattr(value, 'sub'):
+                        value = value.sub
+                    if not isinstance(value, _KEY_TYPES):
+                        return None, None
+                    parts.append(f"{name}={value!r}")
+                key = f"{prefix}({', '.join(parts)})"
+                return key, tuple(tag.format(**bound.arguments) for tag in tags)
+
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    key, entry_tags = lookup(args, kwargs)
+                    if key is None:
+                        return await func(*args, **kwargs)
+                    value = self.get(key)
+                    if value is not _MISSING:
+                        return value
+                    generation = self.generation()
+                    value = await func(*args, **kwargs)
+                    self.set(key, value, entry_tags, ttl_seconds, generation)
+                    return value
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key, entry_tags = lookup(args, kwargs)
+                if key is None:
+                    return func(*args, **kwargs)
+                value = self.get(key)
+                if value is not _MISSING:
+                    return value
+                generation = self.generation()
+                value = func(*args, **kwargs)
+                self.set(key, value, entry_tags, ttl_seconds, generation)
+                return value
+            return wrapper
+
+        return decorator
+
+
+def _create_backend():
+    name = 'Read Cache'
+    if os.getenv("READ_CACHE_BACKEND", BACKEND_MEMORY).lower() == BACKEND_SQLITE:
+        path = os.getenv("READ_CACHE_PATH") or os.path.join(tempfile.gettempdir(), 'finedge360_read_cache.sqlite3')
+        try:
+            return SQLiteBackend(name, path, READ_CACHE_MAX_ENTRIES, READ_CACHE_TTL)
+        except sqlite3.Error as e:
+            print(f"[{name}] Shared store unavailable ({e}), using in-process cache")
+    return MemoryBackend(name, READ_CACHE_MAX_ENTRIES, READ_CACHE_TTL)
+
+
+read_cache = ReadThroughCache(_create_backend())
+
+# Module-level shorthand for routes
+cached_route = read_cache.cached
+
+
+def invalidate_tags(*tags: str) -> int:
+    """Drop entries carrying any of `tags` in this worker and, via the bus, in every other one"""
+    removed = read_cache.invalidate_tags(*tags)
+    invalidation_bus.publish(*tags)
+    return removed
+
+
+invalidation_bus.subscribe(lambda tags: read_cache.invalidate_tags(*tags))
+
+
+# Export functions
+__all__ = [
+    'read_cache', 'cached_route', 'invalidate_tags', 'user_tag', 'table_tag',
+    'ReadThroughCache', 'MemoryBackend', 'SQLiteBackend'
+]
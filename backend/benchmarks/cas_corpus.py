@@ -0,0 +1,275 @@
+"""
+Synthetic CAMS statement corpus for parser benchmarks
+Generates CAS-style PDFs (holdings table + transaction pages) and Excel exports locally,
+with no real investor data
+
+Usage: python backend/benchmarks/cas_corpus.py [output_dir]
+"""
+
+import os
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+# (name, holdings, pages) - pages include the holdings summary and transaction detail pages
+CORPUS_PROFILES = [
+    ('small', 5, 2),
+    ('medium', 50, 20),
+    ('large', 300, 150),
+]
+
+AMCS = ['HDFC', 'ICICI Prudential', 'SBI', 'Axis', 'Kotak', 'Nippon India', 'Aditya Birla Sun Life', 'Mirae Asset']
+CATEGORIES = ['Flexi Cap', 'Large Cap', 'Mid Cap', 'Small Cap', 'ELSS Tax Saver', 'Liquid', 'Corporate Bond',
+              'Balanced Advantage', 'Nifty 50 Index', 'Gold ETF FoF', 'Short Duration', 'Multi Asset']
+PLANS = ['Direct Plan - Growth', 'Regular Plan - Growth', 'Direct Plan - IDCW']
+
+# Page geometry (A4, points)
+PAGE_WIDTH = 595
+PAGE_HEIGHT = 842
+MARGIN = 20
+TABLE_ROW_HEIGHT = 14
+TABLE_COLUMNS = [
+    ('Folio No.', 62), ('ISIN', 62), ('Scheme Name', 190), ('Cost Value (INR)', 50),
+    ('Unit Balance', 45), ('NAV Date', 46), ('NAV (INR)', 45), ('Market Value (INR)', 55),
+]
+TEXT_LINE_HEIGHT = 12
+
+
+# =======================
+# SYNTHETIC DATA
+# =======================
+
+def synthetic_holdings(count: int, seed: int = 7) -> List[Dict]:
+    """Random but deterministic holdings; two or three schemes share each folio"""
+    rng = random.Random(seed)
+    holdings = []
+    folio = 10000000
+
+    for i in range(count):
+        if i % rng.choice([2, 3]) == 0:
+            folio += rng.randint(1, 9999)
+        amc = rng.choice(AMCS)
+        units = round(rng.uniform(5, 5000), 3)
+        nav = round(rng.uniform(10, 900), 4)
+        cost = round(units * nav * rng.uniform(0.6, 1.2), 2)
+        holdings.append({
+            'folio_number': str(folio),
+            'isin': f"INF{rng.randint(100, 999)}K01{rng.randint(100, 999)}",
+            'scheme_name': f"{amc} {rng.choice(CATEGORIES)} Fund - {rng.choice(PLANS)}",
+            'amc_name': f"{amc} Mutual Fund",
+            'cost_value': cost,
+            'unit_balance': units,
+            'nav_date': '13-Dec-2025',
+            'nav': nav,
+            'market_value': round(units * nav, 2),
+        })
+
+    return holdings
+
+
+def synthetic_transaction_lines(holdings: List[Dict], line_count: int, seed: int = 11) -> List[str]:
+    """CAS transaction detail lines (folio header, scheme/ISIN line, dated transactions)"""
+    rng = random.Random(seed)
+    lines = []
+    per_scheme = max(3, line_count // max(len(holdings), 1) - 3)
+
+    while len(lines) < line_count:
+        for holding in holdings:
+            lines.append(f"Folio No: {holding['folio_number']} / 0 PAN: XXXXX0000X KYC: OK")
+            lines.append(f"{holding['scheme_name']} - ISIN: {holding['isin']}(Advisor: DIRECT) Registrar : CAMS")
+            lines.append("Opening Unit Balance: 0.000")
+
+            txn_date = date(2016, 1, 5)
+            balance = 0.0
+            for _ in range(per_scheme):
+                txn_date += timedelta(days=rng.randint(25, 35))
+                nav = rng.uniform(10, 900)
+                if balance > 10 and rng.random() < 0.1:
+                    units = -round(balance * rng.uniform(0.1, 0.4), 3)
+                    description = 'Redemption'
+                else:
+                    units = round(rng.uniform(1, 100), 3)
+                    description = 'Purchase - SIP Instalment'
+                balance = round(balance + units, 3)
+                amount = abs(units) * nav
+                amount_text = f"({amount:,.2f})" if units < 0 else f"{amount:,.2f}"
+                units_text = f"({abs(units):,.3f})" if units < 0 else f"{units:,.3f}"
+                lines.append(
+                    f"{txn_date.strftime('%d-%b-%Y')} {description} {amount_text} {units_text} {nav:,.4f} {balance:,.3f}"
+                )
+                if len(lines) >= line_count:
+                    return lines
+
+    return lines
+
+
+# =======================
+# MINIMAL PDF WRITER
+# =======================
+
+def _pdf_escape(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def _text_op(x: float, y: float, text: str, size: int) -> str:
+    return f"BT /F1 {size} Tf {x:.1f} {y:.1f} Td ({_pdf_escape(text)}) Tj ET"
+
+
+def _holdings_page(rows: List[Dict], include_title: bool) -> str:
+    """Content stream for one holdings table page (ruled grid so table extraction works)"""
+    ops = []
+    top = PAGE_HEIGHT - MARGIN
+
+    if include_title:
+        ops.append(_text_op(MARGIN, top - 12, 'Consolidated Account Summary - Synthetic Mutual Fund Registry', 10))
+        top -= 30
+
+    table_rows = [[label for label, _ in TABLE_COLUMNS]] + [[
+        row['folio_number'], row['isin'], row['scheme_name'][:58], f"{row['cost_value']:,.2f}",
+        f"{row['unit_balance']:,.3f}", row['nav_date'], f"{row['nav']:,.4f}", f"{row['market_value']:,.2f}",
+    ] for row in rows]
+
+    x_edges = [MARGIN]
+    for _, width in TABLE_COLUMNS:
+        x_edges.append(x_edges[-1] + width)
+    bottom = top - TABLE_ROW_HEIGHT * len(table_rows)
+
+    # Grid
+    ops.append('0.5 w')
+    for i in range(len(table_rows) + 1):
+        y = top - i * TABLE_ROW_HEIGHT
+        ops.append(f"{x_edges[0]} {y} m {x_edges[-1]} {y} l S")
+    for x in x_edges:
+        ops.append(f"{x} {top} m {x} {bottom} l S")
+
+    # Cell text
+    for i, cells in enumerate(table_rows):
+        y = top - (i + 1) * TABLE_ROW_HEIGHT + 4
+        for j, cell in enumerate(cells):
+            ops.append(_text_op(x_edges[j] + 2, y, cell, 5 if i else 6))
+
+    return '\n'.join(ops)
+
+
+def _text_page(lines: List[str]) -> str:
+    """Content stream for one transaction detail page"""
+    ops = []
+    y = PAGE_HEIGHT - MARGIN - TEXT_LINE_HEIGHT
+    for line in lines:
+        ops.append(_text_op(MARGIN, y, line, 8))
+        y -= TEXT_LINE_HEIGHT
+    return '\n'.join(ops)
+
+
+def write_pdf(path: Path, page_streams: List[str]):
+    """Write an uncompressed PDF with one Helvetica font and the given content streams"""
+    objects = {1: None, 2: None, 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"}
+    page_ids = []
+    next_id = 4
+
+    for stream in page_streams:
+        data = stream.encode('latin-1', errors='replace')
+        content_id, page_id = next_id, next_id + 1
+        next_id += 2
+        objects[content_id] = f"<< /Length {len(data)} >>\nstream\n{stream}\nendstream"
+        objects[page_id] = (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>"
+        )
+        page_ids.append(page_id)
+
+    objects[1] = "<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for obj_id in sorted(objects):
+        offsets[obj_id] = len(out)
+        out += f"{obj_id} 0 obj\n{objects[obj_id]}\nendobj\n".encode('latin-1', errors='replace')
+
+    xref_offset = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for obj_id in sorted(objects):
+        out += f"{offsets[obj_id]:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+
+    path.write_bytes(bytes(out))
+
+
+# =======================
+# CORPUS FILES
+# =======================
+
+def generate_cas_pdf(path: Path, holdings: List[Dict], pages: int):
+    """Holdings summary pages followed by transaction detail pages, `pages` in total"""
+    rows_per_page = (PAGE_HEIGHT - 2 * MARGIN - 30) // TABLE_ROW_HEIGHT - 1
+    streams = [
+        _holdings_page(holdings[i:i + rows_per_page], include_title=(i == 0))
+        for i in range(0, len(holdings), rows_per_page)
+    ]
+
+    lines_per_page = (PAGE_HEIGHT - 2 * MARGIN) // TEXT_LINE_HEIGHT - 1
+    text_pages = max(pages - len(streams), 0)
+    lines = synthetic_transaction_lines(holdings, text_pages * lines_per_page)
+    streams.extend(_text_page(lines[i:i + lines_per_page]) for i in range(0, len(lines), lines_per_page))
+
+    write_pdf(path, streams)
+
+
+def generate_cas_excel(path: Path, holdings: List[Dict]):
+    """CAMS-style Excel export: title rows, header row, folio/AMC only on the first row of each group"""
+    import pandas as pd
+
+    rows = [['Consolidated Account Statement (synthetic)'] + [None] * 7, [None] * 8]
+    rows.append(['Folio No', 'AMC Name', 'Scheme Name', 'Unit Balance', 'NAV', 'Cost Value', 'Market Value', 'ISIN'])
+
+    previous_folio = None
+    for holding in holdings:
+        first_in_folio = holding['folio_number'] != previous_folio
+        previous_folio = holding['folio_number']
+        rows.append([
+            holding['folio_number'] if first_in_folio else None,
+            holding['amc_name'] if first_in_folio else None,
+            holding['scheme_name'],
+            f"{holding['unit_balance']:,.3f}",
+            holding['nav'],
+            f"₹{holding['cost_value']:,.2f}",
+            holding['market_value'],
+            holding['isin'],
+        ])
+
+    pd.DataFrame(rows).to_excel(path, header=False, index=False)
+
+
+def generate_corpus(output_dir: Path, profiles=CORPUS_PROFILES) -> List[Dict]:
+    """
+    Generate the benchmark corpus (skips files that already exist)
+
+    Returns:
+        Manifest entries: path, kind, profile, holdings, pages
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = []
+
+    for name, holdings_count, pages in profiles:
+        holdings = synthetic_holdings(holdings_count)
+
+        pdf_path = output_dir / f"cas_{name}_{holdings_count}h_{pages}p.pdf"
+        if not pdf_path.exists():
+            generate_cas_pdf(pdf_path, holdings, pages)
+        manifest.append({'path': pdf_path, 'kind': 'pdf', 'profile': name, 'holdings': holdings_count, 'pages': pages})
+
+        xlsx_path = output_dir / f"cas_{name}_{holdings_count}h.xlsx"
+        if not xlsx_path.exists():
+            generate_cas_excel(xlsx_path, holdings)
+        manifest.append({'path': xlsx_path, 'kind': 'excel', 'profile': name, 'holdings': holdings_count, 'pages': None})
+
+    return manifest
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(os.path.dirname(__file__)) / 'corpus'
+    for entry in generate_corpus(target):
+        print(f"[Corpus] {entry['path']}")
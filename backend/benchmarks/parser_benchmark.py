@@ -0,0 +1,271 @@
+"""
+CAMS parser throughput benchmark
+Runs parse_cams_pdf, parse_cams_text, parse_cams_excel and the CAS transaction parser over
+a locally generated corpus and reports pages/s, holdings/s, peak memory and scheme-resolution time
+
+Runs fully offline: scheme code lookups go to an in-memory stub of the scheme_mappings table.
+
+Usage:
+    python backend/benchmarks/parser_benchmark.py
+    python backend/benchmarks/parser_benchmark.py --profiles small,medium --repeat 3
+    python backend/benchmarks/parser_benchmark.py --extra-dir ~/anonymized_cas --json results.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add backend directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.cas_corpus import CORPUS_PROFILES, generate_corpus, synthetic_holdings
+
+
+# =======================
+# STUB SCHEME MAPPING STORE
+# =======================
+
+class _StubResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class _StubQuery:
+    """Just enough of the PostgREST query builder for get_scheme_code"""
+
+    def __init__(self, rows: List[Dict]):
+        self._rows = rows
+        self._op = 'select'
+        self._filters = []
+        self._payload = None
+
+    def select(self, *columns, **kwargs):
+        self._op = 'select'
+        return self
+
+    def insert(self, payload):
+        self._op, self._payload = 'insert', payload
+        return self
+
+    def update(self, payload):
+        self._op, self._payload = 'update', payload
+        return self
+
+    def eq(self, column, value):
+        self._filters.append((column, value))
+        return self
+
+    def execute(self):
+        matched = [r for r in self._rows if all(r.get(c) == v for c, v in self._filters)]
+        if self._op == 'insert':
+            self._rows.append(dict(self._payload))
+            return _StubResult([self._payload])
+        if self._op == 'update':
+            return _StubResult(matched)
+        return _StubResult([dict(r) for r in matched])
+
+
+class StubSchemeMappingStore:
+    """In-memory scheme_mappings table standing in for the Supabase client"""
+
+    def __init__(self, scheme_names: List[str]):
+        self.rows = [
+            {'id': i, 'scheme_name': name, 'scheme_code': str(100000 + i), 'usage_count': 1}
+            for i, name in enumerate(scheme_names)
+        ]
+        self._initial = [dict(r) for r in self.rows]
+
+    def reset(self):
+        """Drop mappings learned during a run so every run starts from the same state"""
+        self.rows[:] = [dict(r) for r in self._initial]
+
+    def table(self, name: str) -> _StubQuery:
+        return _StubQuery(self.rows)
+
+    def rpc(self, name: str, params: Dict[str, Any]):
+        return 0
+
+
+def seeded_scheme_names(profiles) -> List[str]:
+    """Known mappings: every other corpus scheme, so both exact and fuzzy paths are exercised"""
+    names = set()
+    for _, holdings_count, _ in profiles:
+        for i, holding in enumerate(synthetic_holdings(holdings_count)):
+            if i % 2 == 0:
+                names.add(holding['scheme_name'])
+    return sorted(names)
+
+
+# =======================
+# MEASUREMENT
+# =======================
+
+class SchemeResolutionTimer:
+    """Wraps parser.get_scheme_code and accumulates time spent resolving scheme codes"""
+
+    def __init__(self, parser_module):
+        self.parser_module = parser_module
+        self.original = parser_module.get_scheme_code
+        self.seconds = 0.0
+        self.calls = 0
+
+    def __call__(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self.original(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.calls += 1
+
+    def __enter__(self):
+        self.parser_module.get_scheme_code = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.parser_module.get_scheme_code = self.original
+
+
+def count_pdf_pages(path: Path) -> int:
+    import pdfplumber
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def run_case(
+    name: str,
+    func: Callable[[], Any],
+    parser_module,
+    store: StubSchemeMappingStore,
+    pages: Optional[int],
+    repeat: int,
+    measure_memory: bool
+) -> Dict[str, Any]:
+    """Time `func` (best of `repeat`), then measure its peak memory in a separate run"""
+    best = None
+
+    for _ in range(repeat):
+        store.reset()
+        with SchemeResolutionTimer(parser_module) as timer, contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+
+        if best is None or elapsed < best['seconds']:
+            records = result if isinstance(result, list) else list(result)
+            best = {
+                'seconds': elapsed,
+                'records': len(records),
+                'scheme_resolution_seconds': timer.seconds,
+                'scheme_resolution_calls': timer.calls,
+            }
+
+    peak_mb = None
+    if measure_memory:
+        store.reset()
+        tracemalloc.start()
+        with contextlib.redirect_stdout(io.StringIO()):
+            func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peak_mb = peak / (1024 * 1024)
+
+    seconds = best['seconds']
+    return {
+        'case': name,
+        'pages': pages,
+        'records': best['records'],
+        'seconds': round(seconds, 4),
+        'pages_per_second': round(pages / seconds, 2) if pages and seconds > 0 else None,
+        'records_per_second': round(best['records'] / seconds, 2) if seconds > 0 else None,
+        'peak_memory_mb': round(peak_mb, 2) if peak_mb is not None else None,
+        'scheme_resolution_seconds': round(best['scheme_resolution_seconds'], 4),
+        'scheme_resolution_calls': best['scheme_resolution_calls'],
+    }
+
+
+def benchmark_file(entry: Dict, parser_module, store, repeat: int, measure_memory: bool) -> List[Dict]:
+    """All applicable parsers for one corpus file"""
+    from app.apis.portfolio.transaction_parser import iter_cas_transactions
+
+    path = entry['path']
+    label = path.name
+    results = []
+
+    if entry['kind'] == 'pdf':
+        pages = entry.get('pages') or count_pdf_pages(path)
+        cases = [
+            ('parse_cams_pdf', lambda: parser_module.parse_cams_pdf(str(path))),
+            ('parse_cams_text', lambda: parser_module.parse_cams_text(str(path))),
+            ('iter_cas_transactions', lambda: list(iter_cas_transactions(str(path)))),
+        ]
+    else:
+        pages = None
+        cases = [
+            ('parse_cams_excel', lambda: parser_module.parse_cams_excel(str(path), streaming=False)),
+            ('parse_cams_excel[streaming]', lambda: parser_module.parse_cams_excel(str(path), streaming=True)),
+        ]
+
+    for case_name, func in cases:
+        result = run_case(case_name, func, parser_module, store, pages, repeat, measure_memory)
+        result['file'] = label
+        results.append(result)
+        print(
+            f"[Benchmark] {label:32} {case_name:28} {result['seconds']:>8.3f}s "
+            f"{result['pages_per_second'] or '-':>8} pages/s {result['records_per_second'] or '-':>10} rec/s "
+            f"{result['peak_memory_mb'] or '-':>8} MB  schemes {result['scheme_resolution_seconds']:.3f}s"
+        )
+
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="CAMS parser throughput benchmark")
+    arg_parser.add_argument('--corpus-dir', default=str(Path(__file__).parent / 'corpus'),
+                            help="Where generated corpus files are written (reused between runs)")
+    arg_parser.add_argument('--profiles', default=','.join(p[0] for p in CORPUS_PROFILES),
+                            help="Comma-separated corpus profiles to run (small, medium, large)")
+    arg_parser.add_argument('--extra-dir', default=None,
+                            help="Directory of additional local statements (e.g. anonymized CAS PDFs/Excel)")
+    arg_parser.add_argument('--repeat', type=int, default=1, help="Timing runs per case (best is reported)")
+    arg_parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory run")
+    arg_parser.add_argument('--json', default=None, help="Write results to this JSON file")
+    args = arg_parser.parse_args()
+
+    # Keep the parser offline: no Supabase client, stubbed scheme mapping store
+    os.environ.pop('SUPABASE_URL', None)
+    os.environ.pop('SUPABASE_SERVICE_KEY', None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        from app.apis.portfolio import parser as parser_module
+
+    selected = set(args.profiles.split(','))
+    profiles = [p for p in CORPUS_PROFILES if p[0] in selected]
+    store = StubSchemeMappingStore(seeded_scheme_names(profiles))
+    parser_module.supabase = store
+
+    manifest = generate_corpus(Path(args.corpus_dir), profiles)
+    if args.extra_dir:
+        for path in sorted(Path(args.extra_dir).expanduser().iterdir()):
+            kind = 'pdf' if path.suffix.lower() == '.pdf' else 'excel' if path.suffix.lower() in ('.xlsx', '.xls') else None
+            if kind:
+                manifest.append({'path': path, 'kind': kind, 'profile': 'extra', 'holdings': None, 'pages': None})
+
+    print(f"[Benchmark] {len(manifest)} files, repeat={args.repeat}, memory={'off' if args.no_memory else 'on'}")
+    results = []
+    for entry in manifest:
+        results.extend(benchmark_file(entry, parser_module, store, args.repeat, not args.no_memory))
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"[Benchmark] Results written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
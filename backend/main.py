@@ -17,7 +17,15 @@ logger = logging.getLogger(__name__)
 dotenv.load_dotenv()
 
 from databutton_app.mw.auth_mw import AuthConfig, get_authorized_user
-from app.security.middleware import SecurityHeadersMiddleware, RateLimitMiddleware, RequestLoggingMiddleware
+from app.security.middleware import SecurityHeadersMiddleware, RateLimitMiddleware, RequestLoggingMiddleware, RequestSizeLimitMiddleware
+from app.utils.db import close_db
+from app.utils.invalidation_bus import start_invalidation_bus, stop_invalidation_bus
+
+# Request body limits per path; the upload limit matches upload_intake.MAX_UPLOAD_SIZE
+# plus room for the multipart boundaries and form fields
+REQUEST_SIZE_LIMITS = {
+    "/routes/upload-portfolio": 10 * 1024 * 1024 + 64 * 1024,
+}
 
 
 class CustomCORSMiddleware(BaseHTTPMiddleware):
@@ -169,6 +177,9 @@ def create_app() -> FastAPI:
     app = FastAPI()
 
     # Add security middlewares (ORDER MATTERS - applied in reverse order)
+    # 0. Body size limits (innermost, refuses oversized uploads before the form is spooled)
+    app.add_middleware(RequestSizeLimitMiddleware, limits=REQUEST_SIZE_LIMITS)
+
     # 1. Request logging (first to log everything)
     app.add_middleware(RequestLoggingMiddleware)
 
@@ -183,6 +194,17 @@ def create_app() -> FastAPI:
 
     app.include_router(import_api_routers())
 
+    # Cross-worker cache invalidation (Postgres LISTEN/NOTIFY)
+    @app.on_event("startup")
+    async def connect_invalidation_bus():
+        start_invalidation_bus()
+
+    # Release the shared async database pool
+    @app.on_event("shutdown")
+    async def close_database_pool():
+        stop_invalidation_bus()
+        await close_db()
+
     # Test endpoint to verify CORS is working
     @app.get("/test-cors")
     async def test_cors():
@@ -0,0 +1,21 @@
+-- Migration 019: Add file_hash column to uploaded_portfolio_files
+-- Purpose: Store the SHA-256 of each uploaded statement (computed while streaming the upload)
+-- Date: 2026-10-19
+
+-- Add file_hash column to uploaded_portfolio_files
+ALTER TABLE public.uploaded_portfolio_files
+ADD COLUMN IF NOT EXISTS file_hash VARCHAR(64);
+
+-- Create index for duplicate-upload lookups
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_user_hash
+ON public.uploaded_portfolio_files(user_id, file_hash);
+
+-- Add comment
+COMMENT ON COLUMN public.uploaded_portfolio_files.file_hash IS 'SHA-256 hex digest of the uploaded statement content';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 019 completed successfully!';
+  RAISE NOTICE 'Added file_hash column to uploaded_portfolio_files table';
+END $$;
@@ -0,0 +1,18 @@
+-- Migration 020: Add record_digest column to scheme_master
+-- Purpose: Let the scheme list sync skip unchanged schemes by comparing content digests
+-- Date: 2026-10-19
+
+-- Add record_digest column to scheme_master
+ALTER TABLE public.scheme_master
+ADD COLUMN IF NOT EXISTS record_digest VARCHAR(64);
+
+-- Add comment
+COMMENT ON COLUMN public.scheme_master.record_digest IS 'SHA-256 of the columns written by the MFAPI sync; rows are rewritten only when it changes';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 020 completed successfully!';
+  RAISE NOTICE 'Added record_digest column to scheme_master table';
+  RAISE NOTICE 'The next scheme sync rewrites every row once to populate digests';
+END $$;
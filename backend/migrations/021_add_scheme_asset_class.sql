@@ -0,0 +1,33 @@
+-- Migration 021: Add asset_class column to scheme_master
+-- Purpose: Store the asset class (and sub_category) computed once per scheme by the scheme list sync,
+--          so holdings pick it up by scheme_code instead of re-scanning scheme names
+-- Date: 2026-10-19
+
+-- Add asset_class column to scheme_master (sub_category already exists since migration 009)
+ALTER TABLE public.scheme_master
+ADD COLUMN IF NOT EXISTS asset_class VARCHAR(20);
+
+-- Create index for allocation queries
+CREATE INDEX IF NOT EXISTS idx_scheme_master_asset_class
+ON public.scheme_master(asset_class);
+
+-- Add comments
+COMMENT ON COLUMN public.scheme_master.asset_class IS 'Asset class from the scheme sync classifier: Equity, Debt, Hybrid, Gold, or Liquid';
+COMMENT ON COLUMN public.scheme_master.sub_category IS 'Sub-category from the scheme sync classifier (e.g. Large Cap, Gilt, Overnight)';
+
+-- Copy already-classified schemes onto holdings
+-- (schemes synced before this migration are classified by app/tasks/backfill_asset_class.py)
+UPDATE public.portfolio_holdings h
+SET asset_class = s.asset_class
+FROM public.scheme_master s
+WHERE h.scheme_code = s.scheme_code
+  AND s.asset_class IS NOT NULL
+  AND h.asset_class IS DISTINCT FROM s.asset_class;
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 021 completed successfully!';
+  RAISE NOTICE 'Added asset_class column to scheme_master table';
+  RAISE NOTICE 'Run app/tasks/backfill_asset_class.py to classify existing schemes and holdings';
+END $$;
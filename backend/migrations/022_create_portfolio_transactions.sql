@@ -0,0 +1,49 @@
+-- Migration 022: Create Portfolio Transactions Table
+-- Purpose: Keep the dated purchase/redemption history from uploaded CAS statements,
+--          the cash flows behind per-holding, per-goal and portfolio XIRR
+-- Date: 2026-10-19
+
+-- Create portfolio_transactions table
+CREATE TABLE IF NOT EXISTS public.portfolio_transactions (
+    id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    folio_number VARCHAR(50) NOT NULL,
+    scheme_name VARCHAR(255) NOT NULL,
+    isin VARCHAR(12),
+    transaction_date DATE NOT NULL,
+    transaction_type VARCHAR(20) NOT NULL,
+    amount DECIMAL(15, 2) NOT NULL,
+    units DECIMAL(18, 4) NOT NULL,
+    nav DECIMAL(15, 4) NOT NULL,
+    unit_balance DECIMAL(18, 4) NOT NULL,
+    description TEXT,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    -- Re-uploading an overlapping statement must not duplicate transactions
+    UNIQUE(user_id, folio_number, scheme_name, transaction_date, transaction_type, units, amount)
+);
+
+-- Create indexes for faster queries
+CREATE INDEX IF NOT EXISTS idx_portfolio_transactions_user
+ON public.portfolio_transactions(user_id, transaction_date);
+
+-- Add RLS policies
+ALTER TABLE public.portfolio_transactions ENABLE ROW LEVEL SECURITY;
+
+-- Users can only read their own transactions
+CREATE POLICY "Users can view own portfolio transactions"
+ON public.portfolio_transactions
+FOR SELECT
+USING (auth.uid() = user_id);
+
+-- Add comments
+COMMENT ON TABLE public.portfolio_transactions IS 'Mutual fund transactions parsed from uploaded CAS statements';
+COMMENT ON COLUMN public.portfolio_transactions.transaction_type IS 'PURCHASE, SIP, REDEMPTION, SWITCH_IN, SWITCH_OUT or DIVIDEND_REINVEST';
+COMMENT ON COLUMN public.portfolio_transactions.units IS 'Signed units: positive for inflows, negative for redemptions and switch-outs';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 022 completed successfully!';
+  RAISE NOTICE 'Created portfolio_transactions table with indexes and RLS policies';
+END $$;
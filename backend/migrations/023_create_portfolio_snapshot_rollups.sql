@@ -0,0 +1,121 @@
+-- Migration 023: Create Portfolio Snapshot Rollups
+-- Purpose: Keep the last snapshot of every ISO week and calendar month per user, maintained
+--          incrementally by a trigger as daily snapshots are written, so weekly/monthly charts
+--          read one narrow row per period instead of every daily row
+-- Date: 2026-10-19
+
+-- Create portfolio_snapshot_rollups table
+CREATE TABLE IF NOT EXISTS public.portfolio_snapshot_rollups (
+    user_id TEXT NOT NULL,
+    period_type VARCHAR(5) NOT NULL CHECK (period_type IN ('week', 'month')),
+    period_start DATE NOT NULL,
+
+    -- Last daily snapshot within the period
+    snapshot_date DATE NOT NULL,
+    total_investment DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    current_value DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    total_profit DECIMAL(15, 2) NOT NULL DEFAULT 0,
+    overall_return DECIMAL(8, 4) NOT NULL DEFAULT 0,
+    holdings_count INTEGER NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+
+    PRIMARY KEY (user_id, period_type, period_start)
+);
+
+-- Recompute one period from the daily rows (removes the rollup when the period has none left)
+CREATE OR REPLACE FUNCTION public.refresh_portfolio_snapshot_rollup(
+    p_user_id TEXT,
+    p_period_type VARCHAR,
+    p_period_start DATE
+)
+RETURNS VOID AS $$
+DECLARE
+    p_period_end DATE := (p_period_start + CASE WHEN p_period_type = 'week' THEN INTERVAL '1 week' ELSE INTERVAL '1 month' END)::DATE;
+BEGIN
+    INSERT INTO public.portfolio_snapshot_rollups (
+        user_id, period_type, period_start, snapshot_date, total_investment,
+        current_value, total_profit, overall_return, holdings_count, updated_at
+    )
+    SELECT user_id, p_period_type, p_period_start, snapshot_date, total_investment,
+           current_value, total_profit, overall_return, holdings_count, NOW()
+    FROM public.portfolio_daily_snapshots
+    WHERE user_id = p_user_id
+      AND snapshot_date >= p_period_start
+      AND snapshot_date < p_period_end
+    ORDER BY snapshot_date DESC
+    LIMIT 1
+    ON CONFLICT (user_id, period_type, period_start) DO UPDATE SET
+        snapshot_date = EXCLUDED.snapshot_date,
+        total_investment = EXCLUDED.total_investment,
+        current_value = EXCLUDED.current_value,
+        total_profit = EXCLUDED.total_profit,
+        overall_return = EXCLUDED.overall_return,
+        holdings_count = EXCLUDED.holdings_count,
+        updated_at = EXCLUDED.updated_at;
+
+    IF NOT FOUND THEN
+        DELETE FROM public.portfolio_snapshot_rollups
+        WHERE user_id = p_user_id AND period_type = p_period_type AND period_start = p_period_start;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Keep rollups in step with every write to portfolio_daily_snapshots
+CREATE OR REPLACE FUNCTION public.sync_portfolio_snapshot_rollups()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM public.refresh_portfolio_snapshot_rollup(OLD.user_id, 'week', date_trunc('week', OLD.snapshot_date::TIMESTAMP)::DATE);
+        PERFORM public.refresh_portfolio_snapshot_rollup(OLD.user_id, 'month', date_trunc('month', OLD.snapshot_date::TIMESTAMP)::DATE);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM public.refresh_portfolio_snapshot_rollup(NEW.user_id, 'week', date_trunc('week', NEW.snapshot_date::TIMESTAMP)::DATE);
+        PERFORM public.refresh_portfolio_snapshot_rollup(NEW.user_id, 'month', date_trunc('month', NEW.snapshot_date::TIMESTAMP)::DATE);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER SET search_path = public;
+
+DROP TRIGGER IF EXISTS sync_portfolio_snapshot_rollups ON public.portfolio_daily_snapshots;
+CREATE TRIGGER sync_portfolio_snapshot_rollups
+    AFTER INSERT OR UPDATE OR DELETE ON public.portfolio_daily_snapshots
+    FOR EACH ROW
+    EXECUTE FUNCTION public.sync_portfolio_snapshot_rollups();
+
+-- Backfill rollups from existing daily snapshots
+INSERT INTO public.portfolio_snapshot_rollups (
+    user_id, period_type, period_start, snapshot_date, total_investment,
+    current_value, total_profit, overall_return, holdings_count
+)
+SELECT DISTINCT ON (s.user_id, p.period_type, p.period_start)
+       s.user_id, p.period_type, p.period_start, s.snapshot_date, s.total_investment,
+       s.current_value, s.total_profit, s.overall_return, s.holdings_count
+FROM public.portfolio_daily_snapshots s
+CROSS JOIN LATERAL (
+    VALUES ('week', date_trunc('week', s.snapshot_date::TIMESTAMP)::DATE),
+           ('month', date_trunc('month', s.snapshot_date::TIMESTAMP)::DATE)
+) AS p(period_type, period_start)
+ORDER BY s.user_id, p.period_type, p.period_start, s.snapshot_date DESC
+ON CONFLICT (user_id, period_type, period_start) DO NOTHING;
+
+-- Add RLS policies
+ALTER TABLE public.portfolio_snapshot_rollups ENABLE ROW LEVEL SECURITY;
+
+-- Users can only read their own rollups
+DROP POLICY IF EXISTS "Users can view own snapshot rollups" ON public.portfolio_snapshot_rollups;
+CREATE POLICY "Users can view own snapshot rollups"
+ON public.portfolio_snapshot_rollups
+FOR SELECT
+USING (auth.uid()::text = user_id);
+
+-- Add comments
+COMMENT ON TABLE public.portfolio_snapshot_rollups IS 'Last daily portfolio snapshot per user per ISO week and calendar month, maintained by trigger';
+COMMENT ON COLUMN public.portfolio_snapshot_rollups.period_start IS 'Monday of the ISO week, or first day of the month';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 023 completed successfully!';
+  RAISE NOTICE 'Created portfolio_snapshot_rollups table, maintenance trigger and backfilled existing snapshots';
+END $$;
@@ -0,0 +1,27 @@
+-- Migration 024: Add compact holdings details encoding to portfolio_daily_snapshots
+-- Purpose: Store per-holding snapshot details as compressed keyframes (full details every
+--          30 days) plus per-day deltas against the keyframe, instead of a full JSON blob per day
+-- Date: 2026-10-19
+
+-- Add encoded details columns (rows written before this keep holdings_details JSONB)
+ALTER TABLE public.portfolio_daily_snapshots
+ADD COLUMN IF NOT EXISTS details_blob BYTEA,
+ADD COLUMN IF NOT EXISTS details_encoding VARCHAR(10) CHECK (details_encoding IN ('keyframe', 'delta')),
+ADD COLUMN IF NOT EXISTS keyframe_date DATE;
+
+-- Create index for keyframe lookups by the nightly snapshot stage
+CREATE INDEX IF NOT EXISTS idx_portfolio_snapshots_keyframes
+ON public.portfolio_daily_snapshots(user_id, snapshot_date DESC)
+WHERE details_encoding = 'keyframe';
+
+-- Add comments
+COMMENT ON COLUMN public.portfolio_daily_snapshots.details_blob IS 'zlib-compressed JSON: full holdings details (keyframe) or changed fields vs the keyframe (delta)';
+COMMENT ON COLUMN public.portfolio_daily_snapshots.details_encoding IS 'keyframe or delta; NULL for rows that only have holdings_details';
+COMMENT ON COLUMN public.portfolio_daily_snapshots.keyframe_date IS 'snapshot_date of the keyframe a delta row applies to (own date for keyframes)';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 024 completed successfully!';
+  RAISE NOTICE 'Added details_blob, details_encoding and keyframe_date columns to portfolio_daily_snapshots';
+END $$;
@@ -0,0 +1,162 @@
+-- Migration 025: Create save_financial_profile RPC
+-- Purpose: Save a user's personal info, assets/liabilities, risk appetite and goals in one
+--          transaction and one round-trip. Goals are diffed against the stored ones by
+--          (goal_type, name, occurrence), so only inserts, changed rows and removals are
+--          written and unchanged goals keep their ids
+-- Date: 2026-10-19
+
+-- Arguments are the column values as JSON; keys missing from p_personal_info keep the stored
+-- value, a NULL p_risk_appetite or p_goals leaves that table untouched
+CREATE OR REPLACE FUNCTION public.save_financial_profile(
+    p_user_id UUID,
+    p_personal_info JSONB,
+    p_assets_liabilities JSONB,
+    p_risk_appetite JSONB DEFAULT NULL,
+    p_goals JSONB DEFAULT NULL
+)
+RETURNS JSONB AS $$
+DECLARE
+    v_personal_info_id UUID;
+    v_goals_inserted INTEGER := 0;
+    v_goals_updated INTEGER := 0;
+    v_goals_deleted INTEGER := 0;
+BEGIN
+    -- Personal info (one row per user). The stored row is updated first: an
+    -- INSERT ... ON CONFLICT checks NOT NULL on the proposed row before conflict
+    -- arbitration, so a save without name/age (e.g. the tax plan alone) would fail
+    UPDATE public.personal_info AS pi SET
+        name = CASE WHEN p_personal_info ? 'name' THEN r.name ELSE pi.name END,
+        age = CASE WHEN p_personal_info ? 'age' THEN r.age ELSE pi.age END,
+        monthly_salary = CASE WHEN p_personal_info ? 'monthly_salary' THEN r.monthly_salary ELSE pi.monthly_salary END,
+        monthly_expenses = CASE WHEN p_personal_info ? 'monthly_expenses' THEN r.monthly_expenses ELSE pi.monthly_expenses END,
+        tax_plan = CASE WHEN p_personal_info ? 'tax_plan' THEN r.tax_plan ELSE pi.tax_plan END,
+        updated_at = NOW()
+    FROM jsonb_populate_record(NULL::public.personal_info, p_personal_info) AS r
+    WHERE pi.user_id = p_user_id
+    RETURNING pi.id INTO v_personal_info_id;
+
+    -- First save for this user: the row is created from the sent values
+    IF v_personal_info_id IS NULL THEN
+        INSERT INTO public.personal_info (user_id, name, age, monthly_salary, monthly_expenses, tax_plan)
+        SELECT p_user_id, r.name, r.age, r.monthly_salary, r.monthly_expenses, r.tax_plan
+        FROM jsonb_populate_record(NULL::public.personal_info, p_personal_info) AS r
+        RETURNING id INTO v_personal_info_id;
+    END IF;
+
+    -- Assets and liabilities (one row per personal_info)
+    INSERT INTO public.assets_liabilities (
+        user_id, personal_info_id, real_estate_value, gold_value, mutual_funds_value,
+        epf_balance, ppf_balance, home_loan, car_loan, personal_loan, other_loans,
+        assets_detail, liabilities_detail
+    )
+    SELECT p_user_id, v_personal_info_id, r.real_estate_value, r.gold_value, r.mutual_funds_value,
+           r.epf_balance, r.ppf_balance, r.home_loan, r.car_loan, r.personal_loan, r.other_loans,
+           r.assets_detail, r.liabilities_detail
+    FROM jsonb_populate_record(NULL::public.assets_liabilities, p_assets_liabilities) AS r
+    ON CONFLICT (personal_info_id) DO UPDATE SET
+        user_id = EXCLUDED.user_id,
+        real_estate_value = EXCLUDED.real_estate_value,
+        gold_value = EXCLUDED.gold_value,
+        mutual_funds_value = EXCLUDED.mutual_funds_value,
+        epf_balance = EXCLUDED.epf_balance,
+        ppf_balance = EXCLUDED.ppf_balance,
+        home_loan = EXCLUDED.home_loan,
+        car_loan = EXCLUDED.car_loan,
+        personal_loan = EXCLUDED.personal_loan,
+        other_loans = EXCLUDED.other_loans,
+        assets_detail = EXCLUDED.assets_detail,
+        liabilities_detail = EXCLUDED.liabilities_detail,
+        updated_at = NOW();
+
+    -- Risk appetite (one row per personal_info)
+    IF p_risk_appetite IS NOT NULL THEN
+        INSERT INTO public.risk_appetite (
+            user_id, personal_info_id, risk_tolerance, inflation_rate, retirement_age,
+            risk_question1, risk_question2
+        )
+        SELECT p_user_id, v_personal_info_id, r.risk_tolerance, r.inflation_rate, r.retirement_age,
+               r.risk_question1, r.risk_question2
+        FROM jsonb_populate_record(NULL::public.risk_appetite, p_risk_appetite) AS r
+        ON CONFLICT (personal_info_id) DO UPDATE SET
+            user_id = EXCLUDED.user_id,
+            risk_tolerance = EXCLUDED.risk_tolerance,
+            inflation_rate = EXCLUDED.inflation_rate,
+            retirement_age = EXCLUDED.retirement_age,
+            risk_question1 = EXCLUDED.risk_question1,
+            risk_question2 = EXCLUDED.risk_question2,
+            updated_at = NOW();
+    END IF;
+
+    -- Goals: match incoming and stored rows by (goal_type, name, nth occurrence)
+    IF p_goals IS NOT NULL THEN
+        WITH incoming AS (
+            SELECT g.name, g.amount, g.years, g.goal_type,
+                   row_number() OVER (PARTITION BY g.goal_type, g.name ORDER BY g.position) AS occurrence
+            FROM ROWS FROM (
+                jsonb_to_recordset(p_goals) AS (name TEXT, amount NUMERIC, years INTEGER, goal_type TEXT)
+            ) WITH ORDINALITY AS g(name, amount, years, goal_type, position)
+        ),
+        existing AS (
+            SELECT id, name, goal_type,
+                   row_number() OVER (PARTITION BY goal_type, name ORDER BY created_at, id) AS occurrence
+            FROM public.goals
+            WHERE personal_info_id = v_personal_info_id
+        ),
+        matched AS (
+            SELECT e.id, i.amount, i.years
+            FROM existing e
+            JOIN incoming i ON i.goal_type = e.goal_type AND i.name = e.name AND i.occurrence = e.occurrence
+        ),
+        removed AS (
+            DELETE FROM public.goals g
+            WHERE g.personal_info_id = v_personal_info_id
+              AND NOT EXISTS (SELECT 1 FROM matched m WHERE m.id = g.id)
+            RETURNING 1
+        ),
+        changed AS (
+            UPDATE public.goals g SET
+                amount = m.amount,
+                years = m.years,
+                updated_at = NOW()
+            FROM matched m
+            WHERE g.id = m.id
+              AND (g.amount IS DISTINCT FROM m.amount OR g.years IS DISTINCT FROM m.years)
+            RETURNING 1
+        ),
+        added AS (
+            INSERT INTO public.goals (user_id, personal_info_id, name, amount, years, goal_type)
+            SELECT p_user_id, v_personal_info_id, i.name, i.amount, i.years, i.goal_type
+            FROM incoming i
+            WHERE NOT EXISTS (
+                SELECT 1 FROM existing e
+                WHERE e.goal_type = i.goal_type AND e.name = i.name AND e.occurrence = i.occurrence
+            )
+            ORDER BY i.goal_type, i.name, i.occurrence
+            RETURNING 1
+        )
+        SELECT (SELECT count(*) FROM added), (SELECT count(*) FROM changed), (SELECT count(*) FROM removed)
+        INTO v_goals_inserted, v_goals_updated, v_goals_deleted;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'personal_info_id', v_personal_info_id,
+        'goals_inserted', v_goals_inserted,
+        'goals_updated', v_goals_updated,
+        'goals_deleted', v_goals_deleted
+    );
+END;
+$$ LANGUAGE plpgsql SET search_path = public;
+
+-- Only the backend (service role) saves profiles; it verifies ownership before calling
+REVOKE EXECUTE ON FUNCTION public.save_financial_profile(UUID, JSONB, JSONB, JSONB, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.save_financial_profile(UUID, JSONB, JSONB, JSONB, JSONB) TO service_role;
+
+-- Add comments
+COMMENT ON FUNCTION public.save_financial_profile(UUID, JSONB, JSONB, JSONB, JSONB) IS 'Atomic save of personal info, assets/liabilities, risk appetite and diffed goals for one user';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 025 completed successfully!';
+  RAISE NOTICE 'Created save_financial_profile RPC';
+END $$;
@@ -0,0 +1,19 @@
+-- Migration 026: Add content_digest column to sip_planner_data
+-- Purpose: Let save-sip-planner skip autosaves that resend an unchanged plan by comparing
+--          content digests, before any write to sip_planner_data or goals
+-- Date: 2026-10-19
+
+-- Add content_digest column to sip_planner_data
+ALTER TABLE public.sip_planner_data
+ADD COLUMN IF NOT EXISTS content_digest VARCHAR(64);
+
+-- Add comment
+COMMENT ON COLUMN public.sip_planner_data.content_digest IS 'SHA-256 of the saved goals and SIP calculations; identical saves are skipped';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 026 completed successfully!';
+  RAISE NOTICE 'Added content_digest column to sip_planner_data table';
+  RAISE NOTICE 'The next save for each user writes once to populate its digest';
+END $$;
@@ -0,0 +1,31 @@
+-- Migration 027: Create scheme_nav_history view
+-- Purpose: One NAV per scheme per date for risk analytics. nav_history holds one row per
+--          holding per date, so reading it per scheme returned holders x dates rows
+-- Date: 2026-10-19
+
+-- Serves the DISTINCT ON below from the index instead of sorting every holder's rows
+CREATE INDEX IF NOT EXISTS idx_nav_history_scheme_date
+ON public.nav_history(scheme_code, nav_date, created_at DESC);
+
+-- Latest recorded NAV for each (scheme_code, nav_date)
+CREATE OR REPLACE VIEW public.scheme_nav_history AS
+SELECT DISTINCT ON (scheme_code, nav_date)
+    scheme_code,
+    nav_date,
+    nav_value
+FROM public.nav_history
+ORDER BY scheme_code, nav_date, created_at DESC;
+
+-- Only the backend (service role) reads it
+REVOKE ALL ON public.scheme_nav_history FROM PUBLIC, anon, authenticated;
+GRANT SELECT ON public.scheme_nav_history TO service_role;
+
+-- Add comments
+COMMENT ON VIEW public.scheme_nav_history IS 'One NAV per scheme per date (collapses the per-holding rows of nav_history)';
+
+-- Completion message
+DO $$
+BEGIN
+  RAISE NOTICE '✅ Migration 027 completed successfully!';
+  RAISE NOTICE 'Created scheme_nav_history view and idx_nav_history_scheme_date index';
+END $$;
@@ -0,0 +1,111 @@
+"""
+Tests for the snapshot holdings details codec: keyframe/delta encoding and
+replacement of a stored day's details
+
+Run: python -m pytest test_details_codec.py
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio_snapshots.details_codec import (
+    encode_details, decode_details, encode_replacement_details, pack, unpack,
+    ENCODING_DELTA, ENCODING_KEYFRAME
+)
+
+
+def _details(nav: float, units: float = 10.0):
+    return {
+        'h1': {'scheme_code': '100', 'unit_balance': units, 'current_nav': nav, 'market_value': units * nav},
+        'h2': {'scheme_code': '200', 'unit_balance': 5.0, 'current_nav': 20.0, 'market_value': 100.0},
+    }
+
+
+def test_details_delta_round_trip():
+    keyframe_day = date(2026, 1, 1)
+    keyframe = _details(10.0)
+    day = {'h1': _details(11.0)['h1'], 'h3': {'scheme_code': '300', 'unit_balance': 1.0}}
+
+    encoded = encode_details(day, date(2026, 1, 5), (keyframe_day, keyframe))
+    assert encoded['details_encoding'] == ENCODING_DELTA
+    assert encoded['keyframe_date'] == keyframe_day.isoformat()
+
+    row = {'user_id': 'u1', **encoded}
+    assert decode_details(row, {('u1', keyframe_day.isoformat()): keyframe}) == day
+
+
+def test_details_keyframe_after_interval():
+    encoded = encode_details(_details(12.0), date(2026, 3, 1), (date(2026, 1, 1), _details(10.0)))
+    assert encoded['details_encoding'] == ENCODING_KEYFRAME
+    assert unpack(encoded['details_blob']) == _details(12.0)
+
+
+class _FakeQuery:
+    """Query builder stand-in: every filter is a no-op, execute() returns the next queued result"""
+
+    def __init__(self, results):
+        self._results = results
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type('Result', (), {'data': self._results.pop(0)})()
+
+
+class _FakeClient:
+    def __init__(self, *results):
+        self._results = list(results)
+
+    def table(self, name):
+        return _FakeQuery(self._results)
+
+
+def test_replacement_details_keep_stored_keyframe():
+    # The stored day is a keyframe later deltas may point at: it must stay one
+    client = _FakeClient([{'details_encoding': ENCODING_KEYFRAME, 'details_blob': pack(_details(10.0))}], [])
+    encoded, rebased = encode_replacement_details(client, 'u1', date(2026, 1, 5), _details(11.0))
+    assert encoded['details_encoding'] == ENCODING_KEYFRAME
+    assert unpack(encoded['details_blob']) == _details(11.0)
+    assert rebased == []
+
+
+def test_replacement_of_keyframe_rebases_later_deltas():
+    keyframe_day = date(2026, 1, 1)
+    old_keyframe = {'A': {'units': 10.0}, 'B': {'units': 5.0}}
+    day_two = {'A': {'units': 12.0}, 'B': {'units': 5.0}}
+    stored_delta = {
+        'user_id': 'u1', 'snapshot_date': '2026-01-02', 'current_value': 1200.0,
+        **encode_details(day_two, date(2026, 1, 2), (keyframe_day, old_keyframe)),
+    }
+    assert unpack(stored_delta['details_blob'])['changed'] == {'A': {'units': 12.0}}
+
+    # Re-posting the keyframe day with B changed must not leak into day two
+    new_keyframe = {'A': {'units': 10.0}, 'B': {'units': 6.0}}
+    client = _FakeClient(
+        [{'details_encoding': ENCODING_KEYFRAME, 'details_blob': pack(old_keyframe)}],
+        [stored_delta],
+    )
+    encoded, rebased = encode_replacement_details(client, 'u1', keyframe_day, new_keyframe)
+
+    keyframes = {('u1', keyframe_day.isoformat()): unpack(encoded['details_blob'])}
+    [row] = rebased
+    assert row['snapshot_date'] == '2026-01-02'
+    assert row['current_value'] == 1200.0
+    assert decode_details(row, keyframes) == day_two
+
+
+def test_replacement_details_encode_against_latest_keyframe():
+    client = _FakeClient(
+        [{'details_encoding': ENCODING_DELTA}],
+        [{'user_id': 'u1', 'snapshot_date': '2026-01-01', 'details_blob': pack(_details(10.0))}],
+    )
+    encoded, rebased = encode_replacement_details(client, 'u1', date(2026, 1, 5), _details(11.0))
+    assert encoded['details_encoding'] == ENCODING_DELTA
+    assert rebased == []
+    row = {'user_id': 'u1', **encoded}
+    assert decode_details(row, {('u1', '2026-01-01'): _details(10.0)}) == _details(11.0)
@@ -0,0 +1,36 @@
+"""
+Tests for time-series downsampling (LTTB and min/max buckets)
+
+Run: python -m pytest test_downsampling.py
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio_snapshots.downsampling import lttb_indices, minmax_indices
+
+
+def test_lttb_point_count_and_endpoints():
+    x = np.arange(1000, dtype=float)
+    y = np.sin(x / 25.0)
+    indices = lttb_indices(x, y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+
+    assert len(lttb_indices(x[:50], y[:50], 100)) == 50
+
+
+def test_minmax_keeps_extremes():
+    y = np.sin(np.arange(1000) / 25.0)
+    y[537] = 5.0
+    y[212] = -5.0
+    indices = minmax_indices(y, 100)
+    assert len(indices) <= 100
+    assert 537 in indices and 212 in indices
+    assert indices[0] == 0 and indices[-1] == 999
@@ -0,0 +1,96 @@
+"""
+Tests for the CAMS Excel parser: the in-memory (pandas) and streaming
+(openpyxl read-only) paths must extract the same holdings
+
+Run: python -m pytest test_excel_parser.py
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio import parser
+from app.apis.portfolio.parser import parse_cams_excel, iter_excel_holdings_streaming
+
+
+def build_workbook() -> io.BytesIO:
+    """Statement with title rows above the header, grouped folio/AMC cells and text numbers"""
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(['Consolidated Account Statement'])
+    sheet.append(['Period: 01-Jan-2024 to 31-Mar-2024'])
+    sheet.append(['AMC Name', 'Folio No', 'Scheme Name', 'Unit Balance', 'NAV', 'Cost Value', 'Market Value'])
+    sheet.append(['HDFC Mutual Fund', 'Folio: 12345678 / 01', 'HDFC Flexi Cap Fund - Direct Growth', '1,234.567', '₹ 1,650.25', '1,50,000.00', None])
+    sheet.append([None, None, 'HDFC Liquid Fund - Direct Growth', '10.000', '4,800.10', None, '48,001.00'])
+    sheet.append([None, None, 'Total', None, None, None, None])
+    sheet.append(['Axis Mutual Fund', '9876543210', 'Axis Bluechip Fund - Direct Growth', 500, None, '(1,000.00)', '25,000.00'])
+    sheet.append([None, None, 'Axis ELSS Tax Saver - Direct Growth', '0', '80.00', '0', '0'])
+    sheet.append([None, None, 'Axis Midcap Fund - Direct Growth', '200', '100.00', None, None])
+
+    handle = io.BytesIO()
+    workbook.save(handle)
+    handle.seek(0)
+    return handle
+
+
+@pytest.fixture(autouse=True)
+def no_scheme_lookup(monkeypatch):
+    monkeypatch.setattr(parser, 'get_scheme_code', lambda scheme_name, amc_name=None: 'UNKNOWN')
+
+
+def test_excel_paths_extract_the_same_holdings():
+    in_memory = pd.DataFrame(parse_cams_excel(build_workbook(), streaming=False))
+    streamed = pd.DataFrame(parse_cams_excel(build_workbook(), streaming=True))
+
+    pd.testing.assert_frame_equal(in_memory, streamed, check_dtype=False)
+    assert list(in_memory['scheme_name']) == [
+        'HDFC Flexi Cap Fund - Direct Growth',
+        'HDFC Liquid Fund - Direct Growth',
+        'Axis Bluechip Fund - Direct Growth',
+        'Axis Midcap Fund - Direct Growth',
+    ]
+
+
+def test_excel_forward_fill_and_numeric_cleanup():
+    holdings = {h['scheme_name']: h for h in parse_cams_excel(build_workbook(), streaming=False)}
+
+    flexi = holdings['HDFC Flexi Cap Fund - Direct Growth']
+    assert flexi['folio_number'] == '12345678'
+    assert flexi['unit_balance'] == pytest.approx(1234.567)
+    assert flexi['current_nav'] == pytest.approx(1650.25)
+    assert flexi['cost_value'] == pytest.approx(150000.0)
+
+    # Folio and AMC carried down from the group's first row; cost falls back to market value
+    liquid = holdings['HDFC Liquid Fund - Direct Growth']
+    assert liquid['folio_number'] == '12345678'
+    assert liquid['amc_name'] == 'HDFC Mutual Fund'
+    assert liquid['cost_value'] == pytest.approx(48001.0)
+
+    # NAV derived from market value; negative cost in parentheses kept
+    bluechip = holdings['Axis Bluechip Fund - Direct Growth']
+    assert bluechip['current_nav'] == pytest.approx(50.0)
+    assert bluechip['cost_value'] == pytest.approx(-1000.0)
+
+    # Cost falls back to NAV x units when neither cost nor value is given
+    midcap = holdings['Axis Midcap Fund - Direct Growth']
+    assert midcap['folio_number'] == '9876543210'
+    assert midcap['amc_name'] == 'Axis Mutual Fund'
+    assert midcap['cost_value'] == pytest.approx(20000.0)
+
+
+def test_streaming_carries_folio_and_amc_across_blocks():
+    # Two-row blocks split every group across a block boundary
+    blocks = [block for block in iter_excel_holdings_streaming(build_workbook(), chunk_rows=2) if not block.empty]
+    streamed = pd.concat(blocks, ignore_index=True)
+    single = pd.concat(list(iter_excel_holdings_streaming(build_workbook())), ignore_index=True)
+
+    pd.testing.assert_frame_equal(streamed, single, check_dtype=False)
+    assert list(streamed['folio_number']) == ['12345678', '12345678', '9876543210', '9876543210']
+    assert list(streamed['amc_name']) == ['HDFC Mutual Fund', 'HDFC Mutual Fund', 'Axis Mutual Fund', 'Axis Mutual Fund']
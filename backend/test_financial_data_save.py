@@ -0,0 +1,84 @@
+"""
+Tests for the save-financial-data payload sent to the save_financial_profile RPC
+
+Run: python -m pytest test_financial_data_save.py
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from databutton_app.mw.auth_mw import User
+from app.apis import financial_data
+from app.apis.financial_data import FinancialDataInput, save_financial_data
+
+USER_ID = '00000000-0000-0000-0000-000000000001'
+
+
+class _FakeQuery:
+    def __init__(self, data):
+        self._data = data
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return type('Result', (), {'data': self._data})()
+
+
+class _FakeSupabase:
+    """Records RPC calls; the user row already exists"""
+
+    def __init__(self):
+        self.rpc_calls = []
+
+    def from_(self, table):
+        return _FakeQuery([{'id': USER_ID}])
+
+    table = from_
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        return _FakeQuery({'personal_info_id': 'p1', 'goals_inserted': 0, 'goals_updated': 0, 'goals_deleted': 0})
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    client = _FakeSupabase()
+    monkeypatch.setattr(financial_data, 'supabase', client)
+    return client
+
+
+def test_save_tax_plan_alone_sends_only_tax_plan(fake_supabase):
+    # TaxPlanning saves with personalInfo: null; the RPC must keep the stored name/age
+    data = FinancialDataInput(
+        userId=USER_ID,
+        personalInfo=None,
+        taxPlan={'yearlyIncome': 1200000, 'selectedRegime': 'new'},
+    )
+    response = save_financial_data(data, User(sub=USER_ID))
+
+    assert response.success
+    [(name, params)] = fake_supabase.rpc_calls
+    assert name == 'save_financial_profile'
+    assert list(params['p_personal_info']) == ['tax_plan']
+    assert params['p_personal_info']['tax_plan']['yearlyIncome'] == 1200000
+    assert params['p_risk_appetite'] is None
+    assert params['p_goals'] is None
+
+
+def test_save_personal_info_sends_all_columns(fake_supabase):
+    data = FinancialDataInput(
+        userId=USER_ID,
+        personalInfo={'name': 'Asha', 'age': 34, 'monthlySalary': 150000, 'monthlyExpenses': 60000},
+    )
+    save_financial_data(data, User(sub=USER_ID))
+
+    [(_, params)] = fake_supabase.rpc_calls
+    assert params['p_personal_info'] == {
+        'name': 'Asha', 'age': 34, 'monthly_salary': 150000, 'monthly_expenses': 60000,
+    }
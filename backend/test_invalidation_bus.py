@@ -0,0 +1,94 @@
+"""
+Tests for the cross-worker cache invalidation bus, using LocalTransport peers
+as stand-ins for separate worker processes
+
+Run: python -m pytest test_invalidation_bus.py
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.utils.invalidation_bus import (
+    InvalidationBus, LocalTransport, encode_messages, invalidation_bus
+)
+from app.apis.portfolio.portfolio_cache import holdings_cache, invalidate_user_portfolio
+from app.apis.financial_data.financial_cache import financial_data_cache
+from app.utils.read_cache import read_cache, _MISSING
+
+
+@pytest.fixture
+def workers():
+    """Two buses on one LocalTransport network, each recording what it receives"""
+    network = LocalTransport()
+    worker_a, worker_b = InvalidationBus(origin='worker-a'), InvalidationBus(origin='worker-b')
+    received = {'a': [], 'b': []}
+    worker_a.subscribe(received['a'].append)
+    worker_b.subscribe(received['b'].append)
+    worker_a.start(network)
+    worker_b.start(network.peer())
+    yield worker_a, worker_b, received
+    worker_a.stop()
+    worker_b.stop()
+
+
+def test_publish_skips_own_origin(workers):
+    worker_a, worker_b, received = workers
+    worker_a.publish('user:u1')
+    assert received['a'] == []
+    assert received['b'] == [('user:u1',)]
+    assert worker_b.received == 1
+
+
+def test_batch_coalesces_publishes(workers):
+    worker_a, worker_b, received = workers
+    with worker_a.batch():
+        worker_a.publish('user:u1')
+        worker_a.publish('user:u2', 'user:u1')
+        assert received['b'] == []
+    assert received['b'] == [('user:u1', 'user:u2')]
+    assert worker_a.published == 1
+
+
+def test_encode_messages_splits_at_payload_limit():
+    tags = [f"user:{i:036d}" for i in range(500)]
+    messages = encode_messages('worker-a', tags + tags[:10])
+    assert len(messages) > 1
+    # Postgres rejects NOTIFY payloads of 8000 bytes or more
+    assert all(len(message.encode('utf-8')) < 8000 for message in messages)
+    decoded = [tag for message in messages for tag in json.loads(message)['tags']]
+    assert decoded == tags  # every tag once, in order
+
+
+def test_remote_user_tag_evicts_local_caches():
+    network = LocalTransport()
+    remote = InvalidationBus(origin='remote-worker')
+    invalidation_bus.start(network)
+    remote.start(network.peer())
+    try:
+        holdings_cache.set('u1', {'holdings': [{'id': 'h1'}]})
+        financial_data_cache.set('u1', {'personal_info': {}})
+        read_cache.set('test:u1', {'plan': 'free'}, ('user:u1',))
+        read_cache.set('test:u2', {'plan': 'free'}, ('user:u2',))
+
+        remote.publish('user:u1')
+
+        assert 'u1' not in holdings_cache
+        assert 'u1' not in financial_data_cache
+        assert read_cache.get('test:u1') is _MISSING
+        assert read_cache.get('test:u2') == {'plan': 'free'}
+
+        # Local writes are published to the other worker
+        received = []
+        remote.subscribe(received.append)
+        invalidate_user_portfolio('u3')
+        assert received == [('user:u3',)]
+    finally:
+        remote.stop()
+        invalidation_bus.stop()
+        read_cache.clear()
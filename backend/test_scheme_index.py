@@ -0,0 +1,147 @@
+"""
+Tests for the scheme autocomplete index: prefix matching, ranking and the
+version-check rebuild
+
+Run: python -m pytest test_scheme_index.py
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio import scheme_index
+from app.apis.portfolio.scheme_index import SchemeSearchIndex
+
+SCHEMES = [
+    {'scheme_code': '100', 'scheme_name': 'Axis Bluechip Fund - Regular Plan - IDCW', 'amc_name': 'Axis Mutual Fund', 'category': 'Equity'},
+    {'scheme_code': '101', 'scheme_name': 'Axis Bluechip Fund - Direct Plan - Growth', 'amc_name': 'Axis Mutual Fund', 'category': 'Equity'},
+    {'scheme_code': '102', 'scheme_name': 'Axis Bluechip Fund - Regular Plan - Growth', 'amc_name': 'Axis Mutual Fund', 'category': 'Equity'},
+    {'scheme_code': '200', 'scheme_name': 'HDFC Flexi Cap Fund - Direct Plan - Growth', 'amc_name': 'HDFC Mutual Fund', 'category': 'Equity'},
+    {'scheme_code': '201', 'scheme_name': 'HDFC Liquid Fund - Direct Plan - Growth', 'amc_name': 'HDFC Mutual Fund', 'category': 'Debt'},
+    {'scheme_code': '300', 'scheme_name': 'Parag Parikh Flexi Cap Fund - Direct Plan - Growth', 'amc_name': 'PPFAS Mutual Fund', 'category': 'Equity'},
+    {'scheme_code': '', 'scheme_name': 'No Code Fund'},
+]
+
+
+def codes(results):
+    return [r['scheme_code'] for r in results]
+
+
+def test_prefix_matching():
+    index = SchemeSearchIndex(SCHEMES)
+
+    assert len(index) == 6  # rows without a scheme code are skipped
+    assert set(codes(index.search('blue'))) == {'100', '101', '102'}
+    assert set(codes(index.search('flexi ca'))) == {'200', '300'}
+    assert set(codes(index.search('hdf liq'))) == {'201'}     # completed term with no whole token falls back to prefix
+    assert set(codes(index.search('direct '))) == {'101', '200', '201', '300'}
+    assert codes(index.search('axis liquid')) == []
+    assert index.search('') == []
+    assert index.search('blue', limit=0) == []
+
+
+def test_amc_tokens_are_searchable():
+    index = SchemeSearchIndex(SCHEMES)
+    assert codes(index.search('ppfas')) == ['300']
+
+
+def test_ranking_direct_growth_first():
+    index = SchemeSearchIndex(SCHEMES)
+
+    # Direct Growth, then Regular Growth, then IDCW
+    assert codes(index.search('axis blue')) == ['101', '102', '100']
+    assert codes(index.search('axis blue', limit=1)) == ['101']
+
+
+def test_ranking_popularity_and_name_prefix():
+    index = SchemeSearchIndex(SCHEMES, popularity={'102': 1000})
+    assert codes(index.search('bluechip')) == ['102', '101', '100']
+
+    # Names starting with the query text go ahead of a better static rank
+    index = SchemeSearchIndex(SCHEMES, popularity={'300': 1000})
+    assert codes(index.search('flexi cap'))[0] == '300'
+    assert codes(index.search('hdfc flexi'))[0] == '200'
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.range_start = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    def order(self, column, desc=False):
+        return self
+
+    def limit(self, count):
+        return self
+
+    def range(self, start, end):
+        self.range_start = start
+        return self
+
+    def execute(self):
+        if self.table == 'scheme_master' and self.range_start is None:
+            data = [{'last_updated': self.client.version}]
+        elif self.table == 'scheme_master':
+            data = self.client.schemes if self.range_start == 0 else []
+        else:
+            data = []
+        return type('Result', (), {'data': data})()
+
+
+class FakeClient:
+    def __init__(self, schemes, version):
+        self.schemes = schemes
+        self.version = version
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+def test_version_check_rebuilds_changed_catalog(monkeypatch):
+    monkeypatch.setattr(scheme_index, '_index', None)
+    monkeypatch.setattr(scheme_index, '_refresh_task', None)
+    monkeypatch.setattr(scheme_index, '_last_version_check', 0.0)
+    client = FakeClient(SCHEMES[:3], 'v1')
+
+    async def scenario():
+        await scheme_index.refresh_scheme_index(client)
+        first = scheme_index.get_scheme_index()
+        assert first.version == 'v1'
+        assert codes(first.search('hdfc')) == []
+
+        # Within the interval the check is throttled
+        client.schemes, client.version = SCHEMES, 'v2'
+        scheme_index.maybe_check_scheme_index_version(client)
+        await asyncio.sleep(0.05)
+        assert scheme_index.get_scheme_index() is first
+
+        # Once it is due, a changed version triggers a background rebuild
+        monkeypatch.setattr(scheme_index, '_last_version_check', 0.0)
+        scheme_index.maybe_check_scheme_index_version(client)
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            if scheme_index.get_scheme_index() is not first:
+                break
+        rebuilt = scheme_index.get_scheme_index()
+        assert rebuilt.version == 'v2'
+        assert set(codes(rebuilt.search('hdfc'))) == {'200', '201'}
+
+        # Same version again: no rebuild
+        monkeypatch.setattr(scheme_index, '_last_version_check', 0.0)
+        scheme_index.maybe_check_scheme_index_version(client)
+        await asyncio.sleep(0.05)
+        assert scheme_index.get_scheme_index() is rebuilt
+
+    asyncio.run(scenario())
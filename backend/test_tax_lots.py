@@ -0,0 +1,115 @@
+"""
+Tests for the FIFO tax-lot engine: date-aware lot matching and STCG/LTCG split
+
+Run: python -m pytest test_tax_lots.py
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio.tax_lots import LotBook, compute_capital_gains
+from app.apis.portfolio.transaction_parser import CASTransaction, PURCHASE, REDEMPTION
+
+
+def txn(day: date, units: float, nav: float, scheme: str = 'Axis Bluechip Fund - Direct Growth') -> CASTransaction:
+    return CASTransaction(
+        folio_number='12345678',
+        scheme_name=scheme,
+        isin='INF846K01DP8',
+        transaction_date=day,
+        transaction_type=PURCHASE if units > 0 else REDEMPTION,
+        amount=abs(units) * nav,
+        units=units,
+        nav=nav,
+        unit_balance=0.0,
+        description='',
+    )
+
+
+def gains(transactions, **kwargs):
+    kwargs.setdefault('as_of', date(2025, 1, 1))
+    kwargs.setdefault('asset_class_of', lambda name: 'Equity')
+    return compute_capital_gains(transactions, include_lots=True, **kwargs)
+
+
+def test_fifo_splits_sale_across_lots_and_terms():
+    result = gains([
+        txn(date(2022, 1, 1), 10, 100.0),
+        txn(date(2023, 6, 1), 10, 150.0),
+        txn(date(2023, 9, 1), -15, 200.0),
+    ])
+    [scheme] = result['schemes']
+
+    lots = scheme['realized_lots']
+    assert [(lot['purchase_date'], lot['units'], lot['term']) for lot in lots] == [
+        ('2022-01-01', 10.0, 'LTCG'),
+        ('2023-06-01', 5.0, 'STCG'),
+    ]
+    assert scheme['realized_ltcg'] == pytest.approx(10 * (200 - 100))
+    assert scheme['realized_stcg'] == pytest.approx(5 * (200 - 150))
+    assert scheme['open_units'] == pytest.approx(5.0)
+    assert scheme['unmatched_units'] == 0.0
+
+
+def test_sale_before_any_purchase_is_unmatched():
+    # Partial-period statement: units sold were bought before the statement starts
+    result = gains([
+        txn(date(2024, 1, 1), -10, 120.0),
+        txn(date(2024, 6, 1), 10, 100.0),
+    ])
+    [scheme] = result['schemes']
+
+    assert scheme['realized_lots'] == []
+    assert scheme['realized_stcg'] == 0.0
+    assert scheme['realized_ltcg'] == 0.0
+    assert scheme['unmatched_units'] == pytest.approx(10.0)
+    # The later purchase stays open in full
+    assert [(lot['purchase_date'], lot['units']) for lot in scheme['open_lots']] == [('2024-06-01', 10.0)]
+
+
+def test_sale_only_draws_on_earlier_lots():
+    book = LotBook('12345678', 'Axis Bluechip Fund - Direct Growth', None)
+    for transaction in [
+        txn(date(2024, 1, 1), 4, 100.0),
+        txn(date(2024, 2, 1), -10, 110.0),   # 4 from the January lot, 6 unmatched
+        txn(date(2024, 3, 1), 10, 120.0),
+        txn(date(2024, 4, 1), -3, 130.0),    # from the March lot
+        txn(date(2024, 4, 1), 2, 125.0),     # same-day purchase is available
+        txn(date(2024, 4, 1), -9, 130.0),    # 7 left in March, 2 from April 1
+    ]:
+        book.add(transaction)
+    matched = book.match()
+
+    realized = matched['realized']
+    assert [str(d) for d in realized['purchase_date']] == ['2024-01-01', '2024-03-01', '2024-03-01', '2024-04-01']
+    assert list(realized['units']) == pytest.approx([4.0, 3.0, 7.0, 2.0])
+    assert all(realized['purchase_date'] <= realized['sale_date'])
+    assert matched['unmatched_units'] == pytest.approx(6.0)
+    assert len(matched['open_lots']['units']) == 0
+
+
+def test_unmatched_units_without_purchases():
+    book = LotBook('12345678', 'Axis Bluechip Fund - Direct Growth', None)
+    book.add(txn(date(2024, 1, 1), -5, 100.0))
+    matched = book.match()
+
+    assert len(matched['realized']['units']) == 0
+    assert matched['unmatched_units'] == pytest.approx(5.0)
+
+
+def test_debt_fund_uses_longer_threshold():
+    result = gains(
+        [txn(date(2022, 1, 1), 10, 100.0), txn(date(2023, 6, 1), -10, 110.0)],
+        asset_class_of=lambda name: 'Debt'
+    )
+    [scheme] = result['schemes']
+
+    assert scheme['ltcg_threshold_days'] == 1095
+    assert scheme['realized_stcg'] == pytest.approx(100.0)
+    assert scheme['realized_ltcg'] == 0.0
@@ -0,0 +1,109 @@
+"""
+Tests for the CAS transaction line parser and insert batching
+
+Run: python -m pytest test_transaction_parser.py
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio.transaction_parser import (
+    parse_transaction_lines, transaction_batches, StatementState,
+    PURCHASE, SIP, REDEMPTION, SWITCH_IN, SWITCH_OUT, DIVIDEND_REINVEST
+)
+
+HEADER_LINES = [
+    'Folio No: 9102345678 / 0',
+    'B205 - Axis Bluechip Fund - Direct Growth - ISIN: INF846K01DP8 (Advisor: DIRECT) Registrar : KFINTECH',
+    'Opening Unit Balance: 0.000',
+]
+
+
+def parse(lines, state=None):
+    return list(parse_transaction_lines(lines, state or StatementState()))
+
+
+def test_purchase_line():
+    [txn] = parse(HEADER_LINES + ['15-Jan-2024 Purchase - via Internet 10,000.00 123.456 81.0000 123.456'])
+
+    assert txn.folio_number == '9102345678/0'
+    assert txn.scheme_name == 'Axis Bluechip Fund - Direct Growth'
+    assert txn.isin == 'INF846K01DP8'
+    assert txn.transaction_date == date(2024, 1, 15)
+    assert txn.transaction_type == PURCHASE
+    assert txn.amount == pytest.approx(10000.0)
+    assert txn.units == pytest.approx(123.456)
+    assert txn.nav == pytest.approx(81.0)
+    assert txn.unit_balance == pytest.approx(123.456)
+    assert txn.description == 'Purchase - via Internet'
+
+
+def test_redemption_line():
+    [txn] = parse(HEADER_LINES + ['01-Mar-2024 Redemption - via Internet (5,000.00) (50.000) 100.0000 73.456'])
+
+    assert txn.transaction_type == REDEMPTION
+    assert txn.amount == pytest.approx(5000.0)  # stored unsigned
+    assert txn.units == pytest.approx(-50.0)
+    assert txn.unit_balance == pytest.approx(73.456)
+
+
+def test_dividend_reinvest_sip_and_switch_lines():
+    txns = parse(HEADER_LINES + [
+        '10-Feb-2024 IDCW Reinvestment 500.00 5.000 100.0000 128.456',
+        '05-Apr-2024 SIP Purchase Instalment 1/12 2,000.00 19.800 101.0101 148.256',
+        '20-Apr-2024 Switch-In From Axis Liquid Fund 1,000.00 9.900 101.0101 158.156',
+        '21-Apr-2024 Switch-Out To Axis Liquid Fund (1,000.00) (9.900) 101.0101 148.256',
+    ])
+
+    assert [t.transaction_type for t in txns] == [DIVIDEND_REINVEST, SIP, SWITCH_IN, SWITCH_OUT]
+
+
+def test_unparseable_lines_are_skipped():
+    txns = parse([
+        # Transaction before any scheme header has no scheme to attach to
+        '14-Jan-2024 Purchase 10,000.00 123.456 81.0000 123.456',
+        *HEADER_LINES,
+        '15-Jan-2024 Purchase 10,000.00',                           # missing columns
+        '*** Stamp Duty ***',
+        '31-Feb-2024 Purchase 10,000.00 123.456 81.0000 123.456',  # invalid date
+        'Closing Unit Balance: 123.456 NAV on 31-Mar-2024: INR 81.0000',
+        '',
+        '16-Jan-2024 Purchase 1,000.00 12.345 81.0000 135.801',
+    ])
+
+    assert [t.transaction_date for t in txns] == [date(2024, 1, 16)]
+
+
+def test_state_carries_across_pages():
+    state = StatementState()
+    first_page = parse(HEADER_LINES + ['15-Jan-2024 Purchase 10,000.00 123.456 81.0000 123.456'], state)
+    second_page = parse(['16-Jan-2024 Purchase 1,000.00 12.345 81.0000 135.801'], state)
+
+    assert second_page[0].scheme_name == first_page[0].scheme_name
+    assert second_page[0].folio_number == '9102345678/0'
+
+    # A new folio clears the scheme until its header line
+    assert parse(['Folio No: 111222333', '17-Jan-2024 Purchase 1,000.00 12.345 81.0000 148.146'], state) == []
+
+
+def test_transaction_batches_boundaries():
+    lines = HEADER_LINES + [
+        f'{day:02d}-Jan-2024 Purchase 1,000.00 10.000 100.0000 {10 * day:.3f}' for day in range(1, 8)
+    ]
+    transactions = parse(lines)
+
+    batches = list(transaction_batches(transactions, batch_size=3, user_id='u1'))
+    assert [len(batch) for batch in batches] == [3, 3, 1]
+    assert all(row['user_id'] == 'u1' for batch in batches for row in batch)
+    assert batches[0][0]['transaction_date'] == '2024-01-01'
+    assert batches[2][0]['transaction_date'] == '2024-01-07'
+
+    # Exact multiple: no trailing empty batch
+    assert [len(batch) for batch in transaction_batches(transactions[:6], batch_size=3)] == [3, 3]
+    assert list(transaction_batches([], batch_size=3)) == []
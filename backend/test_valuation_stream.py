@@ -0,0 +1,80 @@
+"""
+Tests for the live valuation hub: keepalive timeouts that keep pending reads,
+and pushes triggered by another worker through the invalidation bus
+
+Run: python -m pytest test_valuation_stream.py
+"""
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio import valuation_stream
+from app.apis.portfolio.valuation_stream import ValuationHub, valuation_hub
+from app.utils.invalidation_bus import InvalidationBus, LocalTransport, invalidation_bus
+
+
+def portfolio(nav: float):
+    return {
+        'holdings': [{'id': 'h1', 'scheme_name': 'Axis Bluechip Fund', 'current_nav': nav, 'market_value': 10 * nav}],
+        'summary': {'current_value': 10 * nav},
+    }
+
+
+def test_keepalive_timeout_keeps_pending_read(monkeypatch):
+    monkeypatch.setattr(valuation_stream, 'KEEPALIVE_INTERVAL', 0.01)
+    hub = ValuationHub()
+    hub.set_loader(lambda user_id: portfolio(10.0))
+
+    async def scenario():
+        subscriber = await hub.subscribe('u1')
+        assert json.loads(await hub.next_message('u1', subscriber))['type'] == 'snapshot'
+
+        # Idle: keepalive, with the queue read left pending rather than cancelled
+        assert await hub.next_message('u1', subscriber) is None
+        pending = subscriber.getter
+        assert pending is not None and not pending.done()
+
+        subscriber.offer('{"type": "delta"}')
+        assert await hub.next_message('u1', subscriber) == '{"type": "delta"}'
+        assert subscriber.getter is None
+
+        hub.unsubscribe('u1', subscriber)
+        assert hub.connection_count() == 0
+
+    asyncio.run(scenario())
+
+
+def test_remote_user_tag_pushes_delta(monkeypatch):
+    monkeypatch.setattr(valuation_stream, 'PUBLISH_DEBOUNCE', 0.01)
+    navs = {'u1': 10.0}
+    monkeypatch.setattr(valuation_hub, '_loader', lambda user_id: portfolio(navs[user_id]))
+
+    network = LocalTransport()
+    remote = InvalidationBus(origin='nav-job-worker')
+
+    async def scenario():
+        invalidation_bus.start(network)
+        remote.start(network.peer())
+        subscriber = await valuation_hub.subscribe('u1')
+        try:
+            await valuation_hub.next_message('u1', subscriber)  # snapshot
+
+            # The NAV job on another worker rewrote u1's holdings
+            navs['u1'] = 11.0
+            remote.publish('user:u1', 'user:u2')
+
+            message = json.loads(await asyncio.wait_for(valuation_hub.next_message('u1', subscriber), 1.0))
+            assert message['type'] == 'delta'
+            assert message['changed'][0]['current_nav'] == 11.0
+            assert message['summary'] == {'current_value': 110.0}
+        finally:
+            valuation_hub.unsubscribe('u1', subscriber)
+            remote.stop()
+            invalidation_bus.stop()
+
+    asyncio.run(scenario())
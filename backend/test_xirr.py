@@ -0,0 +1,75 @@
+"""
+Tests for the XIRR engine: solver and holding cash flows
+
+Run: python -m pytest test_xirr.py
+"""
+
+import sys
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.apis.portfolio.xirr import (
+    xirr, xirr_batch, holding_cash_flows, transaction_cash_flows,
+    SOURCE_TRANSACTIONS, SOURCE_TRANSACTIONS_WITH_OPENING
+)
+
+
+def test_xirr_single_year():
+    # 10% over a leap year: (1.1)^(365/366) - 1
+    rate = xirr([(date(2020, 1, 1), -1000.0), (date(2021, 1, 1), 1100.0)])
+    assert rate == pytest.approx(1.1 ** (365 / 366) - 1, abs=1e-7)
+
+
+def test_xirr_spreadsheet_reference():
+    # Reference example from the spreadsheet XIRR documentation
+    flows = [
+        (date(2008, 1, 1), -10000.0),
+        (date(2008, 3, 1), 2750.0),
+        (date(2008, 10, 30), 4250.0),
+        (date(2009, 2, 15), 3250.0),
+        (date(2009, 4, 1), 2750.0),
+    ]
+    assert xirr(flows) == pytest.approx(0.373362535, abs=1e-6)
+
+
+def test_xirr_batch_unsolvable_sets():
+    rates = xirr_batch([
+        [(date(2020, 1, 1), -1000.0)],                                   # no inflow
+        [(date(2020, 1, 1), -1000.0), (date(2020, 1, 10), 1010.0)],     # under MIN_XIRR_DAYS
+        [(date(2020, 1, 1), -1000.0), (date(2021, 1, 1), 500.0)],       # a loss still solves
+    ])
+    assert rates[0] is None
+    assert rates[1] is None
+    assert rates[2] == pytest.approx(0.5 ** (365 / 366) - 1, abs=1e-6)
+
+
+def test_dividend_reinvest_is_not_an_investment():
+    transactions = [
+        {'transaction_date': '2020-01-01', 'transaction_type': 'PURCHASE', 'amount': 1000, 'units': 100},
+        {'transaction_date': '2020-06-01', 'transaction_type': 'DIVIDEND_REINVEST', 'amount': 50, 'units': 5},
+    ]
+    assert transaction_cash_flows(transactions) == [(date(2020, 1, 1), -1000.0)]
+
+
+def test_statement_window_opening_balance():
+    holding = {'market_value': 3300, 'nav_date': '2021-01-01'}
+    # Statement starts with 200 units already held at NAV 10
+    transactions = [
+        {'transaction_date': '2020-01-01', 'transaction_type': 'PURCHASE',
+         'amount': 1000, 'units': 100, 'nav': 10, 'unit_balance': 300},
+    ]
+    flows, source = holding_cash_flows(holding, transactions, date(2021, 1, 1))
+    assert source == SOURCE_TRANSACTIONS_WITH_OPENING
+    assert flows[0] == (date(2020, 1, 1), -2000.0)
+    assert xirr(flows) == pytest.approx(1.1 ** (365 / 366) - 1, abs=1e-6)
+
+    # History that starts from zero units needs no opening flow
+    transactions[0]['unit_balance'] = 100
+    flows, source = holding_cash_flows(holding, transactions, date(2021, 1, 1))
+    assert source == SOURCE_TRANSACTIONS
+    assert len(flows) == 2